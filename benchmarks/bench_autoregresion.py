@@ -0,0 +1,96 @@
+# benchmarks/bench_autoregresion.py
+
+"""
+Benchmark: AutoregressionAD de ADTK (regresión de scikit-learn columna por columna)
+contra DetectorAutoregresion (models/detectores.py, QR por bloques de todas las
+columnas juntas), con los parámetros de correr_pruebas.
+
+Se comparan las marcas de fit_detect celda por celda (True/False/NaN) y el tiempo.
+Los datos son la serie normalizada del pipeline: la de un artefacto df_norm guardado
+por main, o la de datos trifásicos sintéticos (BackendSintetico) pasados por
+merge_data, preprocess_data y normalize_all_numeric. Termina con código 1 si alguna
+marca difiere.
+
+Uso:
+    python benchmarks/bench_autoregresion.py --filas 259200
+    python benchmarks/bench_autoregresion.py --artefacto df_norm --directorio data/raw
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from adtk.detector import AutoregressionAD
+from models.anomaly_detection import crear_serie, AR_N_STEPS, AR_STEP_SIZE, C_AUTOREG
+from models.detectores import DetectorAutoregresion
+from bench_pipeline import generar_medidas, LIST_COLS
+
+
+def serie_sintetica(filas, semilla):
+    from query_engine import merge_data
+    from data_processing.data_cleaning import preprocess_data, normalize_all_numeric
+    df = preprocess_data(merge_data(generar_medidas(filas, semilla), silenciar_warning=True))
+    return crear_serie(normalize_all_numeric(df)[LIST_COLS])
+
+
+def serie_artefacto(nombre, directorio):
+    from storage import leer_artefacto
+    return crear_serie(leer_artefacto(nombre, directorio, columnas=LIST_COLS))
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=259_200, help="Filas sintéticas (259200 = un mes a 10 s)")
+    parser.add_argument("--artefacto", help="Artefacto con la serie normalizada (por ejemplo df_norm)")
+    parser.add_argument("--directorio", help="Directorio del artefacto (por defecto OUTPUT_DIR)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    serie = serie_artefacto(args.artefacto, args.directorio) if args.artefacto else serie_sintetica(args.filas, args.semilla)
+
+    def adtk():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return AutoregressionAD(n_steps=AR_N_STEPS, step_size=AR_STEP_SIZE, c=C_AUTOREG).fit_detect(serie)
+
+    def nativo():
+        return DetectorAutoregresion(AR_N_STEPS, AR_STEP_SIZE, c=C_AUTOREG).fit_detect(serie)
+
+    t_adtk, marcas_adtk = medir(adtk, args.repeticiones)
+    t_nativo, marcas_nativo = medir(nativo, args.repeticiones)
+
+    a = marcas_adtk.to_numpy(dtype=float)
+    b = marcas_nativo.to_numpy(dtype=float)
+    distintas = (~((a == b) | (np.isnan(a) & np.isnan(b)))).sum(axis=0)
+
+    print(f"Serie: {len(serie):,} filas x {serie.shape[1]} columnas | n_steps={AR_N_STEPS}, "
+          f"step_size={AR_STEP_SIZE}, c={C_AUTOREG}")
+    print(f"{'detector':<24}{'segundos':>10}{'marcas':>10}")
+    print(f"{'AutoregressionAD':<24}{t_adtk:>10.3f}{int(np.nansum(a)):>10}")
+    print(f"{'DetectorAutoregresion':<24}{t_nativo:>10.3f}{int(np.nansum(b)):>10}")
+    print(f"Aceleración: x{t_adtk / t_nativo:.2f}")
+    for columna, n in zip(serie.columns, distintas):
+        print(f"  {columna:<16} marcas distintas: {n}")
+    if distintas.any():
+        sys.exit(1)
+    print("Marcas idénticas a AutoregressionAD")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_consulta_unica.py
+
+"""
+Benchmark: cinco consultas Flux por medida + merge en el cliente contra una única
+consulta pivotada y unida por _time en el servidor.
+
+Se generan respuestas CSV anotadas sintéticas con la forma que devuelve InfluxDB 2.7
+en cada caso y se miden bytes transferidos, decodificación (flux_reader) y combinación.
+Opcionalmente se suma una latencia fija por pedido HTTP.
+
+Uso:
+    python benchmarks/bench_consulta_unica.py --filas 260000 --latencia-ms 80
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from flux_reader import leer_csv_flux, concatenar_bloques
+from query_engine import CAMPOS_POR_MEDIDA, MEDIDAS, merge_data
+from utils.utils import convert_df_utc_to_local
+
+
+def _tiempos_rfc3339(filas, inicio="2024-01-01T00:00:00"):
+    tiempos = pd.date_range(inicio, periods=filas, freq="10s")
+    return tiempos.strftime("%Y-%m-%dT%H:%M:%SZ").tolist()
+
+
+def csv_por_medida(measure, campos, tiempos, rng):
+    """CSV de una consulta por medida: pivot con _start, _stop, _measurement y location."""
+    valores = rng.normal(100, 10, size=(len(tiempos), len(campos))).round(3)
+    lineas = [",result,table,_start,_stop,_time,_measurement,location," + ",".join(campos) + "\n"]
+    prefijo = f",_result,0,{tiempos[0]},{tiempos[-1]},"
+    sufijo = f",{measure.capitalize()},MEDIA,"
+    for t, fila in zip(tiempos, valores):
+        lineas.append(prefijo + t + sufijo + ",".join(map(str, fila)) + "\n")
+    return lineas
+
+
+def csv_unica(campos, tiempos, rng):
+    """CSV de la consulta única: keep + group + pivot, solo _time y los campos."""
+    valores = rng.normal(100, 10, size=(len(tiempos), len(campos))).round(3)
+    lineas = [",result,table,_time," + ",".join(campos) + "\n"]
+    for t, fila in zip(tiempos, valores):
+        lineas.append(",_result,0," + t + "," + ",".join(map(str, fila)) + "\n")
+    return lineas
+
+
+def _pedido(lineas, campos, latencia):
+    if latencia:
+        time.sleep(latencia)
+    df = concatenar_bloques(leer_csv_flux(iter(lineas), campos))
+    return convert_df_utc_to_local(df, 'time')
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=8_640, help="Filas por medida (8640 = un día a 10 s)")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Latencia simulada por pedido HTTP")
+    parser.add_argument("--workers", type=int, default=5, help="Hilos para las cinco consultas")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tiempos = _tiempos_rfc3339(args.filas)
+    latencia = args.latencia_ms / 1000
+    todos = [v for campos in CAMPOS_POR_MEDIDA.values() for v in campos]
+
+    respuestas = {m: csv_por_medida(m, CAMPOS_POR_MEDIDA[m], tiempos, rng) for m in MEDIDAS}
+    respuesta_unica = csv_unica(todos, tiempos, rng)
+
+    def cinco_consultas():
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futuros = {m: pool.submit(_pedido, respuestas[m], CAMPOS_POR_MEDIDA[m], latencia) for m in MEDIDAS}
+            data = {m: f.result() for m, f in futuros.items()}
+        return merge_data(data, silenciar_warning=True)
+
+    def consulta_unica():
+        return _pedido(respuesta_unica, todos, latencia)
+
+    t_cinco, df_cinco = medir(cinco_consultas, args.repeticiones)
+    t_unica, df_unica = medir(consulta_unica, args.repeticiones)
+    assert df_cinco.shape == df_unica.shape, (df_cinco.shape, df_unica.shape)
+
+    bytes_cinco = sum(len(l) for lineas in respuestas.values() for l in lineas)
+    bytes_unica = sum(len(l) for l in respuesta_unica)
+
+    print(f"Filas por medida: {args.filas:,} | latencia simulada: {args.latencia_ms:.0f} ms")
+    print(f"{'camino':<22}{'pedidos':>8}{'MB':>10}{'segundos':>11}{'forma':>16}")
+    print(f"{'5 consultas + merge':<22}{5:>8}{bytes_cinco / 1e6:>10.1f}{t_cinco:>11.3f}{str(df_cinco.shape):>16}")
+    print(f"{'consulta única':<22}{1:>8}{bytes_unica / 1e6:>10.1f}{t_unica:>11.3f}{str(df_unica.shape):>16}")
+    print(f"Aceleración: x{t_cinco / t_unica:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# benchmarks/bench_pipeline.py
+
+"""
+Benchmark del pipeline de main.main por etapas, sobre datos trifásicos sintéticos.
+
+Los datos se generan con BackendSintetico (las cinco medidas a 10 s, en hora local y
+con los tipos del esquema) y se encadenan las mismas etapas que main.main:
+
+    merge_data -> preprocess_data -> normalize_all_numeric -> crear_serie
+    -> correr_pruebas -> filtrar_eventos_unicos -> generate_ts_anomalies
+    -> Sequential_Input_LSTM -> una iteración de loop_continuo (procesar_medicion)
+
+Para cada etapa y escala se mide el tiempo (perf_counter) en una pasada y el pico de
+memoria (tracemalloc) en otra, porque tracemalloc encarece la ejecución. La
+generación de los datos no se mide. Los resultados se escriben en JSON para comparar
+entre commits:
+
+    python benchmarks/bench_pipeline.py                       # 8.6k, 260k y 3.1M filas
+    python benchmarks/bench_pipeline.py --filas 8640 --casos merge_data preprocess_data
+    python benchmarks/bench_pipeline.py --comparar benchmarks/resultados/anterior.json
+
+Una etapa cuyo módulo no se puede importar (Sequential_Input_LSTM necesita
+tensorflow) queda registrada como "omitido" con el motivo.
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backends.sintetico import BackendSintetico
+from schema import CAMPOS, MEDIDAS, dtype_de
+from config import MAX_ST
+from utils.logger import logger
+
+FILAS_POR_DEFECTO = (8_640, 259_200, 3_110_400)  # 1 día, 1 mes y 1 año a 10 s
+INICIO = pd.Timestamp("2024-01-01T03:00:00")      # 00:00 hora local, en UTC
+LIST_COLS = ['time', 'PowA_L1_Ins', 'PowF_T_Ins', 'THDI_L1_Ins']
+ETAPAS = (
+    "merge_data", "preprocess_data", "normalize_all_numeric", "crear_serie", "correr_pruebas",
+    "filtrar_eventos_unicos", "generate_ts_anomalies", "Sequential_Input_LSTM", "loop_continuo",
+)
+# Salidas de etapas previas que usa cada etapa (para liberar las que ya no hacen falta)
+DEPENDENCIAS = {
+    "merge_data": (),
+    "preprocess_data": ("merge_data",),
+    "normalize_all_numeric": ("preprocess_data",),
+    "crear_serie": ("normalize_all_numeric",),
+    "correr_pruebas": ("normalize_all_numeric", "crear_serie"),
+    "filtrar_eventos_unicos": ("correr_pruebas",),
+    "generate_ts_anomalies": ("filtrar_eventos_unicos", "normalize_all_numeric"),
+    "Sequential_Input_LSTM": ("normalize_all_numeric",),
+    "loop_continuo": ("merge_data", "normalize_all_numeric"),
+}
+RESULTADOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+
+class EtapaOmitida(Exception):
+    """La etapa no puede correr en este entorno (dependencia faltante)."""
+
+
+def generar_medidas(filas, semilla=0, location="MEDIA"):
+    """Un DataFrame por medida con 'time' en hora local, como lo devuelve query_engine."""
+    backend = BackendSintetico(semilla=semilla)
+    inicio_ns = INICIO.value
+    fin_ns = inicio_ns + filas * backend.paso_ns
+    campos = [c.nombre for c in CAMPOS]
+    data = {}
+    for medida in MEDIDAS:
+        t, valores = backend.datos(medida, campos, inicio_ns, fin_ns, location)
+        df = pd.DataFrame({c: v.astype(dtype_de(c)) for c, v in valores.items()})
+        df.insert(0, "time", pd.to_datetime(t) + pd.Timedelta(hours=-3))
+        data[medida] = df
+    return data
+
+
+def _sequential_input_lstm(serie):
+    try:
+        from models.prediction_lstm import Sequential_Input_LSTM
+    except ImportError as e:
+        raise EtapaOmitida(str(e))
+    return Sequential_Input_LSTM(serie, 1)
+
+
+def _iteracion_loop(df_merge, escalador, df_norm, directorio):
+    """Una vuelta de loop_continuo con la ventana de MAX_ST - 1 muestras ya cargada."""
+    from ejecucion_continua.ejecutar_loop_continuo import procesar_medicion, COLUMNAS_CONTINUO
+    from data_processing.limpieza_incremental import LimpiadorIncremental
+    df_temporal = df_merge[COLUMNAS_CONTINUO].iloc[:MAX_ST - 1].reset_index(drop=True)
+    ultima_med = df_merge.iloc[[MAX_ST - 1]].reset_index(drop=True)
+    pred_norm = pd.DataFrame({'LSTM Prediction': df_norm['PowF_T_Ins'].to_numpy()[:MAX_ST]})
+    limpiador = LimpiadorIncremental(COLUMNAS_CONTINUO[1:])
+    limpiador.agregar(df_temporal)
+    mae_filepath = os.path.join(directorio, "mae_resultados.csv")
+    return procesar_medicion(ultima_med, df_temporal, pred_norm, escalador, limpiador, mae_filepath)
+
+
+def correr_etapas(data, casos, directorio, medir_memoria, reportar):
+    """
+    Corre las etapas en orden hasta la última de `casos`; las previas no
+    seleccionadas corren igual (sus salidas alimentan a las siguientes) pero no se
+    registran. Cada salida se libera cuando ya no la usa ninguna etapa pendiente.
+
+    Args:
+        data (dict): DataFrame por medida; se vacía al correr merge_data.
+        reportar (callable): Recibe el dict de cada etapa seleccionada (segundos,
+            pico_mb y estado) apenas termina.
+    """
+    from query_engine import merge_data
+    from data_processing.data_cleaning import preprocess_data, normalize_all_numeric
+    from models.anomaly_detection import (
+        crear_serie, correr_pruebas, filtrar_eventos_unicos, generate_ts_anomalies,
+    )
+
+    ctx = {}
+    pasos = {
+        "merge_data": lambda: merge_data(data, silenciar_warning=True),
+        "preprocess_data": lambda: preprocess_data(ctx["merge_data"]),
+        "normalize_all_numeric": lambda: normalize_all_numeric(ctx["preprocess_data"], devolver_escalador=True),
+        "crear_serie": lambda: crear_serie(ctx["normalize_all_numeric"][0][LIST_COLS]),
+        "correr_pruebas": lambda: correr_pruebas(ctx["normalize_all_numeric"][0][LIST_COLS], ctx["crear_serie"]),
+        "filtrar_eventos_unicos": lambda: filtrar_eventos_unicos(ctx["correr_pruebas"][0], min_sep=300,
+                                                                 sample_rate_sec=10),
+        "generate_ts_anomalies": lambda: generate_ts_anomalies(
+            ctx["filtrar_eventos_unicos"], ctx["normalize_all_numeric"][0][LIST_COLS].copy(),
+            pd.DataFrame(columns=LIST_COLS), pd.DataFrame(columns=LIST_COLS), LIST_COLS),
+        "Sequential_Input_LSTM": lambda: _sequential_input_lstm(ctx["normalize_all_numeric"][0]['PowF_T_Ins']),
+        "loop_continuo": lambda: _iteracion_loop(ctx["merge_data"], ctx["normalize_all_numeric"][1],
+                                                 ctx["normalize_all_numeric"][0], directorio),
+    }
+
+    ultima = max(ETAPAS.index(c) for c in casos)
+    etapas = ETAPAS[:ultima + 1]
+    for i, etapa in enumerate(etapas):
+        registro = {"etapa": etapa, "segundos": None, "pico_mb": None, "estado": "ok"}
+        try:
+            gc.collect()
+            inicio = time.perf_counter()
+            ctx[etapa] = pasos[etapa]()
+            registro["segundos"] = round(time.perf_counter() - inicio, 4)
+            if medir_memoria and etapa in casos:
+                del ctx[etapa]
+                gc.collect()
+                tracemalloc.start()
+                ctx[etapa] = pasos[etapa]()
+                registro["pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                tracemalloc.stop()
+        except EtapaOmitida as e:
+            registro["estado"] = f"omitido: {e}"
+        except Exception as e:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            registro["estado"] = f"error: {type(e).__name__}: {e}"
+            logger.warning(f"Benchmark: falló la etapa {etapa}: {e}")
+        if etapa in casos:
+            reportar(registro)
+        if registro["estado"] != "ok" and etapa not in ("Sequential_Input_LSTM", "loop_continuo"):
+            # Las etapas siguientes dependen de esta salida
+            for resto in etapas[i + 1:]:
+                if resto in casos:
+                    reportar({"etapa": resto, "segundos": None, "pico_mb": None,
+                              "estado": f"omitido: falló {etapa}"})
+            return
+        if etapa == "merge_data":
+            data.clear()
+        for previa in list(ctx):
+            if not any(previa in DEPENDENCIAS[e] for e in etapas[i + 1:]):
+                del ctx[previa]
+
+
+def correr_escala(filas, casos, medir_memoria, semilla):
+    """
+    Corre una escala en un proceso hijo, así un corte por falta de memoria queda
+    registrado como error de la etapa en curso en lugar de terminar el benchmark.
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        registro = os.path.join(directorio, "registro.jsonl")
+        comando = [sys.executable, os.path.abspath(__file__), "--filas", str(filas), "--casos", *casos,
+                   "--semilla", str(semilla), "--_registro", registro]
+        if not medir_memoria:
+            comando.append("--sin-memoria")
+        proceso = subprocess.run(comando, stdout=subprocess.DEVNULL)
+        resultados = []
+        if os.path.exists(registro):
+            with open(registro, encoding="utf-8") as f:
+                resultados = [json.loads(linea) for linea in f]
+
+    if proceso.returncode != 0:
+        hechas = {r["etapa"] for r in resultados}
+        pendientes = [e for e in ETAPAS if e in casos and e not in hechas]
+        for j, etapa in enumerate(pendientes):
+            estado = (f"error: el proceso terminó con código {proceso.returncode} (¿memoria insuficiente?)"
+                      if j == 0 else f"omitido: falló {pendientes[0]}")
+            resultados.append({"etapa": etapa, "segundos": None, "pico_mb": None, "estado": estado})
+    for r in resultados:
+        r["filas"] = filas
+    return resultados
+
+
+def _proceso_hijo(args):
+    data = generar_medidas(args.filas[0], semilla=args.semilla)
+    logger.info(f"Benchmark: {args.filas[0]:,} filas generadas")
+    with tempfile.TemporaryDirectory() as directorio, open(args._registro, "w", encoding="utf-8") as f:
+        def reportar(registro):
+            f.write(json.dumps(registro) + "\n")
+            f.flush()
+        correr_etapas(data, set(args.casos), directorio, not args.sin_memoria, reportar)
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versiones():
+    import sklearn
+    import adtk
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "sklearn": sklearn.__version__, "adtk": adtk.__version__}
+
+
+def comparar(actual, anterior):
+    """Imprime la razón actual/anterior de tiempo y memoria por (etapa, filas)."""
+    previos = {(r["etapa"], r["filas"]): r for r in anterior["resultados"]}
+    print(f"\nComparación contra {anterior.get('commit')} ({anterior.get('fecha')})")
+    print(f"{'etapa':<24}{'filas':>10}{'t actual':>11}{'t previo':>11}{'razón':>8}{'mem razón':>11}")
+    for r in actual["resultados"]:
+        p = previos.get((r["etapa"], r["filas"]))
+        if p is None or r["segundos"] is None or p["segundos"] is None:
+            continue
+        razon_t = r["segundos"] / p["segundos"] if p["segundos"] else float("nan")
+        razon_m = (r["pico_mb"] / p["pico_mb"]) if r["pico_mb"] and p["pico_mb"] else float("nan")
+        print(f"{r['etapa']:<24}{r['filas']:>10,}{r['segundos']:>11.3f}{p['segundos']:>11.3f}"
+              f"{razon_t:>8.2f}{razon_m:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=list(FILAS_POR_DEFECTO),
+                        help="Filas por medida de cada escala (8640 = un día a 10 s)")
+    parser.add_argument("--casos", nargs="+", choices=ETAPAS, default=list(ETAPAS),
+                        help="Etapas a registrar (las previas corren igual para alimentarlas)")
+    parser.add_argument("--sin-memoria", action="store_true", help="No mide el pico de memoria")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto en benchmarks/resultados/)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--_registro", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._registro:
+        _proceso_hijo(args)
+        return
+
+    filas_resultado = []
+    for filas in args.filas:
+        for r in correr_escala(filas, args.casos, not args.sin_memoria, args.semilla):
+            filas_resultado.append(r)
+            pico = f"{r['pico_mb']:.1f} MB" if r["pico_mb"] is not None else "-"
+            segundos = f"{r['segundos']:.3f} s" if r["segundos"] is not None else "-"
+            print(f"{filas:>10,}  {r['etapa']:<24}{segundos:>12}{pico:>12}  {r['estado']}", flush=True)
+
+    resultado = {
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "plataforma": platform.platform(),
+        "versiones": _versiones(),
+        "semilla": args.semilla,
+        "resultados": filas_resultado,
+    }
+    salida = args.salida
+    if salida is None:
+        os.makedirs(RESULTADOS_DIR, exist_ok=True)
+        sufijo = resultado["commit"] or datetime.now().strftime("%Y%m%d_%H%M%S")
+        salida = os.path.join(RESULTADOS_DIR, f"pipeline_{sufijo}.json")
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 import sys
 import os
+import json
 from datetime import datetime, timezone, timedelta
 import calendar
 import time
@@ -24,9 +25,12 @@ from models.prediction_lstm import evaluar_prediccion
 from models.cammesa_analysis import leer_cammessa_csv, asociar_datos_energia
 from query_engine import consultar_datos_influx
 from data_processing.data_cleaning import preprocess_data, normalize_all_numeric
+from data_processing.resampling import remuestrear_grilla
+from storage import guardar_artefacto
 from utils.logger import logger
 from utils.utils import hora_local_a_utc
-from ejecucion_continua.ejecutar_loop_continuo import loop_continuo
+from ejecucion_continua.ejecutar_loop_continuo import loop_continuo, COLUMNAS_CONTINUO
+from ejecucion_particionada.pipeline_particionado import ejecutar_particionado
 
 from config import (
     EXECUTE_VISUALIZATION,
@@ -36,7 +40,12 @@ from config import (
     IMAGES_DIR,
     EJECUTAR_ANALISIS_ANOMALIAS,
     VISUALIZAR_MAE,
-    LOCAL_TIMEZONE
+    LOCAL_TIMEZONE,
+    USE_GRILLA,
+    USE_PARTICIONADO,
+    ESCALADOR_PATH,
+    DETECCION_CONTINUA,
+    SELECCION_DETECTOR
 )
 
 # Definir zonas
@@ -75,45 +84,79 @@ def main():
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         os.makedirs(IMAGES_DIR, exist_ok=True)
 
-    # ---------------------------------------------
-    # 2. CONSULTA A LAS BASES DE DATOS
-    # ---------------------------------------------
-
-    df = consultar_datos_influx(fecha_inicio, fecha_fin, location, output_dir=OUTPUT_DIR, guardar=SAVE_OUTPUTS)
-
-    if df.empty or 'time' not in df.columns:
-        logger.error("No se puede continuar: DataFrame inválido")
-        return
-
-    # ---------------------------------------------
-    # 3. LIMPIEZA DE DATOS
-    # ---------------------------------------------
-
-    logger.info("Limpieza básica ...")
-    df_clean = preprocess_data(df)
+    list_cols = ['time','PowA_L1_Ins','PowF_T_Ins','THDI_L1_Ins']
+    # Detectores en línea para la ejecución continua (solo con la serie normalizada completa)
+    detectores_continuos = None
+
+    if USE_PARTICIONADO:
+        # Rangos largos: consulta, limpieza, normalización y detección por particiones
+        resultado = ejecutar_particionado(fecha_inicio, fecha_fin, location, list_cols,
+                                          output_dir=OUTPUT_DIR if SAVE_OUTPUTS else None,
+                                          detector=SELECCION_DETECTOR)
+        if resultado is None:
+            logger.error("No se puede continuar: la ejecución particionada no trajo datos")
+            return
+        df_st_anom, df_st_norm, df_resumen_anomalias, escalador, stats_limpieza = resultado
+        escalador.guardar(ESCALADOR_PATH)
+        if SAVE_OUTPUTS:
+            with open(os.path.join(OUTPUT_DIR, "stats_limpieza.json"), "w", encoding="utf-8") as f:
+                json.dump(stats_limpieza.a_dict(), f, indent=2)
+    else:
+        # ---------------------------------------------
+        # 2. CONSULTA A LAS BASES DE DATOS
+        # ---------------------------------------------
+
+        df = consultar_datos_influx(fecha_inicio, fecha_fin, location, output_dir=OUTPUT_DIR, guardar=SAVE_OUTPUTS)
+
+        if df.empty or 'time' not in df.columns:
+            logger.error("No se puede continuar: DataFrame inválido")
+            return
+
+        # ---------------------------------------------
+        # 3. GRILLA REGULAR Y LIMPIEZA DE DATOS
+        # ---------------------------------------------
+
+        if USE_GRILLA:
+            logger.info("Ajustando los datos a la grilla de 10 s ...")
+            grilla = remuestrear_grilla(df)
+            df = grilla.a_dataframe()
+            df_huecos = grilla.tabla_huecos()
+            logger.info(f"Huecos sin completar: {len(df_huecos)}")
+            if SAVE_OUTPUTS:
+                guardar_artefacto(df_huecos, "huecos", OUTPUT_DIR)
+
+        logger.info("Limpieza básica ...")
+        # df no se vuelve a usar: se limpia sobre el mismo DataFrame para no duplicarlo
+        df_clean, stats_limpieza = preprocess_data(df, inplace=True, devolver_stats=True)
+        del df
   
-    if SAVE_OUTPUTS:
-        clean_path = os.path.join(OUTPUT_DIR, "df_clean.csv")
-        df_clean.to_csv(clean_path, index=False)
-        logger.info(f"Datos limpios InfluxDB guardados en {os.path.abspath(clean_path)}")
+        if SAVE_OUTPUTS:
+            guardar_artefacto(df_clean, "df_clean", OUTPUT_DIR)
+            with open(os.path.join(OUTPUT_DIR, "stats_limpieza.json"), "w", encoding="utf-8") as f:
+                json.dump(stats_limpieza.a_dict(), f, indent=2)
 
-    # ---------------------------------------------
-    # 4. NORMALIZACIÓN
-    # ---------------------------------------------
+        # ---------------------------------------------
+        # 4. NORMALIZACIÓN
+        # ---------------------------------------------
 
-    df_norm = normalize_all_numeric(df_clean)
+        df_norm, escalador = normalize_all_numeric(df_clean, devolver_escalador=True)
+        escalador.guardar(ESCALADOR_PATH)
+        # La ejecución continua desnormaliza con el escalador: df_clean ya no hace falta
+        del df_clean
 
-    if SAVE_OUTPUTS:
-        norm_path = os.path.join(OUTPUT_DIR, "df_norm.csv")
-        df_norm.to_csv(norm_path, index=False)
-        logger.info(f"Datos normalizados InfluxDB guardados en {os.path.abspath(norm_path)}")
+        if SAVE_OUTPUTS:
+            guardar_artefacto(df_norm, "df_norm", OUTPUT_DIR)
 
-    # ---------------------------------------------
-    # 5. DETECCIÓN DE PERTURBACIONES
-    # ---------------------------------------------
+        # ---------------------------------------------
+        # 5. DETECCIÓN DE PERTURBACIONES
+        # ---------------------------------------------
 
-    list_cols = ['time','PowA_L1_Ins','PowF_T_Ins','THDI_L1_Ins']
-    df_st_anom, df_st_norm, df_resumen_anomalias = anom.deteccion_anomalias_pipeline(df_norm, list_cols, OUTPUT_DIR)
+        df_st_anom, df_st_norm, df_resumen_anomalias = anom.deteccion_anomalias_pipeline(
+            df_norm, list_cols, OUTPUT_DIR, detector=SELECCION_DETECTOR)
+
+        if DETECCION_CONTINUA:
+            columnas_continuo = [c for c in COLUMNAS_CONTINUO[1:] if c in df_norm.columns]
+            detectores_continuos = anom.crear_detectores_continuos(df_norm, columnas_continuo)
 
     if SHOW_GRAPHS:
         anom.visualizar_series_anomalias(df_st_anom, df_st_norm)
@@ -149,7 +192,8 @@ def main():
     # Flag de control (puede centralizarse en config si se estabiliza)
     VISUALIZAR_MAE = False
 
-    loop_continuo(location, pred_norm, df_clean, visualizar_mae=VISUALIZAR_MAE)
+    loop_continuo(location, pred_norm, escalador, visualizar_mae=VISUALIZAR_MAE, stats_limpieza=stats_limpieza,
+                  detectores=detectores_continuos)
 
     logger.info("==== FIN DEL PROCESO ====")
 
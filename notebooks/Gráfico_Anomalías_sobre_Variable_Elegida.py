@@ -8,20 +8,19 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 import pandas as pd
 import matplotlib.pyplot as plt
 from models.anomaly_detection import filtrar_eventos_unicos
+from storage import leer_artefacto
 
 warnings.simplefilter(action='ignore', category=pd.errors.DtypeWarning)
 
 # Cargar datos normales y resultados de anomalía
-df = pd.read_csv("data/raw/df_norm.csv", low_memory=False)
-df['time'] = pd.to_datetime(df['time'])
+df = leer_artefacto("df_norm", "data/raw", columnas=['time', 'PowA_L1_Ins', 'PowF_T_Ins', 'THDI_L1_Ins'])
 print(df.dtypes)
 print(df['PowA_L1_Ins'].unique()[:10])
 print(df['PowF_T_Ins'].unique()[:10])
 print(df['THDI_L1_Ins'].unique()[:10])
 
 # Cargar resultados de anomalía
-anom = pd.read_csv("data/raw/serie_anomala_AutoReg.csv")
-anom['time'] = pd.to_datetime(anom['time'])
+anom = leer_artefacto("serie_anomala_AutoReg", "data/raw")
 
 # Seleccionar variable a analizar
 variable = "THDI_L1_Ins"
@@ -29,8 +28,7 @@ variable = "THDI_L1_Ins"
 # Asegurar que los índices estén alineados
 df.set_index('time', inplace=True)
 
-anom = pd.read_csv("data/raw/serie_anomala_AutoReg.csv")
-anom['time'] = pd.to_datetime(anom['time'])
+anom = leer_artefacto("serie_anomala_AutoReg", "data/raw")
 
 # Eliminar duplicados directamente al cargar
 anom.drop_duplicates(subset='time', inplace=True)
@@ -67,28 +65,28 @@ import matplotlib.pyplot as plt
 warnings.simplefilter(action='ignore', category=pd.errors.DtypeWarning)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
-from models.anomaly_detection import filtrar_eventos_unicos
+from models.eventos import segmentar_eventos
+from storage import leer_artefacto
 
 # Parámetros de entrada
 variable = "THDI_L1_Ins"  # Cambiar por "THDI_L1_Ins" o "PowF_T_Ins" si querés usar Factor de Potencia
 
-# Cargar datos normalizados
-df = pd.read_csv("data/raw/df_norm.csv", low_memory=False)
-df['time'] = pd.to_datetime(df['time'])
+# Cargar datos normalizados (solo las columnas del gráfico)
+df = leer_artefacto("df_norm", "data/raw", columnas=['time', 'PowA_L1_Ins', variable])
 df.set_index('time', inplace=True)
 
-# Cargar resultados de anomalía y limpiar duplicados
-anom = pd.read_csv("data/raw/serie_anomala_AutoReg.csv")
-anom['time'] = pd.to_datetime(anom['time'])
+# Cargar las etiquetas del detector y limpiar duplicados
+anom = leer_artefacto("anomalias_AutoReg", "data/raw", columnas=['time', variable])
 anom.drop_duplicates(subset='time', inplace=True)
 anom.set_index('time', inplace=True)
 anom = anom.reindex(df.index, fill_value=False)
 
-# Aplicar filtrado de eventos únicos
-anom_filtradas = filtrar_eventos_unicos(anom[[variable]], min_sep=300, sample_rate_sec=10)
+# Eventos únicos: inicio, fin y pico de cada uno
+eventos = segmentar_eventos(anom[[variable]], min_sep=300, sample_rate_sec=10, valores=df[variable])
+print(eventos)
 
-# Crear máscara de puntos anómalos
-mask_filtradas = df.index.isin(anom_filtradas.index)
+# Crear máscara de puntos anómalos (el pico de cada evento)
+mask_filtradas = df.index.isin(eventos['pico'])
 
 # === Gráfico con subplots ===
 fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 6), sharex=True, gridspec_kw={'height_ratios': [1.5, 1]})
@@ -103,6 +101,8 @@ ax1.legend()
 # Subplot inferior: Variable seleccionada con anomalías
 ax2.plot(df.index, df[variable], label=variable, color='tab:blue', alpha=0.6)
 ax2.scatter(df.index[mask_filtradas], df[variable][mask_filtradas], color='r', label='Anomalías detectadas', s=12)
+for _, evento in eventos.iterrows():
+    ax2.axvspan(evento['inicio'], evento['fin'], color='r', alpha=0.15)
 ax2.set_ylabel("THDI\n[Valor Normalizado]")
 ax2.set_xlabel("Tiempo")
 ax2.grid(True)
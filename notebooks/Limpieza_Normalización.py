@@ -9,12 +9,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..','sr
 
 import pandas as pd
 from data_processing.data_cleaning import preprocess_data, preprocess_data2, normalize_all_numeric
+from storage import leer_artefacto
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 # 🔹 Carga de datos crudos
-raw_path = os.path.join("data", "raw", "df_raw.csv")
-df_raw = pd.read_csv(raw_path, parse_dates=['time'])
+df_raw = leer_artefacto("df_raw", os.path.join("data", "raw"))
 print("Datos crudos cargados:")
 print(df_raw.head())
 print(df_raw.tail())
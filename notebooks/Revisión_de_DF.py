@@ -1,9 +1,11 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 import pandas as pd
 from notebooks.calidad_datos import revisar_calidad_datos
+from storage import leer_artefacto
 
-df = pd.read_csv("data/raw/df_norm.csv")
+df = leer_artefacto("df_norm", "data/raw")
 revisar_calidad_datos(df)
\ No newline at end of file
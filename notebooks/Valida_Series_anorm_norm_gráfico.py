@@ -1,12 +1,14 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 from notebooks.Visual_Validation import graficar_ejemplos_series
 import pandas as pd
+from storage import leer_artefacto
 
 # Cargar series ya guardadas
-df_anom = pd.read_csv("data/raw/serie_anomala_AutoReg.csv")
-df_norm = pd.read_csv("data/raw/serie_normal_AutoReg.csv")
+df_anom = leer_artefacto("serie_anomala_AutoReg", "data/raw")
+df_norm = leer_artefacto("serie_normal_AutoReg", "data/raw")
 
 graficar_ejemplos_series(df_anom, df_norm, rango=300)
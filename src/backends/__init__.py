@@ -0,0 +1,37 @@
+# src/backends/__init__.py
+
+"""
+Backends de InfluxDB intercambiables debajo de DBConnector:
+
+- real:      InfluxDB 1.8 y 2.7 (producción).
+- grabar:    las bases reales, guardando cada respuesta en disco.
+- replay:    responde desde las respuestas grabadas, sin red.
+- sintetico: genera datos trifásicos de 10 s a la escala que se pida.
+"""
+
+from config import INFLUX_BACKEND, BACKEND_GRABACIONES_DIR, SINTETICO_SEMILLA, SINTETICO_PROB_HUECO
+from backends.base import BackendInflux
+from backends.real import BackendReal
+from backends.grabacion import BackendGrabador, BackendReplay
+from backends.sintetico import BackendSintetico
+
+BACKENDS = ("real", "grabar", "replay", "sintetico")
+
+
+def crear_backend(nombre=None, conector=None):
+    """
+    Crea el backend indicado (por defecto INFLUX_BACKEND de config).
+
+    Args:
+        conector (DBConnector): Dueño de los clientes reales; necesario para 'real' y 'grabar'.
+    """
+    nombre = nombre or INFLUX_BACKEND
+    if nombre == "real":
+        return BackendReal(conector)
+    if nombre == "grabar":
+        return BackendGrabador(BackendReal(conector), BACKEND_GRABACIONES_DIR)
+    if nombre == "replay":
+        return BackendReplay(BACKEND_GRABACIONES_DIR)
+    if nombre == "sintetico":
+        return BackendSintetico(semilla=SINTETICO_SEMILLA, prob_hueco=SINTETICO_PROB_HUECO)
+    raise ValueError(f"Backend desconocido: {nombre}. Opciones: {BACKENDS}")
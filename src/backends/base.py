@@ -0,0 +1,61 @@
+# src/backends/base.py
+
+"""
+Interfaz común de los backends de InfluxDB.
+DBConnector no habla directamente con los clientes: pide a un backend las líneas
+crudas de la respuesta (CSV anotado de Flux o JSON chunked de InfluxQL) y las
+decodifica con flux_reader / influxql_reader. Así las bases reales, una grabación
+en disco o un generador sintético son intercambiables.
+"""
+
+import pandas as pd
+
+from flux_reader import leer_csv_flux
+from influxql_reader import leer_json_influxql
+
+
+class BackendInflux:
+    nombre = "base"
+
+    def flux_lineas(self, query):
+        """Iterador de líneas (str) del CSV anotado que responde la consulta Flux."""
+        raise NotImplementedError
+
+    def influxql_lineas(self, query, chunk_size):
+        """Iterador de líneas JSON (una por chunk) de la consulta InfluxQL con epoch=ns."""
+        raise NotImplementedError
+
+    def flux_dataframe(self, query):
+        """Equivalente a query_data_frame: '_time' con zona UTC y una columna por campo."""
+        lineas = list(self.flux_lineas(query))
+        campos = _campos_de_encabezado(lineas)
+        bloques = list(leer_csv_flux(lineas, campos))
+        if not bloques:
+            return pd.DataFrame()
+        df = pd.concat(bloques, ignore_index=True)
+        df["time"] = df["time"].dt.tz_localize("UTC")
+        return df.rename(columns={"time": "_time"})
+
+    def influxql_puntos(self, query):
+        """Equivalente a list(client.query(query).get_points()): dicts con 'time' RFC3339."""
+        puntos = []
+        for df in leer_json_influxql(self.influxql_lineas(query, 10_000)):
+            df = df.astype({c: "float64" for c in df.columns if c != "time"})
+            df["time"] = df["time"].dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            puntos.extend(df.to_dict("records"))
+        return puntos
+
+    def ping(self):
+        return True
+
+    def cerrar(self):
+        pass
+
+
+def _campos_de_encabezado(lineas):
+    """Columnas de valores del primer encabezado del CSV (todo lo que no es meta ni tag)."""
+    meta = {"", "result", "table", "_start", "_stop", "_time", "_measurement", "location"}
+    for linea in lineas:
+        if linea.startswith(",result,"):
+            return [c for c in linea.rstrip("\r\n").split(",") if c not in meta]
+    return []
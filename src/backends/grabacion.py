@@ -0,0 +1,92 @@
+# src/backends/grabacion.py
+
+"""
+Grabación y reproducción de respuestas de InfluxDB.
+BackendGrabador envuelve otro backend y guarda en disco cada respuesta tal como
+llega; BackendReplay responde las mismas consultas desde esos archivos, sin red.
+Cada respuesta se identifica por el hash de la consulta:
+
+    <directorio>/<sha1>.flux.csv         respuesta Flux (CSV anotado)
+    <directorio>/<sha1>.influxql.jsonl   respuesta InfluxQL (un chunk JSON por línea)
+    <directorio>/indice.jsonl            consulta original de cada archivo
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+from backends.base import BackendInflux
+from utils.logger import logger
+
+_lock = threading.Lock()
+
+
+def clave_consulta(query):
+    """Hash de la consulta normalizada (sin espacios de sangría)."""
+    normalizada = " ".join(query.split())
+    return hashlib.sha1(normalizada.encode("utf-8")).hexdigest()
+
+
+def _ruta(directorio, query, extension):
+    return os.path.join(directorio, f"{clave_consulta(query)}.{extension}")
+
+
+class BackendGrabador(BackendInflux):
+    nombre = "grabar"
+
+    def __init__(self, backend, directorio):
+        self.backend = backend
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def _grabar(self, lineas, query, extension):
+        """Reenvía las líneas y las escribe en disco; el archivo solo queda si la respuesta llegó completa."""
+        ruta = _ruta(self.directorio, query, extension)
+        tmp = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            try:
+                for linea in lineas:
+                    texto = linea.decode("utf-8") if isinstance(linea, bytes) else linea
+                    f.write(texto if texto.endswith("\n") else texto + "\n")
+                    yield linea
+            except BaseException:
+                f.close()
+                os.remove(tmp)
+                raise
+        os.replace(tmp, ruta)
+        with _lock, open(os.path.join(self.directorio, "indice.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"archivo": os.path.basename(ruta), "query": query}) + "\n")
+
+    def flux_lineas(self, query):
+        return self._grabar(self.backend.flux_lineas(query), query, "flux.csv")
+
+    def influxql_lineas(self, query, chunk_size):
+        return self._grabar(self.backend.influxql_lineas(query, chunk_size), query, "influxql.jsonl")
+
+    def ping(self):
+        return self.backend.ping()
+
+    def cerrar(self):
+        self.backend.cerrar()
+
+
+class BackendReplay(BackendInflux):
+    nombre = "replay"
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def _leer(self, query, extension):
+        ruta = _ruta(self.directorio, query, extension)
+        if not os.path.exists(ruta):
+            logger.warning(f"Replay: sin grabación para la consulta ({os.path.basename(ruta)})")
+            raise FileNotFoundError(f"Sin grabación para la consulta: {' '.join(query.split())[:200]}")
+        with open(ruta, encoding="utf-8") as f:
+            yield from f
+
+    def flux_lineas(self, query):
+        return self._leer(query, "flux.csv")
+
+    def influxql_lineas(self, query, chunk_size):
+        return self._leer(query, "influxql.jsonl")
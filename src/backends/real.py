@@ -0,0 +1,75 @@
+# src/backends/real.py
+
+"""
+Backend de las bases reales: InfluxDB 1.8 (influxdb-python) e InfluxDB 2.7
+(influxdb_client). Usa los clientes compartidos que administra DBConnector.
+
+La lectura chunked de InfluxDB 1.8 va por una sesión HTTP propia (el endpoint
+/query con epoch=ns y chunked=true) en lugar de los atributos internos del
+cliente de influxdb-python, que pueden cambiar entre versiones.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import INFLUXDB1_CONFIG, INFLUX_POOL_SIZE
+from backends.base import BackendInflux
+
+
+class BackendReal(BackendInflux):
+    nombre = "real"
+
+    def __init__(self, conector):
+        self.conector = conector
+        self._sesion1 = None
+        self._lock = threading.Lock()
+
+    def _sesion_influxdb1(self):
+        """Sesión keep-alive para el endpoint /query de InfluxDB 1.8 (una sola vez)."""
+        with self._lock:
+            if self._sesion1 is None:
+                sesion = requests.Session()
+                sesion.auth = (INFLUXDB1_CONFIG['username'], INFLUXDB1_CONFIG['password'])
+                sesion.verify = INFLUXDB1_CONFIG['verify_ssl']
+                sesion.headers.update({'Accept': 'application/json'})
+                sesion.mount('http://', HTTPAdapter(pool_maxsize=INFLUX_POOL_SIZE))
+                sesion.mount('https://', HTTPAdapter(pool_maxsize=INFLUX_POOL_SIZE))
+                self._sesion1 = sesion
+        return self._sesion1
+
+    def flux_lineas(self, query):
+        respuesta = self.conector.query_api2().query_raw(query)
+        try:
+            for linea in respuesta:
+                yield linea.decode('utf-8')
+        finally:
+            respuesta.release_conn()
+
+    def influxql_lineas(self, query, chunk_size):
+        esquema = 'https' if INFLUXDB1_CONFIG['ssl'] else 'http'
+        url = f"{esquema}://{INFLUXDB1_CONFIG['host']}:{INFLUXDB1_CONFIG['port']}/query"
+        params = {'q': query, 'db': INFLUXDB1_CONFIG['database'], 'epoch': 'ns',
+                  'chunked': 'true', 'chunk_size': chunk_size}
+        respuesta = self._sesion_influxdb1().get(url, params=params, stream=True,
+                                                 timeout=INFLUXDB1_CONFIG['timeout'])
+        try:
+            if respuesta.status_code != 200:
+                raise RuntimeError(f"InfluxDB 1.8 respondió {respuesta.status_code}: {respuesta.text}")
+            yield from respuesta.iter_lines()
+        finally:
+            respuesta.close()
+
+    def flux_dataframe(self, query):
+        return self.conector.query_api2().query_data_frame(query=query)
+
+    def influxql_puntos(self, query):
+        result = self.conector.connect_influxdb1().query(query)
+        return list(result.get_points())
+
+    def cerrar(self):
+        with self._lock:
+            if self._sesion1 is not None:
+                self._sesion1.close()
+                self._sesion1 = None
@@ -0,0 +1,306 @@
+# src/backends/sintetico.py
+
+"""
+Backend sintético: genera datos trifásicos realistas a 10 s y responde las mismas
+consultas Flux e InfluxQL que arma query_engine (pivot por medida, consulta única
+ancha, aggregateWindow y GROUP BY time()), en el formato de las bases reales.
+
+Los datos son deterministas: cada día (UTC) se genera con una semilla derivada de
+(semilla, locación, día), así que dos consultas que se solapan ven los mismos
+valores. El perfil de carga sigue una jornada industrial (menos carga de noche y
+los fines de semana), con desbalance entre fases, escalones de carga ("eventos")
+y, opcionalmente, muestras faltantes por medida.
+"""
+
+import re
+import json
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from schema import ESQUEMA, MEDIDAS
+from backends.base import BackendInflux
+
+UN_DIA_NS = 86_400 * 10**9
+OFFSET_LOCAL_H = -3  # Argentina, sin horario de verano
+FILAS_POR_BLOQUE = 50_000
+
+_RE_RANGO_FLUX = re.compile(r'range\(start: time\(v: "([^"]+)"\), stop: time\(v: "([^"]+)"\)\)')
+_RE_MEDIDA_FLUX = re.compile(r'r\._measurement == "(\w+)"')
+_RE_CAMPO_FLUX = re.compile(r'r\._field == "(\w+)"')
+_RE_LOCATION_FLUX = re.compile(r'r\.location == "([^"]+)"')
+_RE_VENTANA_FLUX = re.compile(r'aggregateWindow\(every: (\w+), fn: (\w+)')
+_RE_INFLUXQL = re.compile(
+    r"SELECT\s+(.*?)\s+FROM\s+\"(\w+)\"\s+WHERE\s+time\s*>=\s*'([^']+)'\s+AND\s+time\s*<=\s*'([^']+)'"
+    r"\s+AND\s+location='([^']+)'(?:\s+GROUP BY time\((\w+)\))?", re.S)
+_RE_SELECT_AGREGADO = re.compile(r"(\w+)\((\w+)\)\s+AS\s+(\w+)")
+
+
+def _ns(fecha):
+    ts = pd.Timestamp(fecha)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value
+
+
+def _rfc3339(t_ns):
+    return np.char.add(np.datetime_as_string(t_ns.view("datetime64[ns]"), unit="s"), "Z")
+
+
+def _suavizar(x, ancho):
+    return np.convolve(x, np.ones(ancho) / ancho, mode="same")
+
+
+def _agregar(t, valores, every_ns, fn):
+    """Agrega por ventanas alineadas a epoch; el tiempo de cada ventana es su inicio."""
+    if len(t) == 0:
+        return t, valores[:0]
+    ventana = (t // every_ns) * every_ns
+    inicios = np.flatnonzero(np.r_[True, ventana[1:] != ventana[:-1]])
+    if fn == "mean":
+        cuenta = np.diff(np.r_[inicios, len(t)])
+        res = np.add.reduceat(valores, inicios) / cuenta
+    elif fn == "min":
+        res = np.minimum.reduceat(valores, inicios)
+    elif fn == "max":
+        res = np.maximum.reduceat(valores, inicios)
+    elif fn == "last":
+        res = valores[np.r_[inicios[1:], len(t)] - 1]
+    else:
+        raise ValueError(f"Función de agregación no soportada: {fn}")
+    return ventana[inicios], res
+
+
+class BackendSintetico(BackendInflux):
+    nombre = "sintetico"
+
+    def __init__(self, semilla=0, paso_seg=10, prob_hueco=0.0, eventos_por_dia=4, potencia_nominal=60_000.0):
+        """
+        Args:
+            semilla (int): Semilla base de la generación.
+            paso_seg (int): Período de muestreo de los medidores.
+            prob_hueco (float): Probabilidad de que falte cada muestra de cada medida.
+            eventos_por_dia (float): Media de escalones de carga por día.
+            potencia_nominal (float): Potencia activa trifásica a plena carga (W).
+        """
+        self.semilla = semilla
+        self.paso_ns = int(paso_seg * 10**9)
+        self.prob_hueco = prob_hueco
+        self.eventos_por_dia = eventos_por_dia
+        self.potencia_nominal = potencia_nominal
+        self._dias = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Generación
+    # ------------------------------------------------------------------
+
+    def _generar_dia(self, dia, location):
+        rng = np.random.default_rng([self.semilla, zlib.crc32(location.encode()), dia % 2**32])
+        n = UN_DIA_NS // self.paso_ns
+        t = dia * UN_DIA_NS + np.arange(n, dtype=np.int64) * self.paso_ns
+
+        t_local_h = (t / 3.6e12 + OFFSET_LOCAL_H)
+        hora = t_local_h % 24
+        dia_semana = ((t_local_h // 24).astype(np.int64) + 3) % 7  # 1970-01-01 fue jueves
+        jornada = 1 / (1 + np.exp(-(hora - 7.5) * 3)) / (1 + np.exp((hora - 18) * 3))
+        jornada = np.where(dia_semana >= 5, 0.3 * jornada, jornada)
+        carga = (0.25 + 0.75 * jornada) * (1 + 0.15 * _suavizar(rng.standard_normal(n), 30))
+
+        # Escalones de carga con subida de THD de corriente
+        evento = np.zeros(n)
+        for _ in range(rng.poisson(self.eventos_por_dia)):
+            inicio = rng.integers(0, n)
+            duracion = rng.integers(30, 360)
+            evento[inicio:inicio + duracion] = rng.uniform(0.3, 0.8)
+        carga = np.clip(carga * (1 + evento), 0.05, None)
+
+        fp = np.clip(0.92 + 0.15 * _suavizar(rng.standard_normal(n), 60) - 0.05 * (carga < 0.4), 0.5, 0.99)
+        v = {}
+        energia = np.zeros(n)
+        for k, fase in enumerate(("L1", "L2", "L3")):
+            desbalance = (1.0, 0.95, 1.05)[k] * (1 + 0.02 * _suavizar(rng.standard_normal(n), 10))
+            pot_a = self.potencia_nominal / 3 * carga * desbalance
+            vrms = (220 + 2 * np.sin(2 * np.pi * hora / 24 + k) - 4 * (carga - 0.5)
+                    + 0.5 * rng.standard_normal(n))
+            pot_s = pot_a / fp
+            v[f"PowA_{fase}_Ins"] = pot_a
+            v[f"PowS_{fase}_Ins"] = pot_s
+            v[f"Vrms_{fase}_Ins"] = vrms
+            v[f"Irms_{fase}_Ins"] = pot_s / vrms
+            v[f"THDV_{fase}_Ins"] = np.abs(2.0 + 0.5 * carga + 0.1 * rng.standard_normal(n))
+            v[f"THDI_{fase}_Ins"] = np.clip(8 + 12 * (1 - np.minimum(carga, 1)) + 10 * evento
+                                            + rng.standard_normal(n), 1, 60)
+            energia += pot_a
+        v["PowF_T_Ins"] = fp
+        v["Fre_Ins"] = 50 + 2 * _suavizar(rng.standard_normal(n), 120) * 0.02 + 0.005 * rng.standard_normal(n)
+        # Contador creciente: el inicio de cada día acota por arriba la energía de los días previos
+        v["EA_I_IV_T"] = 1e6 + dia * 2 * self.potencia_nominal * 24 + np.cumsum(energia) * self.paso_ns / 3.6e12
+        v = {c: np.round(x, 3) for c, x in v.items()}
+
+        presentes = {}
+        for medida in MEDIDAS:
+            presentes[medida] = (rng.random(n) >= self.prob_hueco) if self.prob_hueco else None
+        return t, v, presentes
+
+    def _dia(self, dia, location):
+        clave = (dia, location)
+        if clave in self._dias:
+            self._dias.move_to_end(clave)
+            return self._dias[clave]
+        datos = self._generar_dia(dia, location)
+        self._dias[clave] = datos
+        if len(self._dias) > 8:
+            self._dias.popitem(last=False)
+        return datos
+
+    def datos(self, medida, campos, inicio_ns, fin_ns, location, incluir_fin=False):
+        """
+        Serie cruda de una medida en [inicio, fin) (o [inicio, fin] con incluir_fin).
+
+        Returns:
+            tuple: (tiempos int64 ns, {campo: valores float64}).
+        """
+        campos = [c for c in campos if c in ESQUEMA and ESQUEMA[c].medida == medida]
+        tiempos, valores = [], {c: [] for c in campos}
+        dia = inicio_ns // UN_DIA_NS
+        while dia * UN_DIA_NS <= fin_ns:
+            t, v, presentes = self._dia(dia, location)
+            sel = (t >= inicio_ns) & ((t <= fin_ns) if incluir_fin else (t < fin_ns))
+            if presentes[medida] is not None:
+                sel &= presentes[medida]
+            tiempos.append(t[sel])
+            for c in campos:
+                valores[c].append(v[c][sel])
+            dia += 1
+        t = np.concatenate(tiempos) if tiempos else np.empty(0, dtype=np.int64)
+        return t, {c: (np.concatenate(x) if x else np.empty(0)) for c, x in valores.items()}
+
+    def _series(self, medidas, campos, inicio_ns, fin_ns, location, aggs, incluir_fin):
+        """Series por medida, agregadas si se pidieron ventanas. aggs: [(every_ns, fn, sufijo)]."""
+        salida = []
+        for medida in medidas:
+            t, v = self.datos(medida, campos, inicio_ns, fin_ns, location, incluir_fin)
+            if not v:
+                continue
+            if not aggs:
+                salida.append((medida, t, v))
+                continue
+            agregados = {}
+            t_ag = t[:0]
+            for every_ns, fn, sufijo in aggs:
+                for c, x in v.items():
+                    t_ag, agregados[c + sufijo] = _agregar(t, x, every_ns, fn)
+            salida.append((medida, t_ag, agregados))
+        return salida
+
+    # ------------------------------------------------------------------
+    # Flux
+    # ------------------------------------------------------------------
+
+    def flux_lineas(self, query):
+        rango = _RE_RANGO_FLUX.search(query)
+        if rango is None:
+            raise ValueError("Consulta Flux no soportada por el backend sintético")
+        inicio_ns, fin_ns = _ns(rango.group(1)), _ns(rango.group(2))
+        medidas = [m.lower() for m in _RE_MEDIDA_FLUX.findall(query)]
+        campos = _RE_CAMPO_FLUX.findall(query)
+        location = (_RE_LOCATION_FLUX.findall(query) or [""])[0]
+        ventanas = _RE_VENTANA_FLUX.findall(query)
+        varias = "union(" in query
+        aggs = [(pd.Timedelta(every).value, fn, f"_{fn}" if varias else "") for every, fn in ventanas]
+        ancha = "group()" in query
+
+        series = self._series(medidas, campos, inicio_ns, fin_ns, location, aggs, incluir_fin=False)
+        if ancha:
+            tablas = [self._tabla_ancha(series)]
+        else:
+            tablas = [(m, t, v) for m, t, v in series]
+
+        for i, tabla in enumerate(tablas):
+            if ancha:
+                t, v = tabla
+                if len(t) == 0:
+                    continue
+                meta = {"": "", "result": "_result", "table": i}
+                yield from self._csv(meta, t, v)
+            else:
+                medida, t, v = tabla
+                if len(t) == 0:
+                    continue
+                meta = {"": "", "result": "_result", "table": i,
+                        "_start": rango.group(1), "_stop": rango.group(2)}
+                yield from self._csv(meta, t, v, medida=medida.capitalize(), location=location)
+            yield "\r\n"
+
+    @staticmethod
+    def _tabla_ancha(series):
+        if not series:
+            return np.empty(0, dtype=np.int64), {}
+        t = np.unique(np.concatenate([s[1] for s in series]))
+        columnas = {}
+        for _, ts, v in series:
+            pos = np.searchsorted(t, ts)
+            for c, x in v.items():
+                col = np.full(len(t), np.nan)
+                col[pos] = x
+                columnas[c] = col
+        return t, columnas
+
+    @staticmethod
+    def _csv(meta, t, v, medida=None, location=None):
+        """Filas CSV por bloques, con la misma disposición de columnas que InfluxDB 2.7."""
+        for a in range(0, len(t), FILAS_POR_BLOQUE):
+            b = min(a + FILAS_POR_BLOQUE, len(t))
+            df = pd.DataFrame({k: val for k, val in meta.items()}, index=range(b - a))
+            df["_time"] = _rfc3339(t[a:b])
+            if medida is not None:
+                df["_measurement"] = medida
+                df["location"] = location
+            for c, x in v.items():
+                df[c] = x[a:b]
+            texto = df.to_csv(index=False, header=(a == 0), na_rep="", lineterminator="\r\n")
+            yield from texto.splitlines(keepends=True)
+
+    # ------------------------------------------------------------------
+    # InfluxQL
+    # ------------------------------------------------------------------
+
+    def influxql_lineas(self, query, chunk_size):
+        m = _RE_INFLUXQL.search(query)
+        if m is None:
+            raise ValueError("Consulta InfluxQL no soportada por el backend sintético")
+        select, medida, desde, hasta, location, resolucion = m.groups()
+
+        items = []
+        for item in select.split(","):
+            agregado = _RE_SELECT_AGREGADO.match(item.strip())
+            items.append(agregado.groups() if agregado else (None, item.strip(), item.strip()))
+
+        campos = list(dict.fromkeys(campo for _, campo, _ in items))
+        t, v = self.datos(medida.lower(), campos, _ns(desde), _ns(hasta), location, incluir_fin=True)
+        columnas = {}
+        if resolucion:
+            every_ns = pd.Timedelta(resolucion).value
+            t_ag = t[:0]
+            for fn, campo, alias in items:
+                if campo in v:
+                    t_ag, columnas[alias] = _agregar(t, v[campo], every_ns, fn)
+            t = t_ag
+        else:
+            columnas = {alias: v[campo] for _, campo, alias in items if campo in v}
+
+        if len(t) == 0 or not columnas:
+            yield json.dumps({"results": [{"statement_id": 0}]})
+            return
+        nombres = ["time"] + list(columnas)
+        matriz = np.column_stack([x for x in columnas.values()])
+        for a in range(0, len(t), chunk_size):
+            b = min(a + chunk_size, len(t))
+            valores = [[int(ti)] + fila for ti, fila in zip(t[a:b], matriz[a:b].tolist())]
+            serie = {"name": medida, "columns": nombres, "values": valores}
+            resultado = {"statement_id": 0, "series": [serie]}
+            if b < len(t):
+                resultado["partial"] = True
+            yield json.dumps({"results": [resultado]})
@@ -18,12 +18,26 @@ SAVE_OUTPUTS = True
 OUTPUT_DIR = os.path.join("data", "raw")
 IMAGES_DIR = os.path.join("data", "images")
 
+# Formato de los artefactos intermedios (df_raw, df_clean, df_norm, series de anomalías):
+# 'parquet', 'feather' o 'csv', y códec de compresión de Parquet/Feather
+ARTEFACTOS_FORMATO = "parquet"
+ARTEFACTOS_COMPRESION = "zstd"
+
 # Definición de Rango para generate_ts_anomalies()
 RANGE = 300
 
 # Definición de Rango de entradas de datos para empezar a calcular el MAE
 MAX_ST = 10
 
+# Ejecución particionada de rangos largos (meses 'MS' o días 'D'): memoria acotada a una
+# partición; las particiones limpias se guardan en PARTICION_DIR entre las dos pasadas
+USE_PARTICIONADO = False
+PARTICION = "MS"
+PARTICION_DIR = os.path.join("data", "particiones")
+
+# Escalador ajustado por el pipeline batch (lo reutiliza la ejecución continua)
+ESCALADOR_PATH = os.path.join("data", "stats", "escalador.json")
+
 # Ejecución análisis de anomaliás (False: X)
 EJECUTAR_ANALISIS_ANOMALIAS = False
 
@@ -59,3 +73,77 @@ LOCAL_TIMEZONE = 'America/Argentina/Buenos_Aires'
 # Activar uso de InfluxDB 2 como base primaria
 USE_INFLUXDB_2 = True
 
+# Backend de datos: "real" (InfluxDB 1.8 / 2.7), "grabar" (real + guarda las respuestas),
+# "replay" (responde desde las grabaciones) o "sintetico" (datos generados, sin red)
+INFLUX_BACKEND = "real"
+BACKEND_GRABACIONES_DIR = os.path.join("data", "grabaciones")
+SINTETICO_SEMILLA = 0
+SINTETICO_PROB_HUECO = 0.0
+
+# Conexiones HTTP keep-alive por cliente en el conector compartido
+INFLUX_POOL_SIZE = 20
+
+# Consultas por medida en paralelo contra InfluxDB 2.7 (pool de hilos acotado)
+INFLUX2_CONSULTAS_CONCURRENTES = True
+INFLUX2_MAX_WORKERS = 5
+
+# Lectura por chunks (epoch en ns, arrays columnares) de las respuestas de InfluxDB 1.8
+INFLUX1_LECTURA_CHUNKED = True
+
+# Lectura en streaming del CSV de Flux a arrays float32 (en lugar de query_data_frame)
+INFLUX2_LECTURA_STREAMING = True
+
+# Una sola consulta Flux para las cinco medidas, pivotada y unida por _time en el servidor
+INFLUX2_CONSULTA_UNICA = False
+
+# Planificador de consultas largas: tamaño de ventana (formato pandas, '' para desactivar),
+# ventanas en paralelo y reintentos por ventana
+QUERY_VENTANA = "7D"
+QUERY_MAX_WORKERS = 4
+QUERY_REINTENTOS = 2
+QUERY_ESPERA_REINTENTO_SEG = 5
+
+# Fallback a InfluxDB 1.8: separación mínima entre muestras que se considera hueco
+# y distancia bajo la cual dos huecos se piden en una sola consulta
+FALLBACK_HUECO_MINIMO_SEG = 60
+FALLBACK_FUSION_HUECOS_SEG = 3600
+# Con más huecos que este máximo se hace una sola consulta a 1.8 que los cubre a todos
+# (de la que se usan solo las filas de los huecos) en lugar de una consulta por hueco
+FALLBACK_MAX_CONSULTAS = 8
+
+# Combinación de medidas: timestamps a menos de esta distancia se alinean en la misma
+# fila ('50ms'); None exige coincidencia exacta
+MERGE_TOLERANCIA = None
+
+# Grilla regular de los datos combinados: paso en segundos, relleno de faltantes
+# ('ffill' o 'interpolar') y máximo de muestras consecutivas a completar. Desactivada por
+# defecto: con la grilla, las filas completadas ya no se descartan como nulas en la limpieza
+USE_GRILLA = False
+GRILLA_PASO_SEG = 10
+GRILLA_METODO_RELLENO = "ffill"
+GRILLA_MAX_RELLENO = 3
+
+# Resolución de las series para gráficos de rangos largos ('1m', '15m', '1h'), agregadas
+# en el servidor; None grafica desde el artefacto df_clean a resolución original, sin
+# consultar la base
+RESOLUCION_GRAFICOS = None
+
+# Caché en disco (Parquet por locación / medida / día) de las consultas históricas
+USE_CACHE = True
+CACHE_DIR = os.path.join("data", "cache")
+CACHE_MAX_BYTES = 5 * 1024 ** 3
+
+
+# LevelShift / VolatilityShift / AutoReg en NumPy (models/detectores.py) en lugar de ADTK, y
+# detección en línea con ellos, muestra a muestra, en la ejecución continua
+DETECTORES_NATIVOS = False
+DETECCION_CONTINUA = False
+
+# Detectores de anomalías (models/registro_detectores.py): los pedidos corren en un pool
+# de procesos (hasta DETECTORES_MAX_WORKERS; None = cantidad de CPUs) si la serie tiene
+# al menos DETECTORES_MIN_FILAS_PARALELO filas. SELECCION_DETECTOR es el detector cuyas
+# series de contexto genera el pipeline
+DETECTORES_PARALELO = True
+DETECTORES_MAX_WORKERS = None
+DETECTORES_MIN_FILAS_PARALELO = 100_000
+SELECCION_DETECTOR = "LevelShift"
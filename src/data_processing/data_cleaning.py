@@ -9,6 +9,8 @@ Incluye funciones de limpieza, normalización y combinación de DataFrames.
 import pandas as pd
 import numpy as np
 
+from data_processing.rolling import estadisticas_moviles
+
 def apply_rolling_norm(series, window):
     """
     Aplica la normalización mediante media móvil y desviación estándar a una serie.
@@ -20,13 +22,15 @@ def apply_rolling_norm(series, window):
     Returns:
         tuple: Serie normalizada (media móvil) y serie de desviación estándar.
     """
-    norm = series.rolling(window).mean()
-    std = series.rolling(window).std()
+    stats = estadisticas_moviles(series.to_numpy(), window, estadisticas=("media", "desvio"))[window]
+    norm = pd.Series(stats["media"], index=series.index, name=series.name)
+    std = pd.Series(stats["desvio"], index=series.index, name=series.name)
     return norm, std
 
 def apply_rolling_norm_trif(s1, s2, s3, window):
     """
-    Aplica la normalización a tres series de manera simultánea.
+    Aplica la normalización a tres series de manera simultánea (una sola pasada
+    de estadísticas móviles sobre las tres fases).
 
     Args:
         s1, s2, s3 (pd.Series): Series de datos.
@@ -35,10 +39,12 @@ def apply_rolling_norm_trif(s1, s2, s3, window):
     Returns:
         tuple: (norm1, norm2, norm3, std1, std2, std3)
     """
-    norm1, std1 = apply_rolling_norm(s1, window)
-    norm2, std2 = apply_rolling_norm(s2, window)
-    norm3, std3 = apply_rolling_norm(s3, window)
-    return norm1, norm2, norm3, std1, std2, std3
+    fases = (s1, s2, s3)
+    bloque = np.column_stack([s.to_numpy(dtype=np.float64) for s in fases])
+    stats = estadisticas_moviles(bloque, window, estadisticas=("media", "desvio"))[window]
+    norms = [pd.Series(stats["media"][:, k], index=s.index, name=s.name) for k, s in enumerate(fases)]
+    stds = [pd.Series(stats["desvio"][:, k], index=s.index, name=s.name) for k, s in enumerate(fases)]
+    return (*norms, *stds)
 
 def merge_dataframes(dfs, on='time'):
     """
@@ -49,10 +55,10 @@ def merge_dataframes(dfs, on='time'):
         on (str): Columna clave para la unión.
 
     Returns:
-        pd.DataFrame: DataFrame resultante de la unión.
+        pd.DataFrame: DataFrame resultante de la unión, ordenado por `on`.
     """
-    from functools import reduce
-    return reduce(lambda left, right: pd.merge(left, right, on=on, how='outer'), dfs)
+    from data_processing.data_merging import merge_k_vias
+    return merge_k_vias(dfs, on=on, indice_tiempo=False)
 
 def clean_dataframe(df):
     """
@@ -110,6 +116,7 @@ def normalize_all_numeric(df: pd.DataFrame) -> pd.DataFrame:
 
 from utils.logger import logger
 from sklearn.preprocessing import StandardScaler
+from data_processing.normalization import Escalador
 
 def remove_outliers_zscore(df, threshold=3):
     """
@@ -134,80 +141,287 @@ def preprocess_data2(df: pd.DataFrame) -> pd.DataFrame:
     df = df.loc[:, ~df.columns.duplicated()]
     return df
 
-def preprocess_data(df: pd.DataFrame, silenciar_logs: bool = False) -> pd.DataFrame:
-    df = df.copy()
-    
+class EstadisticasLimpieza:
+    """
+    Resultado de preprocess_data.
+
+    Atributos:
+        forma_original (tuple), forma_final (tuple): Shape antes y después de limpiar.
+        nulos (dict): Valores nulos por columna en los datos originales (solo > 0).
+        duplicados_time (int): Filas descartadas por 'time' repetido.
+        columnas_duplicadas (int): Columnas descartadas por nombre repetido.
+        filas_con_nulos (int): Filas descartadas por tener algún NaN.
+        media, desvio (dict): Media y desvío (ddof=0) de cada columna numérica en los datos limpios.
+        outliers (dict): Valores con z-score > umbral por columna (solo > 0); no se eliminan.
+    """
+
+    def __init__(self, forma_original, forma_final, nulos, duplicados_time, columnas_duplicadas,
+                 filas_con_nulos, media, desvio, outliers, umbral_zscore):
+        self.forma_original = forma_original
+        self.forma_final = forma_final
+        self.nulos = nulos
+        self.duplicados_time = duplicados_time
+        self.columnas_duplicadas = columnas_duplicadas
+        self.filas_con_nulos = filas_con_nulos
+        self.media = media
+        self.desvio = desvio
+        self.outliers = outliers
+        self.umbral_zscore = umbral_zscore
+
+    @property
+    def pct_filas_con_nulos(self):
+        filas = self.forma_original[0] - self.duplicados_time
+        return (self.filas_con_nulos / filas * 100) if filas > 0 else 0
+
+    def a_dict(self):
+        return dict(vars(self), pct_filas_con_nulos=self.pct_filas_con_nulos)
+
+    def combinar(self, otra):
+        """
+        Estadística de la unión de dos bloques de filas disjuntos (por ejemplo, dos
+        particiones consecutivas). Conteos, media y desvío son exactos (media y
+        varianza se combinan por Chan); los outliers quedan como suma de los conteos
+        parciales, cada uno contra la media de su bloque: para el conteo exacto contra
+        la media combinada usar contar_outliers.
+        """
+        n_a, n_b = self.forma_final[0], otra.forma_final[0]
+        n = n_a + n_b
+        media, desvio = {}, {}
+        for c in dict.fromkeys([*self.media, *otra.media]):
+            if c not in otra.media or n_b == 0:
+                media[c], desvio[c] = self.media.get(c, otra.media.get(c)), self.desvio.get(c, otra.desvio.get(c))
+                continue
+            if c not in self.media or n_a == 0:
+                media[c], desvio[c] = otra.media[c], otra.desvio[c]
+                continue
+            delta = otra.media[c] - self.media[c]
+            media[c] = self.media[c] + delta * n_b / n
+            m2 = n_a * self.desvio[c] ** 2 + n_b * otra.desvio[c] ** 2 + delta ** 2 * n_a * n_b / n
+            desvio[c] = float(np.sqrt(m2 / n))
+
+        def suma(a, b):
+            return {c: a.get(c, 0) + b.get(c, 0) for c in dict.fromkeys([*a, *b])}
+
+        return EstadisticasLimpieza(
+            forma_original=(self.forma_original[0] + otra.forma_original[0],
+                            max(self.forma_original[1], otra.forma_original[1])),
+            forma_final=(n, max(self.forma_final[1], otra.forma_final[1])),
+            nulos=suma(self.nulos, otra.nulos),
+            duplicados_time=self.duplicados_time + otra.duplicados_time,
+            columnas_duplicadas=max(self.columnas_duplicadas, otra.columnas_duplicadas),
+            filas_con_nulos=self.filas_con_nulos + otra.filas_con_nulos,
+            media=media,
+            desvio=desvio,
+            outliers=suma(self.outliers, otra.outliers),
+            umbral_zscore=self.umbral_zscore,
+        )
+
+
+def _estadisticas_columnas(bloque, umbral):
+    """
+    Media, desvío (ddof=0) y cantidad de |z| > umbral de cada fila de un bloque
+    (columnas, muestras). Las desviaciones se calculan una vez y se reutilizan.
+    """
+    n = bloque.shape[1]
+    if n == 0:
+        nan = np.full(bloque.shape[0], np.nan)
+        return nan, nan, np.zeros(bloque.shape[0], dtype=np.int64)
+    tipo = bloque.dtype if bloque.dtype.kind == "f" else np.float64
+    media = np.add.reduce(bloque, axis=1, dtype=np.float64) / n
+    desvios = np.subtract(bloque, media[:, None].astype(tipo), dtype=tipo)
+    np.abs(desvios, out=desvios)
+    desvio = np.sqrt(np.einsum("ij,ij->i", desvios, desvios, dtype=np.float64) / n)
+    # |x - media| > umbral * desvio equivale a z > umbral y no divide por desvío nulo
+    outliers = np.count_nonzero(desvios > (umbral * desvio)[:, None].astype(tipo), axis=1)
+    return media, desvio, outliers
+
+
+# Umbral de z-score para marcar outliers (lo comparte LimpiadorIncremental)
+UMBRAL_ZSCORE = 3
+
+
+def contar_outliers(df, media, desvio, umbral=UMBRAL_ZSCORE):
+    """
+    Valores con |x - media| > umbral * desvío por columna, contra una media y un desvío
+    dados (por ejemplo, los de todo el rango cuando df es una partición).
+
+    Returns:
+        dict: {columna: cantidad}, solo las columnas con alguna.
+    """
+    conteos = {}
+    for c in media:
+        if c not in df.columns:
+            continue
+        x = df[c].to_numpy()
+        tipo = x.dtype if x.dtype.kind == "f" else np.dtype(np.float64)
+        cuenta = int(np.count_nonzero(np.abs(x - tipo.type(media[c])) > tipo.type(umbral * desvio[c])))
+        if cuenta:
+            conteos[c] = cuenta
+    return conteos
+
+
+def preprocess_data(df: pd.DataFrame, silenciar_logs: bool = False, inplace: bool = False,
+                    devolver_stats: bool = False):
+    """
+    Limpieza básica: descarta filas con 'time' repetido, columnas con nombre repetido y
+    filas con algún NaN, y cuenta outliers por z-score (sin eliminarlos).
+
+    Las máscaras de duplicados y nulos se arman sobre el bloque numérico 2-D y se
+    aplican en una sola selección; las estadísticas de todas las columnas salen de
+    una pasada de NumPy sobre las filas que quedan.
+
+    Args:
+        inplace (bool): Descarta filas y columnas sobre el mismo DataFrame en lugar de
+            devolver uno nuevo. No baja el pico de memoria (pandas copia igual las filas
+            que quedan antes de reemplazar los bloques); evita que el original y el
+            resultado sigan vivos a la vez cuando el llamador conserva la referencia.
+        devolver_stats (bool): Devuelve también un EstadisticasLimpieza.
+
+    Returns:
+        pd.DataFrame o (pd.DataFrame, EstadisticasLimpieza).
+    """
+    zscore_threshold = UMBRAL_ZSCORE
+    forma_original = df.shape
+
     if not silenciar_logs:
         logger.info("===== INICIO DEL PREPROCESAMIENTO =====")
-        logger.info(f"Shape original: {df.shape}")
-
-    # Diagnóstico inicial
-    null_counts = df.isnull().sum()
+        logger.info(f"Shape original: {forma_original}")
+
+    # Columnas: la primera aparición de cada nombre
+    cols_ok = ~df.columns.duplicated()
+    columnas_duplicadas = int((~cols_ok).sum())
+    posiciones = np.flatnonzero(cols_ok)
+    es_numerica = [pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in df.dtypes]
+    numericas = [i for i in posiciones if es_numerica[i]]
+    otras = [i for i in posiciones if not es_numerica[i]]
+
+    # Bloques numéricos 2-D (columnas, filas), uno por dtype para no convertir float32 a float64
+    grupos = {}
+    for i in numericas:
+        grupos.setdefault(df.dtypes.iloc[i], []).append(i)
+    bloques = [(idx, df.iloc[:, idx].to_numpy().T) for idx in grupos.values()]
+
+    # Máscaras por fila
+    con_nulos = np.zeros(len(df), dtype=bool)
+    nulos = {}
+    for idx, bloque in bloques:
+        if bloque.dtype.kind == "f":
+            nulos_bloque = np.isnan(bloque)
+            con_nulos |= nulos_bloque.any(axis=0)
+            nulos.update(zip(df.columns[idx], nulos_bloque.sum(axis=1).tolist()))
+    for i in otras:
+        nulos_col = df.iloc[:, i].isna().to_numpy()
+        con_nulos |= nulos_col
+        nulos[df.columns[i]] = int(nulos_col.sum())
+    nulos = {c: n for c, n in nulos.items() if n > 0}
     if not silenciar_logs:
-        if null_counts.any():
-            logger.info("Valores nulos por columna:\n" + str(null_counts[null_counts > 0]))
+        if nulos:
+            logger.info("Valores nulos por columna:\n" + str(pd.Series(nulos)))
         else:
             logger.info("No se encontraron valores nulos.")
 
-    # Eliminar duplicados por 'time'
+    duplicado = np.zeros(len(df), dtype=bool)
     if 'time' in df.columns:
-        before_dup = len(df)
-        df.drop_duplicates(subset='time', inplace=True)
-        if not silenciar_logs:
-            logger.info(f"Eliminadas {before_dup - len(df)} filas duplicadas por 'time'")
-
-    # Eliminar columnas duplicadas
-    before_cols = df.shape[1]
-    df = df.loc[:, ~df.columns.duplicated()]
-    if not silenciar_logs:
-        logger.info(f"Eliminadas {before_cols - df.shape[1]} columnas duplicadas")
+        t = df['time'].to_numpy()
+        if len(t) > 1 and (t[1:] > t[:-1]).all():
+            pass  # estrictamente creciente (lo habitual tras merge_data): no hay repetidos
+        else:
+            duplicado = df['time'].duplicated().to_numpy()
+    conservar = ~duplicado & ~con_nulos
+    todas = bool(conservar.all())
+    duplicados_time = int(duplicado.sum())
+    filas_con_nulos = int((con_nulos & ~duplicado).sum())
 
-    # Eliminar filas con al menos un NaN
-    before_rows = len(df)
-    df = df.dropna(how='any')
-    after_rows = len(df)
-    filas_eliminadas = before_rows - after_rows
-    pct_eliminadas = (filas_eliminadas / before_rows * 100) if before_rows > 0 else 0
     if not silenciar_logs:
-        logger.info(f"Eliminadas {filas_eliminadas} filas con valores nulos ({pct_eliminadas:.2f}%)")
-
-    # Detección de outliers con z-score
-    zscore_threshold = 3
-    outlier_counts = {}
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if 'time' in df.columns:
+            logger.info(f"Eliminadas {duplicados_time} filas duplicadas por 'time'")
+        logger.info(f"Eliminadas {columnas_duplicadas} columnas duplicadas")
+        restantes = forma_original[0] - duplicados_time
+        pct = (filas_con_nulos / restantes * 100) if restantes > 0 else 0
+        logger.info(f"Eliminadas {filas_con_nulos} filas con valores nulos ({pct:.2f}%)")
+
+    # Estadísticas y outliers sobre las filas que quedan
+    media, desvio, outlier_counts = {}, {}, {}
+    for idx, bloque in bloques:
+        m, d, o = _estadisticas_columnas(bloque if todas else bloque[:, conservar], zscore_threshold)
+        for c, mi, di, oi in zip(df.columns[idx], m.tolist(), d.tolist(), o.tolist()):
+            media[c], desvio[c] = mi, di
+            if oi > 0:
+                outlier_counts[c] = oi
+    del bloques
+    orden = list(df.columns[numericas])
+    outlier_counts = {c: outlier_counts[c] for c in orden if c in outlier_counts}
+
+    # Una sola selección de filas y columnas
+    if inplace:
+        if not todas:
+            # Por posición: con un índice repetido, drop por etiqueta borraría filas válidas
+            indice = df.index
+            df.index = pd.RangeIndex(len(df))
+            df.drop(index=np.flatnonzero(~conservar), inplace=True)
+            df.index = indice[conservar]
+        if columnas_duplicadas:
+            nombres = list(df.columns[posiciones])
+            df.columns = range(df.shape[1])
+            df.drop(columns=np.flatnonzero(~cols_ok), inplace=True)
+            df.columns = nombres
+        resultado = df
+    elif columnas_duplicadas:
+        resultado = df.iloc[np.flatnonzero(conservar), posiciones]
+    else:
+        resultado = df.copy() if todas else df[conservar]
 
-    for col in numeric_cols:
-        z_scores = np.abs((df[col] - df[col].mean()) / df[col].std(ddof=0))
-        outliers = z_scores > zscore_threshold
-        count = np.sum(outliers)
-        if count > 0:
-            outlier_counts[col] = count
-            if not silenciar_logs:
-                logger.warning(f"Outliers detectados en '{col}': {count} valores (z-score > {zscore_threshold})")
-
-    # Resumen final
     if not silenciar_logs:
-        logger.info(f"Shape final: {df.shape}")
+        for col, count in outlier_counts.items():
+            logger.warning(f"Outliers detectados en '{col}': {count} valores (z-score > {zscore_threshold})")
+        logger.info(f"Shape final: {resultado.shape}")
         if outlier_counts:
             logger.info("Resumen columnas con outliers:")
             for col, count in outlier_counts.items():
                 logger.info(f" - {col}: {count} valores extremos detectados")
         else:
             logger.info("No se detectaron outliers significativos según z-score > 3.")
-        if not silenciar_logs:
-            logger.info("===== FIN DEL PREPROCESAMIENTO =====")
+        logger.info("===== FIN DEL PREPROCESAMIENTO =====")
+
+    if not devolver_stats:
+        return resultado
+    stats = EstadisticasLimpieza(
+        forma_original=forma_original,
+        forma_final=resultado.shape,
+        nulos=nulos,
+        duplicados_time=duplicados_time,
+        columnas_duplicadas=columnas_duplicadas,
+        filas_con_nulos=filas_con_nulos,
+        media={c: media[c] for c in orden},
+        desvio={c: desvio[c] for c in orden},
+        outliers=outlier_counts,
+        umbral_zscore=zscore_threshold,
+    )
+    return resultado, stats
+
+def normalize_all_numeric(df: pd.DataFrame, escalador=None, devolver_escalador: bool = False):
+    """
+    Min-max de las columnas numéricas.
 
-    return df
+    Args:
+        escalador (Escalador): Escalador ya ajustado a aplicar; si no se pasa, se ajusta
+            uno min-max sobre df.
+        devolver_escalador (bool): Devuelve también el escalador, para guardarlo o
+            invertir la normalización.
 
-def normalize_all_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    Returns:
+        pd.DataFrame o (pd.DataFrame, Escalador).
+    """
     numeric_cols = df.select_dtypes(include=[np.number]).columns
     if numeric_cols.empty:
         logger.warning("No se encontraron columnas numéricas para normalizar")
-        return df
-    df[numeric_cols] = (df[numeric_cols] - df[numeric_cols].min()) / (df[numeric_cols].max() - df[numeric_cols].min())
-    logger.info(f"Se normalizaron las columnas: {list(numeric_cols)}")
-    return df
+        df = df.copy()
+        return (df, escalador) if devolver_escalador else df
+    if escalador is None:
+        escalador = Escalador("minmax", columnas=list(numeric_cols)).fit(df)
+    df = escalador.transform(df)
+    logger.info(f"Se normalizaron las columnas: {[c for c in escalador.columnas if c in df.columns]}")
+    return (df, escalador) if devolver_escalador else df
 
 
 def clean_influx2_meta(df):
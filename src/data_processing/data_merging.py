@@ -1,6 +1,114 @@
-# utils.py
+# data_merging.py
+# src/data_processing/data_merging.py
 
 """
-Módulo XXXXXXXX
+Módulo para la combinación de DataFrames de distintas medidas por tiempo.
+Reemplaza el pliegue con pd.merge(..., how='outer') sucesivos por una única
+unión k-vías sobre timestamps int64: cada entrada se ordena una vez, se arma
+la grilla de tiempos de salida y cada columna se escribe en su posición final
+sobre un array preasignado.
 """
 
+import numpy as np
+import pandas as pd
+
+
+def _tiempos_ns(serie):
+    """Devuelve (tiempos int64 en ns, máscara de válidos, zona horaria) de una serie de fechas."""
+    serie = pd.to_datetime(serie, errors='coerce')
+    tz = getattr(serie.dt, 'tz', None)
+    if tz is not None:
+        serie = serie.dt.tz_convert('UTC').dt.tz_localize(None)
+    valores = serie.to_numpy(dtype='datetime64[ns]')
+    validos = ~np.isnat(valores)
+    return valores.view(np.int64), validos, tz
+
+
+def _arr_salida(serie, n):
+    """Array de salida con NaN/None para las filas sin dato, conservando float32."""
+    dtype = serie.dtype
+    if dtype == np.float32 or dtype == np.float64:
+        return np.full(n, np.nan, dtype=dtype)
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return np.full(n, np.nan, dtype=np.float64)
+    return np.full(n, None, dtype=object)
+
+
+def merge_k_vias(dfs, on='time', tolerancia=None, indice_tiempo=True):
+    """
+    Une DataFrames por tiempo en una sola pasada (equivalente a un outer join múltiple).
+
+    Args:
+        dfs (list): DataFrames con la columna `on` (o un DatetimeIndex si no la tienen).
+        on (str): Columna de tiempo.
+        tolerancia (str o pd.Timedelta): Timestamps separados por menos que esta tolerancia
+            ('50ms') se consideran el mismo instante y se alinean al primero del grupo.
+            Por defecto se exige coincidencia exacta.
+        indice_tiempo (bool): Devuelve el tiempo como DatetimeIndex ordenado; si es False
+            lo devuelve como primera columna `on` con un índice numérico.
+
+    Returns:
+        pd.DataFrame: Tabla ancha ordenada por tiempo. Si una misma columna aparece en
+        varias entradas, prevalece el primer valor no nulo en el orden de dfs; ante
+        timestamps repetidos dentro de una entrada se conserva la última fila.
+    """
+    entradas = []
+    tz = None
+    for df in dfs:
+        if df is None or df.empty:
+            continue
+        if on in df.columns:
+            t, validos, tz_df = _tiempos_ns(df[on])
+            columnas = [c for c in df.columns if c != on]
+        else:
+            t, validos, tz_df = _tiempos_ns(df.index.to_series())
+            columnas = list(df.columns)
+        tz = tz or tz_df
+        # Cada entrada se ordena una sola vez (sin costo si ya viene ordenada)
+        orden = np.nonzero(validos)[0]
+        t = t[orden]
+        if len(t) > 1 and not np.all(t[1:] >= t[:-1]):
+            reorden = np.argsort(t, kind='stable')
+            t, orden = t[reorden], orden[reorden]
+        entradas.append((df, columnas, t, orden))
+
+    if not entradas:
+        return pd.DataFrame()
+
+    # Grilla de salida: el ordenamiento estable aprovecha las corridas ya ordenadas (k-vías)
+    todos = np.sort(np.concatenate([t for _, _, t, _ in entradas]), kind='stable')
+    if len(todos):
+        nuevos = np.empty(len(todos), dtype=bool)
+        nuevos[0] = True
+        if tolerancia is not None and pd.Timedelta(tolerancia) > pd.Timedelta(0):
+            nuevos[1:] = np.diff(todos) > pd.Timedelta(tolerancia).value
+        else:
+            nuevos[1:] = todos[1:] != todos[:-1]
+        grupo = np.cumsum(nuevos) - 1
+        grilla = todos[nuevos]
+    else:
+        grupo = np.empty(0, dtype=np.int64)
+        grilla = todos
+    n = len(grilla)
+
+    datos = {}
+    for df, columnas, t, orden in entradas:
+        destino = grupo[np.searchsorted(todos, t)]
+        for col in columnas:
+            origen = df[col].to_numpy()[orden]
+            if col not in datos:
+                datos[col] = _arr_salida(df[col], n)
+                datos[col][destino] = origen
+            else:
+                # Columna repetida entre entradas: solo completa los faltantes
+                arr = datos[col]
+                libre = pd.isna(arr[destino]) & ~pd.isna(origen)
+                arr[destino[libre]] = origen[libre]
+
+    tiempos = pd.DatetimeIndex(grilla.view('datetime64[ns]'), name=on)
+    if tz is not None:
+        tiempos = tiempos.tz_localize('UTC').tz_convert(tz)
+
+    if indice_tiempo:
+        return pd.DataFrame(datos, index=tiempos, copy=False)
+    return pd.DataFrame({on: tiempos, **datos}, copy=False)
@@ -0,0 +1,140 @@
+# limpieza_incremental.py
+# src/data_processing/limpieza_incremental.py
+
+"""
+Limpieza incremental para la ejecución continua.
+Aplica las mismas reglas que preprocess_data muestra a muestra: descarta timestamps
+repetidos o atrasados (con un cursor del último 'time' aceptado), columnas con nombre repetido y
+filas con algún NaN, y marca outliers por z-score sin eliminarlos. La media y la
+varianza de cada variable se actualizan en O(1) por muestra (Welford o EWMA), así
+los outliers se evalúan contra la estadística de largo plazo y no contra la ventana.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processing.data_cleaning import UMBRAL_ZSCORE
+from utils.logger import logger
+
+
+class LimpiadorIncremental:
+    """
+    Atributos:
+        columnas (list): Variables con estadística acumulada.
+        n (np.ndarray): Muestras acumuladas por variable.
+        media (np.ndarray), varianza (np.ndarray): Estadística actual (varianza poblacional).
+        cursor (pd.Timestamp): Último 'time' aceptado.
+        descartadas (dict): Filas descartadas por 'duplicado' y por 'nulos'.
+        outliers (dict): Outliers marcados por columna.
+    """
+
+    def __init__(self, columnas, umbral=UMBRAL_ZSCORE, alfa=None, min_muestras=30):
+        """
+        Args:
+            columnas (list): Variables a seguir (sin 'time').
+            umbral (float): z-score a partir del cual una muestra es outlier.
+            alfa (float): Si se indica, media y varianza son EWMA con ese factor; si no,
+                se acumulan con Welford (todas las muestras pesan igual).
+            min_muestras (int): No se marcan outliers hasta tener esta cantidad de muestras.
+        """
+        self.columnas = list(dict.fromkeys(columnas))
+        self.umbral = umbral
+        self.alfa = alfa
+        self.min_muestras = min_muestras
+        k = len(self.columnas)
+        self.n = np.zeros(k, dtype=np.int64)
+        self.media = np.zeros(k)
+        self._m2 = np.zeros(k)   # Welford: suma de cuadrados de desvíos
+        self._var = np.zeros(k)  # EWMA
+        self.cursor = None
+        self.descartadas = {"duplicado": 0, "nulos": 0}
+        self.outliers = dict.fromkeys(self.columnas, 0)
+
+    @classmethod
+    def desde_stats(cls, stats, columnas=None, **kwargs):
+        """
+        Parte de la estadística batch de preprocess_data (EstadisticasLimpieza), de modo
+        que los primeros outliers ya se evalúan contra el histórico.
+        """
+        columnas = [c for c in (columnas or stats.media) if c in stats.media]
+        limpiador = cls(columnas, umbral=stats.umbral_zscore, **kwargs)
+        filas = stats.forma_final[0]
+        limpiador.n[:] = filas
+        limpiador.media[:] = [stats.media[c] for c in columnas]
+        var = np.array([stats.desvio[c] for c in columnas]) ** 2
+        limpiador._m2[:] = var * filas
+        limpiador._var[:] = var
+        return limpiador
+
+    @property
+    def varianza(self):
+        if self.alfa is not None:
+            return self._var.copy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 0, self._m2 / self.n, np.nan)
+
+    def _actualizar(self, x):
+        """Suma una muestra (vector de las columnas) a la estadística."""
+        self.n += 1
+        delta = x - self.media
+        if self.alfa is None:
+            self.media += delta / self.n
+            self._m2 += delta * (x - self.media)
+        else:
+            primera = self.n == 1
+            self.media = np.where(primera, x, self.media + self.alfa * delta)
+            self._var = np.where(primera, 0.0, (1 - self.alfa) * (self._var + self.alfa * delta ** 2))
+
+    def agregar(self, df):
+        """
+        Limpia las filas nuevas y actualiza la estadística.
+
+        Returns:
+            tuple: (filas aceptadas, DataFrame booleano de outliers con el mismo índice).
+            Una muestra se compara contra la estadística previa a incorporarla.
+        """
+        df = df.loc[:, ~df.columns.duplicated()]
+        faltantes = [c for c in self.columnas if c not in df.columns]
+        if faltantes:
+            raise KeyError(f"Faltan columnas en la medición: {faltantes}")
+        conservar = np.ones(len(df), dtype=bool)
+
+        if 'time' in df.columns and len(df):
+            t = pd.to_datetime(df['time']).to_numpy(dtype="datetime64[ns]").view(np.int64)
+            previo = np.maximum.accumulate(np.r_[self.cursor.value if self.cursor is not None
+                                                 else np.iinfo(np.int64).min, t])[:-1]
+            conservar = t > previo
+            self.descartadas["duplicado"] += int((~conservar).sum())
+            if conservar.any():
+                self.cursor = pd.Timestamp(t[conservar].max())
+
+        con_nulos = df.isna().any(axis=1).to_numpy()
+        self.descartadas["nulos"] += int((conservar & con_nulos).sum())
+        conservar &= ~con_nulos
+        aceptadas = df[conservar]
+
+        valores = aceptadas[self.columnas].to_numpy(dtype=np.float64)
+        marcas = np.zeros(valores.shape, dtype=bool)
+        for i, x in enumerate(valores):
+            with np.errstate(invalid="ignore"):
+                marcas[i] = ((self.n >= self.min_muestras)
+                             & (np.abs(x - self.media) > self.umbral * np.sqrt(self.varianza)))
+            self._actualizar(x)
+
+        for j, col in enumerate(self.columnas):
+            cuenta = int(marcas[:, j].sum())
+            if cuenta:
+                self.outliers[col] += cuenta
+                logger.info(f"Outlier en '{col}' (z-score > {self.umbral}) en la medición nueva")
+        return aceptadas, pd.DataFrame(marcas, index=aceptadas.index, columns=self.columnas)
+
+    def a_dict(self):
+        return {
+            "columnas": self.columnas,
+            "n": dict(zip(self.columnas, self.n.tolist())),
+            "media": dict(zip(self.columnas, self.media.tolist())),
+            "desvio": dict(zip(self.columnas, np.sqrt(self.varianza).tolist())),
+            "cursor": str(self.cursor) if self.cursor is not None else None,
+            "descartadas": dict(self.descartadas),
+            "outliers": dict(self.outliers),
+        }
@@ -1,6 +1,211 @@
-# utils.py
+# normalization.py
+# src/data_processing/normalization.py
 
 """
-Módulo XXXXXXXX
+Escalado de las variables numéricas con un modelo ajustado y reutilizable.
+El Escalador se ajusta una vez (fit) o por partes (partial_fit), se guarda en JSON y
+se vuelve a cargar; así el pipeline batch y la ejecución continua usan los mismos
+parámetros, y transformar o invertir una ventana cuesta O(ventana).
+
+Métodos:
+    minmax   (x - min) / (max - min)
+    zscore   (x - media) / desvío        (desvío poblacional, ddof=0)
+    robusto  (x - mediana) / (q75 - q25)
 """
 
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import logger
+
+METODOS = ("minmax", "zscore", "robusto")
+TAM_MUESTRA_ROBUSTO = 10_000
+
+
+def _columnas_numericas(df):
+    return [c for c in df.columns
+            if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+
+
+class Escalador:
+    """
+    Escalador por columna.
+
+    Atributos:
+        metodo (str): 'minmax', 'zscore' o 'robusto'.
+        columnas (list): Columnas ajustadas, en orden.
+        n (dict): Muestras válidas (no NaN) vistas por columna.
+        centro, escala (dict): x_norm = (x - centro) / escala. Una escala nula se
+            reemplaza por 1, de modo que una columna constante queda en 0.
+    """
+
+    def __init__(self, metodo="minmax", columnas=None, semilla=0):
+        if metodo not in METODOS:
+            raise ValueError(f"Método de escalado inválido: {metodo} (opciones: {', '.join(METODOS)})")
+        self.metodo = metodo
+        self.columnas = list(columnas) if columnas is not None else None
+        self.n = {}
+        # Acumuladores de partial_fit
+        self._min, self._max = {}, {}
+        self._media, self._m2 = {}, {}
+        self._muestra = {}
+        self._rng = np.random.default_rng(semilla)
+
+    # ------------------------------------------------------------------
+    # Ajuste
+    # ------------------------------------------------------------------
+
+    @property
+    def ajustado(self):
+        return bool(self.n)
+
+    def fit(self, df):
+        """Ajusta desde cero con todas las filas de df."""
+        self.n = {}
+        self._min, self._max, self._media, self._m2, self._muestra = {}, {}, {}, {}, {}
+        return self.partial_fit(df)
+
+    def partial_fit(self, df):
+        """
+        Suma las filas de df al ajuste. minmax y zscore son exactos (zscore combina
+        media y varianza por lotes); robusto estima los cuartiles con una muestra de
+        reservorio de TAM_MUESTRA_ROBUSTO valores por columna, que es exacta mientras
+        el total de filas no la supere.
+        """
+        if self.columnas is None:
+            self.columnas = _columnas_numericas(df)
+        for col in self.columnas:
+            if col not in df.columns:
+                continue
+            x = df[col].to_numpy(dtype=np.float64)
+            x = x[~np.isnan(x)]
+            if len(x) == 0:
+                continue
+            n_prev = self.n.get(col, 0)
+            n_tot = n_prev + len(x)
+            if self.metodo == "minmax":
+                self._min[col] = min(self._min.get(col, np.inf), float(x.min()))
+                self._max[col] = max(self._max.get(col, -np.inf), float(x.max()))
+            elif self.metodo == "zscore":
+                media_b = float(x.mean())
+                m2_b = float(((x - media_b) ** 2).sum())
+                if n_prev == 0:
+                    self._media[col], self._m2[col] = media_b, m2_b
+                else:
+                    delta = media_b - self._media[col]
+                    self._media[col] += delta * len(x) / n_tot
+                    self._m2[col] += m2_b + delta ** 2 * n_prev * len(x) / n_tot
+            else:
+                self._muestra[col] = self._reservorio(self._muestra.get(col), n_prev, x)
+            self.n[col] = n_tot
+        return self
+
+    def _reservorio(self, muestra, n_prev, x):
+        """Muestra uniforme de tamaño fijo de todos los valores vistos (algoritmo R por lotes)."""
+        if muestra is None:
+            muestra = np.empty(0)
+        libres = max(TAM_MUESTRA_ROBUSTO - len(muestra), 0)
+        muestra = np.concatenate([muestra, x[:libres]])
+        resto = x[libres:]
+        if len(resto):
+            # Cada valor i-ésimo (1-based) reemplaza a uno al azar con probabilidad k / i
+            i = n_prev + libres + np.arange(1, len(resto) + 1)
+            j = (self._rng.random(len(resto)) * i).astype(np.int64)
+            entra = j < TAM_MUESTRA_ROBUSTO
+            muestra[j[entra]] = resto[entra]
+        return muestra
+
+    def _centro_escala(self, col):
+        if self.metodo == "minmax":
+            centro, escala = self._min[col], self._max[col] - self._min[col]
+        elif self.metodo == "zscore":
+            centro, escala = self._media[col], np.sqrt(self._m2[col] / self.n[col])
+        else:
+            q25, centro, q75 = np.percentile(self._muestra[col], [25, 50, 75])
+            escala = q75 - q25
+        return float(centro), float(escala) if escala != 0 else 1.0
+
+    @property
+    def centro(self):
+        return {c: self._centro_escala(c)[0] for c in self.columnas if c in self.n}
+
+    @property
+    def escala(self):
+        return {c: self._centro_escala(c)[1] for c in self.columnas if c in self.n}
+
+    # ------------------------------------------------------------------
+    # Transformación
+    # ------------------------------------------------------------------
+
+    def _aplicar(self, df, inversa):
+        if not self.ajustado:
+            raise RuntimeError("El escalador no está ajustado (llamar a fit o partial_fit)")
+        df = df.copy()
+        for col in self.columnas:
+            if col in df.columns and col in self.n:
+                df[col] = self.invertir(df[col], col) if inversa else self.escalar(df[col], col)
+        return df
+
+    def transform(self, df):
+        """Copia de df con las columnas ajustadas escaladas (el resto queda igual)."""
+        return self._aplicar(df, inversa=False)
+
+    def inverse_transform(self, df):
+        """Copia de df con las columnas ajustadas llevadas a sus unidades originales."""
+        return self._aplicar(df, inversa=True)
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def escalar(self, valores, columna):
+        """Escala un array o Series con los parámetros de `columna` (conserva float32)."""
+        centro, escala = self._centro_escala(columna)
+        x = np.asarray(valores)
+        tipo = x.dtype if x.dtype.kind == "f" else np.dtype(np.float64)
+        res = (x - tipo.type(centro)) / tipo.type(escala)
+        return pd.Series(res, index=valores.index, name=valores.name) if isinstance(valores, pd.Series) else res
+
+    def invertir(self, valores, columna):
+        """Inversa de escalar: lleva valores normalizados de `columna` a sus unidades."""
+        centro, escala = self._centro_escala(columna)
+        x = np.asarray(valores)
+        tipo = x.dtype if x.dtype.kind == "f" else np.dtype(np.float64)
+        res = x * tipo.type(escala) + tipo.type(centro)
+        return pd.Series(res, index=valores.index, name=valores.name) if isinstance(valores, pd.Series) else res
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def a_dict(self):
+        estado = {"metodo": self.metodo, "columnas": self.columnas, "n": self.n}
+        if self.metodo == "minmax":
+            estado.update(min=self._min, max=self._max)
+        elif self.metodo == "zscore":
+            estado.update(media=self._media, m2=self._m2)
+        else:
+            estado["muestra"] = {c: m.tolist() for c, m in self._muestra.items()}
+        return estado
+
+    @classmethod
+    def desde_dict(cls, estado):
+        esc = cls(estado["metodo"], estado["columnas"])
+        esc.n = dict(estado["n"])
+        esc._min, esc._max = dict(estado.get("min", {})), dict(estado.get("max", {}))
+        esc._media, esc._m2 = dict(estado.get("media", {})), dict(estado.get("m2", {}))
+        esc._muestra = {c: np.asarray(m, dtype=np.float64) for c, m in estado.get("muestra", {}).items()}
+        return esc
+
+    def guardar(self, ruta):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.a_dict(), f, indent=2)
+        logger.info(f"Escalador ({self.metodo}) guardado en {ruta}")
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return cls.desde_dict(json.load(f))
@@ -0,0 +1,172 @@
+# resampling.py
+# src/data_processing/resampling.py
+
+"""
+Remuestreo de los datos combinados de los medidores a una grilla regular de 10 s.
+Cada timestamp se ajusta a la celda más cercana de la grilla y los valores quedan en
+un array NumPy de paso fijo, de modo que la fila de un instante se obtiene con
+aritmética de índices en lugar de búsquedas por timestamp. Los faltantes cortos se
+completan (forward-fill o interpolación acotados) y el resto queda marcado en una
+máscara de huecos y en una tabla de huecos por columna.
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import aplicar_esquema
+from config import GRILLA_PASO_SEG, GRILLA_METODO_RELLENO, GRILLA_MAX_RELLENO
+from utils.logger import logger
+
+
+class SerieGrilla:
+    """
+    Datos en grilla regular.
+
+    Atributos:
+        inicio (pd.Timestamp): Tiempo de la fila 0.
+        paso (pd.Timedelta): Separación entre filas.
+        columnas (list): Nombre de cada columna de `valores`.
+        valores (np.ndarray): Array (filas, columnas) con NaN en los huecos.
+        huecos_mascara (np.ndarray): Booleano (filas, columnas), True donde no hay dato.
+        rellenos_mascara (np.ndarray): Booleano (filas, columnas), True donde el dato fue completado.
+    """
+
+    def __init__(self, inicio, paso, columnas, valores, huecos_mascara, rellenos_mascara):
+        self.inicio = pd.Timestamp(inicio)
+        self.paso = pd.Timedelta(paso)
+        self.columnas = list(columnas)
+        self.valores = valores
+        self.huecos_mascara = huecos_mascara
+        self.rellenos_mascara = rellenos_mascara
+
+    def __len__(self):
+        return self.valores.shape[0]
+
+    @property
+    def tiempos(self):
+        return pd.date_range(self.inicio, periods=len(self), freq=self.paso, name="time")
+
+    def indice(self, tiempo):
+        """Fila de la grilla para un instante (la celda más cercana)."""
+        return int(round((pd.Timestamp(tiempo) - self.inicio) / self.paso))
+
+    def tiempo(self, indice):
+        return self.inicio + indice * self.paso
+
+    def ventana(self, tiempo, antes, despues):
+        """Slice de filas [tiempo - antes muestras, tiempo + despues muestras], recortado a la grilla."""
+        i = self.indice(tiempo)
+        return slice(max(i - antes, 0), min(i + despues + 1, len(self)))
+
+    def columna(self, nombre):
+        return self.valores[:, self.columnas.index(nombre)]
+
+    def tabla_huecos(self):
+        """
+        Huecos que quedaron tras el relleno.
+
+        Returns:
+            pd.DataFrame: columna, inicio, fin (inclusive) y cantidad de muestras faltantes.
+        """
+        filas = []
+        for j, col in enumerate(self.columnas):
+            bordes = np.diff(np.concatenate(([0], self.huecos_mascara[:, j].view(np.int8), [0])))
+            for a, b in zip(np.nonzero(bordes == 1)[0], np.nonzero(bordes == -1)[0]):
+                filas.append((col, self.tiempo(a), self.tiempo(b - 1), b - a))
+        return pd.DataFrame(filas, columns=["columna", "inicio", "fin", "muestras"])
+
+    def a_dataframe(self, solo_completas=False):
+        """
+        DataFrame con 'time' y una columna por variable, con los tipos del esquema.
+
+        Args:
+            solo_completas (bool): Devuelve solo las filas sin huecos en ninguna columna.
+        """
+        df = aplicar_esquema(pd.DataFrame(self.valores, columns=self.columnas, copy=False))
+        df.insert(0, "time", self.tiempos)
+        if solo_completas:
+            df = df[~self.huecos_mascara.any(axis=1)].reset_index(drop=True)
+        return df
+
+
+def _ultimo_valido(validos):
+    """Para cada fila, índice de la última fila válida hasta ella (-1 si no hay)."""
+    idx = np.where(validos, np.arange(len(validos))[:, None], -1)
+    return np.maximum.accumulate(idx, axis=0)
+
+
+def _proximo_valido(validos):
+    """Para cada fila, índice de la próxima fila válida desde ella (n si no hay)."""
+    n = len(validos)
+    idx = np.where(validos, np.arange(n)[:, None], n)
+    return np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+
+
+def remuestrear_grilla(df, paso_seg=None, metodo=None, max_relleno=None, on="time"):
+    """
+    Ajusta los datos combinados a una grilla regular.
+
+    Args:
+        df (pd.DataFrame): Datos con columna de tiempo `on` y columnas numéricas.
+        paso_seg (int): Paso de la grilla en segundos (por defecto GRILLA_PASO_SEG).
+        metodo (str): 'ffill' (repite el último dato) o 'interpolar' (lineal entre vecinos).
+        max_relleno (int): Máximo de muestras consecutivas a completar; huecos más largos
+            quedan sin completar y marcados en la máscara.
+
+    Returns:
+        SerieGrilla: Si en una celda cae más de una muestra se conserva la última.
+    """
+    if paso_seg is None:
+        paso_seg = GRILLA_PASO_SEG
+    if metodo is None:
+        metodo = GRILLA_METODO_RELLENO
+    if max_relleno is None:
+        max_relleno = GRILLA_MAX_RELLENO
+    if metodo not in ("ffill", "interpolar"):
+        raise ValueError(f"Método de relleno inválido: {metodo} (opciones: 'ffill', 'interpolar')")
+
+    columnas = [c for c in df.columns if c != on and pd.api.types.is_numeric_dtype(df[c])]
+    paso = pd.Timedelta(seconds=paso_seg)
+    tiempos = pd.to_datetime(df[on]).to_numpy(dtype="datetime64[ns]")
+    validos_t = ~np.isnat(tiempos)
+    if not validos_t.any():
+        vacio = np.empty((0, len(columnas)))
+        return SerieGrilla(pd.Timestamp(0), paso, columnas, vacio, vacio.astype(bool), vacio.astype(bool))
+
+    t = tiempos[validos_t].view(np.int64)
+    paso_ns = paso.value
+    inicio = (t.min() // paso_ns) * paso_ns
+    filas = np.rint((t - inicio) / paso_ns).astype(np.int64)
+    n = int(filas.max()) + 1
+
+    # Orden temporal estable: ante dos muestras en la misma celda gana la última
+    orden = np.argsort(t, kind="stable")
+    filas = filas[orden]
+    origen = df.loc[validos_t, columnas].to_numpy(dtype=np.float64)[orden]
+
+    dtype = np.result_type(np.float32, *[df[c].dtype for c in columnas]) if columnas else np.float64
+    valores = np.full((n, len(columnas)), np.nan, dtype=dtype)
+    valores[filas] = origen
+    validos = ~np.isnan(valores)
+
+    # Relleno acotado
+    previo = _ultimo_valido(validos)
+    fila = np.arange(n)[:, None]
+    if metodo == "ffill":
+        rellenar = ~validos & (previo >= 0) & (fila - previo <= max_relleno)
+        if rellenar.any():
+            _, jj = np.nonzero(rellenar)
+            valores[rellenar] = valores[previo[rellenar], jj]
+    else:
+        siguiente = _proximo_valido(validos)
+        rellenar = ~validos & (previo >= 0) & (siguiente < n) & (siguiente - previo - 1 <= max_relleno)
+        if rellenar.any():
+            ii, jj = np.nonzero(rellenar)
+            a, b = previo[rellenar], siguiente[rellenar]
+            peso = (ii - a) / (b - a)
+            valores[rellenar] = valores[a, jj] + peso * (valores[b, jj] - valores[a, jj])
+
+    huecos = ~validos & ~rellenar
+    logger.info(f"Grilla de {paso_seg} s: {n} filas, {int(rellenar.sum())} valores completados, "
+                f"{int(huecos.any(axis=1).sum())} filas con huecos")
+    return SerieGrilla(pd.Timestamp(inicio), paso, columnas, valores, huecos, rellenar)
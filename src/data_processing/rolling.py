@@ -0,0 +1,167 @@
+# rolling.py
+# src/data_processing/rolling.py
+
+"""
+Estadísticas móviles de varias series a la vez.
+Media y desvío salen de sumas acumuladas (una pasada de cumsum por serie sobre un
+array 2-D) y mínimo/máximo de filtros de ventana de scipy, para todas las ventanas
+pedidas en una llamada. Los resultados coinciden con pandas rolling(w) (ventana que
+termina en cada fila, desvío con ddof=1, NaN si faltan datos en la ventana).
+
+Estabilidad numérica: las sumas se reinician cada SEGMENTO filas y cada segmento se
+desplaza por su propia media antes de acumular, así las sumas se mantienen cerca de
+cero aunque la serie derive (un contador de energía como EA_I_IV_T). Las ventanas
+que cruzan un reinicio llevan la parte del segmento anterior al desplazamiento del
+segmento donde terminan antes de combinar las sumas.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.ndimage import minimum_filter1d, maximum_filter1d
+
+ESTADISTICAS = ("media", "desvio", "min", "max")
+SEGMENTO = 4096
+
+
+def _acumulada(x, largo):
+    """Suma acumulada de cada serie de x (series, muestras), reiniciada cada `largo` muestras."""
+    acumulada = np.empty_like(x)
+    for a in range(0, x.shape[1], largo):
+        np.cumsum(x[:, a:a + largo], axis=1, out=acumulada[:, a:a + largo])
+    return acumulada
+
+
+def _sumas_ventana(acumulada, ventana, largo):
+    """
+    Suma de las muestras (i - ventana, i] a partir de la acumulada por segmentos
+    (largo >= ventana); las primeras posiciones suman lo que hay. Las ventanas que
+    cruzan un reinicio suman el total del segmento anterior.
+    """
+    n = acumulada.shape[1]
+    suma = acumulada.copy()
+    if ventana < n:
+        suma[:, ventana:] -= acumulada[:, :-ventana]
+    for a in range(largo, n, largo):
+        # Posiciones [a, a + ventana): la ventana empieza en el segmento que termina en a - 1
+        suma[:, a:a + ventana] += acumulada[:, a - 1:a]
+    return suma
+
+
+def _desplazamientos(x, nulos, largo):
+    """Media de los valores válidos de cada segmento de `largo` muestras: (series, segmentos)."""
+    limpio = np.where(nulos, 0.0, x) if nulos is not None else x
+    cortes = np.arange(0, x.shape[1], largo)
+    sumas = np.add.reduceat(limpio, cortes, axis=1)
+    if nulos is None:
+        cuentas = np.diff(np.append(cortes, x.shape[1]))[None, :]
+    else:
+        cuentas = np.add.reduceat(~nulos, cortes, axis=1)
+    return sumas / np.maximum(cuentas, 1)
+
+
+def _a_desplazamiento_final(s1, s2, acum1, acum_validos, desplazamientos, ventana, largo):
+    """
+    Pasa in place las sumas de las ventanas que cruzan un reinicio al desplazamiento del
+    segmento donde terminan: la parte del segmento anterior se acumuló con el suyo.
+    """
+    n = s1.shape[1]
+    for k, a in enumerate(range(largo, n, largo), start=1):
+        fin = min(a + ventana, n)
+        inicio = np.arange(a, fin) - ventana  # última muestra antes de la ventana
+        parte1 = acum1[:, a - 1:a] - acum1[:, inicio]
+        if acum_validos is not None:
+            cuenta = acum_validos[:, a - 1:a] - acum_validos[:, inicio]
+        else:
+            cuenta = (a - 1 - inicio)[None, :].astype(np.float64)
+        d = (desplazamientos[:, k - 1] - desplazamientos[:, k])[:, None]
+        s1[:, a:fin] += cuenta * d
+        if s2 is not None:
+            s2[:, a:fin] += 2 * d * parte1 + cuenta * d * d
+
+
+def estadisticas_moviles(valores, ventanas, estadisticas=ESTADISTICAS, min_periodos=None):
+    """
+    Media, desvío, mínimo y máximo móviles de N series para una o varias ventanas.
+
+    Args:
+        valores (np.ndarray | pd.DataFrame): Array (filas, N) o 1-D; un DataFrame se
+            toma por columnas.
+        ventanas (int | list): Tamaño(s) de ventana en muestras.
+        estadisticas (tuple): Subconjunto de ESTADISTICAS a calcular.
+        min_periodos (int): Mínimo de valores válidos en la ventana para dar resultado
+            (por defecto la ventana completa, como pandas).
+
+    Returns:
+        dict: {ventana: {estadistica: np.ndarray (filas, N)}}; con entrada 1-D cada
+        array es 1-D.
+    """
+    if isinstance(valores, (pd.DataFrame, pd.Series)):
+        valores = valores.to_numpy()
+    x = np.asarray(valores, dtype=np.float64)
+    una_serie = x.ndim == 1
+    if una_serie:
+        x = x[:, None]
+    ventanas = [ventanas] if np.isscalar(ventanas) else list(ventanas)
+    if min(ventanas) < 1:
+        raise ValueError(f"Ventana inválida: {min(ventanas)}")
+    invalidas = set(estadisticas) - set(ESTADISTICAS)
+    if invalidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(invalidas)} (opciones: {ESTADISTICAS})")
+
+    x = np.ascontiguousarray(x.T)  # (series, muestras): cada serie contigua en memoria
+    n = x.shape[1]
+    nulos = np.isnan(x)
+    hay_nulos = bool(nulos.any())
+    validos = (~nulos).astype(np.float64) if hay_nulos else None
+
+    # Una sola pasada de sumas acumuladas para todas las ventanas, cada segmento
+    # desplazado por su media
+    largo = max(SEGMENTO, max(ventanas))
+    desplazamientos = _desplazamientos(x, nulos if hay_nulos else None, largo)
+    desplazamiento = np.repeat(desplazamientos, largo, axis=1)[:, :n]
+    centrado = x - desplazamiento
+    if hay_nulos:
+        centrado[nulos] = 0.0
+    necesita_sumas = {"media", "desvio"} & set(estadisticas)
+    if necesita_sumas:
+        acum1 = _acumulada(centrado, largo)
+        acum2 = _acumulada(centrado * centrado, largo) if "desvio" in estadisticas else None
+    acum_validos = _acumulada(validos, largo) if hay_nulos else None
+    para_min = np.where(nulos, np.inf, x) if hay_nulos and "min" in estadisticas else x
+    para_max = np.where(nulos, -np.inf, x) if hay_nulos and "max" in estadisticas else x
+
+    resultado = {}
+    for w in ventanas:
+        minimo = w if min_periodos is None else min_periodos
+        if hay_nulos:
+            cuenta = _sumas_ventana(acum_validos, w, largo)
+        else:
+            cuenta = np.minimum(np.arange(1, n + 1, dtype=np.float64), w)[None, :]
+        sin_dato = cuenta < minimo
+        stats = {}
+        if necesita_sumas:
+            s1 = _sumas_ventana(acum1, w, largo)
+            s2 = _sumas_ventana(acum2, w, largo) if "desvio" in estadisticas else None
+            _a_desplazamiento_final(s1, s2, acum1, acum_validos, desplazamientos, w, largo)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                media = s1 / cuenta
+                if "desvio" in estadisticas:
+                    s2 -= s1 * media
+                    np.maximum(s2, 0.0, out=s2)
+                    s2 /= cuenta - 1
+                    np.sqrt(s2, out=s2)
+                    s2[np.broadcast_to(sin_dato | (cuenta < 2), s2.shape)] = np.nan
+                    stats["desvio"] = s2
+                if "media" in estadisticas:
+                    media += desplazamiento
+                    media[np.broadcast_to(sin_dato, media.shape)] = np.nan
+                    stats["media"] = media
+        # Filtros de ventana que termina en la muestra (origin desplaza la ventana centrada)
+        origen = (w - 1) // 2
+        for nombre, filtro, entrada in (("min", minimum_filter1d, para_min), ("max", maximum_filter1d, para_max)):
+            if nombre in estadisticas:
+                m = filtro(entrada, w, axis=1, origin=origen, mode="nearest")
+                m[np.broadcast_to(sin_dato, m.shape)] = np.nan
+                stats[nombre] = m
+        resultado[w] = {e: (v[0] if una_serie else v.T) for e, v in stats.items()}
+    return resultado
@@ -0,0 +1,109 @@
+# ventanas.py
+# src/data_processing/ventanas.py
+
+"""
+Extracción vectorizada de ventanas de contexto (las series de RANGE + 1 muestras de
+generate_ts_anomalies).
+
+    posiciones_en        primera fila de cada tiempo buscado (searchsorted, O(A log N))
+    mascara_exclusion    filas a menos de un radio de algún tiempo dado (una pasada)
+    extraer_ventanas     todas las ventanas que terminan en las filas pedidas, como
+                         array (ventanas, largo, columnas) (sliding_window_view)
+    estadisticas_columnas media y desvío de cada columna de un conjunto de ventanas
+
+Los tiempos se manejan como datetime64[ns] (NaT no coincide con nada ni excluye nada).
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+NAT = np.iinfo(np.int64).min
+
+
+def _ns(tiempos):
+    return np.asarray(pd.to_datetime(tiempos), dtype="datetime64[ns]").view(np.int64)
+
+
+def posiciones_en(tiempos, buscados):
+    """
+    Posición de la primera fila de `tiempos` igual a cada valor de `buscados`.
+
+    Returns:
+        np.ndarray: Posiciones (int64), -1 donde el tiempo no está.
+    """
+    t, b = _ns(tiempos), _ns(buscados)
+    if len(t) > 1 and (t[1:] > t[:-1]).all():
+        orden = None
+        ordenados = t
+    else:
+        # Orden estable: entre tiempos repetidos gana la primera fila
+        orden = np.argsort(t, kind="stable")
+        ordenados = t[orden]
+    j = np.searchsorted(ordenados, b, side="left")
+    j_ok = np.minimum(j, max(len(t) - 1, 0))
+    hallado = (j < len(t)) & (b != NAT)
+    if len(t):
+        hallado &= ordenados[j_ok] == b
+    pos = j_ok if orden is None else (orden[j_ok] if len(t) else j_ok)
+    return np.where(hallado, pos, -1).astype(np.int64)
+
+
+def mascara_exclusion(tiempos, centros, radio):
+    """
+    True en las filas cuyo tiempo está a menos de `radio` (pd.Timedelta, estricto) de
+    algún tiempo de `centros`. Cada fila se compara solo con los dos centros vecinos.
+    """
+    t = _ns(tiempos)
+    c = np.sort(_ns(centros))
+    c = c[c != NAT]
+    excluir = np.zeros(len(t), dtype=bool)
+    if len(c) == 0 or len(t) == 0:
+        return excluir
+    r = pd.Timedelta(radio).value
+    validos = t != NAT
+    tv = t[validos]
+    j = np.searchsorted(c, tv)
+    derecha = np.abs(c[np.minimum(j, len(c) - 1)] - tv)
+    izquierda = np.abs(tv - c[np.maximum(j - 1, 0)])
+    excluir[validos] = np.minimum(derecha, izquierda) < r
+    return excluir
+
+
+def extraer_ventanas(valores, fines, largo):
+    """
+    Ventanas [fin - largo + 1, fin] de un array (filas, columnas) o 1-D.
+
+    Returns:
+        np.ndarray: (ventanas, largo, columnas), o (ventanas, largo) con entrada 1-D.
+            Es una copia contigua (las vistas de sliding_window_view no se escriben).
+    """
+    x = np.asarray(valores)
+    fines = np.asarray(fines, dtype=np.int64)
+    if len(fines) and (fines.min() < largo - 1 or fines.max() >= len(x)):
+        raise IndexError(f"Ventanas de {largo} muestras fuera de rango (filas: {len(x)})")
+    if len(x) < largo:
+        return np.empty((0, largo) + x.shape[1:], dtype=x.dtype)
+    vista = sliding_window_view(x, largo, axis=0)  # (filas - largo + 1, [columnas,] largo)
+    ventanas = vista[fines - (largo - 1)]
+    return np.ascontiguousarray(np.moveaxis(ventanas, -1, 1)) if x.ndim == 2 else ventanas.copy()
+
+
+def estadisticas_columnas(ventanas):
+    """
+    Media y desvío (ddof=1) de cada columna sobre todas las muestras de un conjunto de
+    ventanas (ventanas, largo, columnas), ignorando NaN, acumulando en float64.
+
+    Returns:
+        tuple: (media, desvio), arrays de largo `columnas`.
+    """
+    x = ventanas.reshape(-1, ventanas.shape[-1]).astype(np.float64, copy=False)
+    validos = ~np.isnan(x)
+    n = validos.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(validos, x, 0.0).sum(axis=0) / n
+        desvios = np.where(validos, x - media, 0.0)
+        desvio = np.sqrt((desvios * desvios).sum(axis=0) / (n - 1))
+    media[n == 0] = np.nan
+    desvio[n < 2] = np.nan
+    return media, desvio
@@ -1,9 +1,15 @@
-
 # db_connector.py
 
 """
 Módulo para gestionar la conexión a InfluxDB.
 Se implementa una clase DBConnector que ofrece métodos para conectarse a InfluxDB 1.8 y 2.7, y realizar consultas.
+
+Los clientes se crean de forma perezosa y se reutilizan: obtener_conector() devuelve
+un conector compartido por todo el proceso, con pool de conexiones HTTP keep-alive,
+chequeo de salud, contadores de uso y cierre ordenado al salir.
+
+Las consultas pasan por un backend (ver backends/): las bases reales, una grabación
+en disco o un generador sintético, según INFLUX_BACKEND de config.
 """
 
 # src/db_connector.py
@@ -12,114 +18,203 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import atexit
+import threading
 
 import pytz
 from datetime import datetime
 from influxdb import InfluxDBClient
 import influxdb_client
-from influxdb_client.client.write_api import SYNCHRONOUS
-from utils.utils import convert_df_utc_to_local
-from config import INFLUXDB1_CONFIG, INFLUXDB2_CONFIG, LOCAL_TIMEZONE
+from utils.logger import logger
+from flux_reader import leer_csv_flux, TAMANO_BLOQUE
+from influxql_reader import leer_json_influxql, CHUNK_SIZE
+from backends import crear_backend
+from schema import dtype_de
+from config import INFLUXDB1_CONFIG, INFLUXDB2_CONFIG, LOCAL_TIMEZONE, INFLUX_POOL_SIZE
 
 class DBConnector:
-    def __init__(self):
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend (BackendInflux): Origen de los datos. Por defecto el de INFLUX_BACKEND.
+        """
         self.client1 = None
         self.client2 = None
+        self._query_api2 = None
+        self._lock = threading.Lock()
+        self.conexiones_abiertas = 0
+        self.consultas_servidas = 0
+        self.backend = backend if backend is not None else crear_backend(conector=self)
 
     def connect_influxdb1(self):
-
-        """Conecta a InfluxDB 1.8 utilizando la configuración definida."""
-        self.client1 = InfluxDBClient(
-            host=INFLUXDB1_CONFIG['host'],
-            port=INFLUXDB1_CONFIG['port'],
-            username=INFLUXDB1_CONFIG['username'],
-            password=INFLUXDB1_CONFIG['password'],
-            database=INFLUXDB1_CONFIG['database'],
-            ssl=INFLUXDB1_CONFIG['ssl'],
-            timeout=INFLUXDB1_CONFIG['timeout'],
-            verify_ssl=INFLUXDB1_CONFIG['verify_ssl']
-        )
+        """Conecta a InfluxDB 1.8 utilizando la configuración definida (una sola vez)."""
+        with self._lock:
+            if self.client1 is None:
+                self.client1 = InfluxDBClient(
+                    host=INFLUXDB1_CONFIG['host'],
+                    port=INFLUXDB1_CONFIG['port'],
+                    username=INFLUXDB1_CONFIG['username'],
+                    password=INFLUXDB1_CONFIG['password'],
+                    database=INFLUXDB1_CONFIG['database'],
+                    ssl=INFLUXDB1_CONFIG['ssl'],
+                    timeout=INFLUXDB1_CONFIG['timeout'],
+                    verify_ssl=INFLUXDB1_CONFIG['verify_ssl'],
+                    pool_size=INFLUX_POOL_SIZE
+                )
+                self.conexiones_abiertas += 1
         return self.client1
 
     def connect_influxdb2(self):
-        """Conecta a InfluxDB 2.7 utilizando la configuración definida."""
-        self.client2 = influxdb_client.InfluxDBClient(
-            url=INFLUXDB2_CONFIG['url'],
-            token=INFLUXDB2_CONFIG['token'],
-            org=INFLUXDB2_CONFIG['org'],
-            timeout=INFLUXDB2_CONFIG['timeout'],
-            ssl=INFLUXDB2_CONFIG['ssl'],
-            verify_ssl=INFLUXDB2_CONFIG['verify_ssl']
-        )
+        """Conecta a InfluxDB 2.7 utilizando la configuración definida (una sola vez)."""
+        with self._lock:
+            if self.client2 is None:
+                self.client2 = influxdb_client.InfluxDBClient(
+                    url=INFLUXDB2_CONFIG['url'],
+                    token=INFLUXDB2_CONFIG['token'],
+                    org=INFLUXDB2_CONFIG['org'],
+                    timeout=INFLUXDB2_CONFIG['timeout'],
+                    ssl=INFLUXDB2_CONFIG['ssl'],
+                    verify_ssl=INFLUXDB2_CONFIG['verify_ssl'],
+                    connection_pool_maxsize=INFLUX_POOL_SIZE
+                )
+                self.conexiones_abiertas += 1
         return self.client2
 
+    def query_api2(self):
+        """Devuelve el query_api de InfluxDB 2.7, creado una única vez."""
+        client2 = self.connect_influxdb2()
+        with self._lock:
+            if self._query_api2 is None:
+                self._query_api2 = client2.query_api()
+        return self._query_api2
+
+    def _registrar_consulta(self):
+        with self._lock:
+            self.consultas_servidas += 1
+
     def query_influx1(self, query):
         """Realiza una consulta a InfluxDB 1.8.
-        
+
         Args:
             query (str): Consulta en lenguaje InfluxQL.
-        
+
         Returns:
-            DataFrame o lista de puntos.
+            list: Lista de puntos.
         """
 
-        if self.client1 is None:
-            self.client1 = InfluxDBClient(
-                host=INFLUXDB1_CONFIG['host'],
-                port=INFLUXDB1_CONFIG['port'],
-                username=INFLUXDB1_CONFIG['username'],
-                password=INFLUXDB1_CONFIG['password'],
-                database=INFLUXDB1_CONFIG['database'],
-                ssl=INFLUXDB1_CONFIG['ssl'],
-                timeout=INFLUXDB1_CONFIG['timeout'],
-                verify_ssl=INFLUXDB1_CONFIG['verify_ssl']
-            )
-        return self.client1
+        self._registrar_consulta()
+        return self.backend.influxql_puntos(query)
 
-    def connect_influxdb2(self):
-        if self.client2 is None:
-            self.client2 = influxdb_client.InfluxDBClient(
-                url=INFLUXDB2_CONFIG['url'],
-                token=INFLUXDB2_CONFIG['token'],
-                org=INFLUXDB2_CONFIG['org'],
-                timeout=INFLUXDB2_CONFIG['timeout'],
-                ssl=INFLUXDB2_CONFIG['ssl'],
-                verify_ssl=INFLUXDB2_CONFIG['verify_ssl']
-            )
-        return self.client2
+    def query_influx1_bloques(self, query, chunk_size=CHUNK_SIZE):
+        """Realiza una consulta a InfluxDB 1.8 con respuestas chunked y epoch en ns.
 
-    def query_influx1(self, query):
+        Args:
+            query (str): Consulta en lenguaje InfluxQL.
+            chunk_size (int): Puntos por chunk pedidos al servidor.
+
+        Returns:
+            Iterador de DataFrames con 'time' en UTC y columnas con el tipo del esquema.
+        """
 
-        if not self.client1:
-            self.connect_influxdb1()
-        result = self.client1.query(query)
-        return list(result.get_points())
+        self._registrar_consulta()
+        return leer_json_influxql(self.backend.influxql_lineas(query, chunk_size), dtype_de)
 
     def query_influx2(self, query):
 
         """Realiza una consulta a InfluxDB 2.7 usando Flux.
-        
+
         Args:
             query (str): Consulta en lenguaje Flux.
-        
+
         Returns:
             DataFrame con los resultados.
         """
 
-        if not self.client2:
-            self.connect_influxdb2()
-        query_api = self.client2.query_api()
-        return query_api.query_data_frame(query=query)
+        self._registrar_consulta()
+        return self.backend.flux_dataframe(query)
+
+    def query_influx2_bloques(self, query, campos, tamano_bloque=TAMANO_BLOQUE):
+        """Realiza una consulta Flux y devuelve un iterador de DataFrames tipados por bloques.
+
+        Args:
+            query (str): Consulta en lenguaje Flux (pivotada por _time).
+            campos (list): Campos a decodificar.
+            tamano_bloque (int): Filas máximas por bloque.
+
+        Returns:
+            Iterador de DataFrames con 'time' en UTC y columnas con el tipo del esquema.
+        """
+
+        self._registrar_consulta()
+        return leer_csv_flux(self.backend.flux_lineas(query), campos, tamano_bloque, dtype_de)
+
+    def verificar_salud(self):
+        """Hace ping a los clientes abiertos. Un cliente que no responde se cierra
+        para que la próxima consulta lo vuelva a crear.
+
+        Returns:
+            dict: {'influx1': bool, 'influx2': bool} de los clientes abiertos.
+        """
+
+        estado = {}
+        if self.client2 is not None:
+            try:
+                estado['influx2'] = bool(self.client2.ping())
+            except Exception:
+                estado['influx2'] = False
+        if self.client1 is not None:
+            try:
+                self.client1.ping()
+                estado['influx1'] = True
+            except Exception:
+                estado['influx1'] = False
+
+        if estado.get('influx2') is False:
+            logger.warning("InfluxDB 2.7 no responde al ping; se recreará el cliente")
+            self._cerrar_cliente2()
+        if estado.get('influx1') is False:
+            logger.warning("InfluxDB 1.8 no responde al ping; se recreará el cliente")
+            self._cerrar_cliente1()
+        return estado
+
+    def estadisticas(self):
+        """Contadores de conexiones abiertas y consultas servidas."""
+        return {'conexiones_abiertas': self.conexiones_abiertas, 'consultas_servidas': self.consultas_servidas}
+
+    def _cerrar_cliente1(self):
+        with self._lock:
+            if self.client1 is not None:
+                try:
+                    self.client1.close()
+                except Exception:
+                    pass
+                self.client1 = None
+
+    def _cerrar_cliente2(self):
+        with self._lock:
+            if self.client2 is not None:
+                try:
+                    self.client2.close()
+                except Exception:
+                    pass
+                self.client2 = None
+                self._query_api2 = None
+
+    def cerrar(self):
+        """Cierra los clientes y libera el pool de conexiones."""
+        self._cerrar_cliente1()
+        self._cerrar_cliente2()
+        self.backend.cerrar()
 
     @staticmethod
     def convert_to_local(utc_date_str, fmt="%Y-%m-%dT%H:%M:%SZ"):
 
         """Convierte una fecha UTC a la zona local definida en la configuración.
-        
+
         Args:
             utc_date_str (str): Fecha en formato UTC.
             fmt (str): Formato de la fecha.
-        
+
         Returns:
             datetime: Fecha convertida a la zona local.
         """
@@ -128,3 +223,27 @@ class DBConnector:
         utc_time = pytz.utc.localize(utc_time)
         local_tz = pytz.timezone(LOCAL_TIMEZONE)
         return utc_time.astimezone(local_tz)
+
+
+# Conector compartido por todo el proceso
+_conector = None
+_conector_lock = threading.Lock()
+
+def obtener_conector():
+    """Devuelve el DBConnector compartido, creándolo la primera vez."""
+    global _conector
+    with _conector_lock:
+        if _conector is None:
+            _conector = DBConnector()
+        return _conector
+
+def cerrar_conector():
+    """Cierra el conector compartido (se registra también con atexit)."""
+    global _conector
+    with _conector_lock:
+        if _conector is not None:
+            logger.info(f"Cerrando conexiones a InfluxDB: {_conector.estadisticas()}")
+            _conector.cerrar()
+            _conector = None
+
+atexit.register(cerrar_conector)
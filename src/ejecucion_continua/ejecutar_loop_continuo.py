@@ -12,17 +12,126 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from query_engine import busqueda_influx2, merge_data
-from data_processing.data_cleaning import preprocess_data
-from config import OUTPUT_DIR, MAX_ST, VISUALIZAR_MAE, LOCAL_TIMEZONE
+from db_connector import obtener_conector
+from data_processing.normalization import Escalador
+from data_processing.limpieza_incremental import LimpiadorIncremental
+from config import OUTPUT_DIR, MAX_ST, VISUALIZAR_MAE, LOCAL_TIMEZONE, ESCALADOR_PATH
+from schema import seleccionar
 
 from utils.logger import logger
 
 # Definir zonas
 arg_tz = pytz.timezone(LOCAL_TIMEZONE)
 
-def loop_continuo(location, pred_norm, df_clean, visualizar_mae=True):
+# Columnas que sigue la ejecución continua (potencia activa, FP total y THD de corriente)
+COLUMNAS_CONTINUO = ['time'] + seleccionar(prefijos=('PowA', 'PowF', 'THDI'))
+
+def detectar_en_linea(s_limpia, escalador, detectores):
+    """
+    Pasa una medición limpia, normalizada con `escalador` como en el pipeline batch,
+    a los detectores nativos (models/detectores.py) y registra los cambios marcados.
+    Cada detector decide el punto de hace `retardo` muestras.
+
+    Returns:
+        dict: {detector: columnas marcadas} (vacío si no marcó ninguno).
+    """
+    fila = escalador.transform(s_limpia).iloc[0]
+    marcados = {}
+    for nombre, detector in detectores.items():
+        marcas = detector.update(fila, fila['time'])
+        if marcas is None:
+            continue
+        columnas = [c for c, m in zip(detector.columnas, marcas) if m == 1]
+        if columnas:
+            marcados[nombre] = columnas
+            logger.warning(f"[{nombre}] Cambio detectado en {detector.tiempo_decision}: {', '.join(columnas)}")
+    return marcados
+
+def procesar_medicion(ultima_med, df_temporal, pred_norm, escalador, limpiador, mae_filepath, detectores=None):
+    """
+    Procesa una medición nueva de la ejecución continua: la limpia con `limpiador`
+    (LimpiadorIncremental), la pasa a los `detectores` en línea si los hay, la suma a
+    la ventana de las últimas MAX_ST muestras y, con la ventana completa, calcula el
+    MAE contra la predicción desnormalizada con `escalador` (el Escalador del pipeline
+    batch) y lo agrega a mae_filepath.
+
+    Returns:
+        tuple: (df_temporal, fila agregada, MAE, estado). estado es "sin_fila",
+        "descartada", "acumulando", "dimensiones", "error_mae" u "ok"; el MAE es None
+        salvo en "ok".
+    """
+    df_t = ultima_med[COLUMNAS_CONTINUO]
+
+    try:
+        s = df_t.iloc[[0]]
+        logger.info(f"df_t: \n{df_t}")
+    except Exception as e:
+        logger.warning(f"No se pudo obtener una fila válida de datos: {e}")
+        return df_temporal, None, None, "sin_fila"
+
+    s_limpia, _ = limpiador.agregar(s)
+    if s_limpia.empty:
+        logger.info("Medición descartada por la limpieza (timestamp repetido o valores nulos).")
+        return df_temporal, s, None, "descartada"
+
+    if detectores:
+        detectar_en_linea(s_limpia, escalador, detectores)
+
+    df_temporal = pd.concat([df_temporal, s_limpia], ignore_index=True)
+
+    if len(df_temporal) < MAX_ST:
+        logger.info(f"Aún no hay suficientes datos para aplicar predicción (actual: {len(df_temporal)}).")
+        return df_temporal, s, None, "acumulando"
+
+    if len(df_temporal) > MAX_ST:
+        df_temporal = df_temporal.tail(MAX_ST).reset_index(drop=True)
+
+    # La ventana ya está limpia: cada muestra pasó por el limpiador al llegar
+    df_t_proc = df_temporal
+    n = min(len(df_t_proc), MAX_ST)
+    x = pred_norm.iloc[0:n].copy()
+    x['LSTM Prediction'] = escalador.invertir(x['LSTM Prediction'], 'PowF_T_Ins')
+
+    if len(df_t_proc) != len(x):
+        logger.warning(f"Dimensiones incompatibles: df_t_proc={len(df_t_proc)} vs pred={len(x)}. Saltando.")
+        return df_temporal, s, None, "dimensiones"
+
+    try:
+        time_utc = pd.to_datetime(s.at[0, 'time'])
+        if time_utc.tzinfo is None:
+            time_utc = time_utc.tz_localize(arg_tz)
+        time_local = time_utc.astimezone(pytz.UTC)
+
+        mae_anom = mean_absolute_error(df_t_proc['PowF_T_Ins'], x['LSTM Prediction'])
+        logger.info(f"MAE calculado: {mae_anom}")
+
+        df_mae = pd.DataFrame([{
+            'time_utc': time_utc.strftime("%Y-%m-%d %H:%M:%S"),
+            'time_local': time_local.strftime("%Y-%m-%d %H:%M:%S"),
+            'MAE': mae_anom
+        }])
+
+        if os.path.exists(mae_filepath):
+            df_mae.to_csv(mae_filepath, mode='a', header=False, index=False)
+        else:
+            df_mae.to_csv(mae_filepath, mode='w', header=True, index=False)
+    except Exception as e:
+        logger.warning(f"Error en el cálculo o guardado del MAE: {e}")
+        return df_temporal, s, None, "error_mae"
+
+    return df_temporal, s, mae_anom, "ok"
+
+def loop_continuo(location, pred_norm, escalador=None, visualizar_mae=True, stats_limpieza=None, detectores=None):
 
     logger.info("==== INICIO DE EJECUCION CONTINUA ====")
+    if escalador is None:
+        escalador = Escalador.cargar(ESCALADOR_PATH)
+        logger.info(f"Escalador cargado desde {ESCALADOR_PATH}")
+    # Estadística de largo plazo para los outliers: parte de la del pipeline batch si está
+    if stats_limpieza is not None:
+        limpiador = LimpiadorIncremental.desde_stats(stats_limpieza, COLUMNAS_CONTINUO[1:])
+    else:
+        limpiador = LimpiadorIncremental(COLUMNAS_CONTINUO[1:])
     mae_filepath = os.path.join(OUTPUT_DIR, "mae_resultados.csv")
     sin_datos_consecutivos = 0
 
@@ -36,11 +145,7 @@ def loop_continuo(location, pred_norm, df_clean, visualizar_mae=True):
 
     logger.info(f"Hora inicial: {utc_time2}")
 
-    df_temporal = pd.DataFrame(columns=[
-        'time', 'PowA_L1_Ins', 'PowA_L2_Ins', 'PowA_L3_Ins',
-        'PowF_T_Ins', 'THDI_L1_Ins', 'THDI_L2_Ins', 'THDI_L3_Ins'
-    ])
-    df_mae = pd.DataFrame(columns=['time', 'MAE'])
+    df_temporal = pd.DataFrame(columns=COLUMNAS_CONTINUO)
     contador_anom = 0
 
     # Acumulador de errores
@@ -67,6 +172,8 @@ def loop_continuo(location, pred_norm, df_clean, visualizar_mae=True):
                 sin_datos_consecutivos += 1
                 if sin_datos_consecutivos >= 3:
                     logger.warning(f"No se obtienen datos nuevos desde hace {sin_datos_consecutivos} iteraciones.")
+                    # Si el cliente quedó colgado se descarta y se reconecta en la próxima consulta
+                    obtener_conector().verificar_salud()
                 else:
                     logger.info("Sin nuevos datos. Esperando siguiente iteración.")
                 time.sleep(8)
@@ -76,64 +183,30 @@ def loop_continuo(location, pred_norm, df_clean, visualizar_mae=True):
 
             utc_time2 = utc_time
 
-            df_t = ultima_med[[
-                'time', 'PowA_L1_Ins', 'PowA_L2_Ins', 'PowA_L3_Ins',
-                'PowF_T_Ins', 'THDI_L1_Ins', 'THDI_L2_Ins', 'THDI_L3_Ins']]
+            df_temporal, s, mae_anom, estado = procesar_medicion(
+                ultima_med, df_temporal, pred_norm, escalador, limpiador, mae_filepath, detectores
+            )
 
-            try:
-                s = df_t.iloc[[0]]
-                logger.info(f"df_t: \n{df_t}")
-            except Exception as e:
-                logger.warning(f"No se pudo obtener una fila válida de datos: {e}")
+            if estado in ("sin_fila", "descartada"):
                 time.sleep(8)
                 continue
 
             contador_anom += 1
             logger.info(f"Lazo completado: {contador_anom}")
 
-            df_temporal = pd.concat([df_temporal, s], ignore_index=True)
-
-            if len(df_temporal) < MAX_ST:
-                logger.info(f"Aún no hay suficientes datos para aplicar predicción (actual: {len(df_temporal)}).")
+            if estado == "acumulando":
                 time.sleep(8)
                 continue
-
-            if len(df_temporal) > MAX_ST:
-                df_temporal = df_temporal.tail(MAX_ST).reset_index(drop=True)
-
-            df_t_proc = preprocess_data(df_temporal.copy(), silenciar_logs=True)
-            n = min(len(df_t_proc), MAX_ST)
-            x = pred_norm.iloc[0:n].copy()
-            x['LSTM Prediction'] = (
-                x['LSTM Prediction'] * (df_clean['PowF_T_Ins'].max() - df_clean['PowF_T_Ins'].min())
-            ) + df_clean['PowF_T_Ins'].min()
-
-            if len(df_t_proc) != len(x):
-                logger.warning(f"Dimensiones incompatibles: df_t_proc={len(df_t_proc)} vs pred={len(x)}. Saltando.")
+            if estado == "dimensiones":
+                continue
+            if estado == "error_mae":
+                logger.info(f"Último UTC procesado: {utc_time2}")
+                time.sleep(10)
                 continue
 
-            try:
-                time_utc = pd.to_datetime(s.at[0, 'time'])
-                if time_utc.tzinfo is None:
-                    time_utc = time_utc.tz_localize(arg_tz)
-                time_local = time_utc.astimezone(pytz.UTC)
-
-                mae_anom = mean_absolute_error(df_t_proc['PowF_T_Ins'], x['LSTM Prediction'])
-                logger.info(f"MAE calculado: {mae_anom}")
-
-                df_mae = pd.DataFrame([{
-                    'time_utc': time_utc.strftime("%Y-%m-%d %H:%M:%S"),
-                    'time_local': time_local.strftime("%Y-%m-%d %H:%M:%S"),
-                    'MAE': mae_anom
-                }])
-
-                if os.path.exists(mae_filepath):
-                    df_mae.to_csv(mae_filepath, mode='a', header=False, index=False)
-                else:
-                    df_mae.to_csv(mae_filepath, mode='w', header=True, index=False)
-
-                # Lazo para activar o desactivar gráfico en tiempo real del MAE (en config.py está VISUALIZAR_MAE)
-                if visualizar_mae:
+            # Lazo para activar o desactivar gráfico en tiempo real del MAE (en config.py está VISUALIZAR_MAE)
+            if visualizar_mae:
+                try:
                     if 'fig' not in globals():
                         plt.ion()
                         global fig, ax
@@ -158,13 +231,14 @@ def loop_continuo(location, pred_norm, df_clean, visualizar_mae=True):
                     plt.tight_layout()
                     plt.pause(0.01)
 
-            except Exception as e:
-                logger.warning(f"Error en el cálculo o guardado del MAE: {e}")
-                logger.info(f"Último UTC procesado: {utc_time2}")
-                time.sleep(10)
+                except Exception as e:
+                    logger.warning(f"Error en el cálculo o guardado del MAE: {e}")
+                    logger.info(f"Último UTC procesado: {utc_time2}")
+                    time.sleep(10)
 
         except Exception as e:
             logger.error(f"Error inesperado en la ejecución continua: {e}")
             break
 
+    logger.info(f"Conexiones InfluxDB: {obtener_conector().estadisticas()}")
     logger.info("==== FIN DE EJECUCION CONTINUA ====")
@@ -0,0 +1,299 @@
+# pipeline_particionado.py
+# src/ejecucion_particionada/pipeline_particionado.py
+
+"""
+Ejecución particionada (out-of-core) del pipeline batch para rangos largos.
+El rango se consulta por particiones (meses o días) y en memoria hay, como mucho,
+una partición y los bordes de sus vecinas, procese un mes o cinco años.
+
+Dos pasadas:
+    1. Consulta, grilla y limpieza de cada partición. Las estadísticas de limpieza
+       y el Escalador se combinan partición a partición (conteos, media, desvío y
+       min/max exactos) y cada partición limpia se guarda en un directorio de trabajo.
+    2. Normalización con el escalador de todo el rango (las particiones quedan en la
+       misma escala), conteo de outliers contra la media y el desvío de todo el
+       rango, detección y series de contexto.
+
+En la pasada 2 cada partición se extiende con las últimas SOLAPE_ANTES filas de la
+anterior (contexto de RANGE muestras, ventanas hacia atrás de VolatilityShift,
+LevelShift y AutoRegression) y las primeras SOLAPE_DESPUES de la siguiente (mitad
+derecha de las ventanas dobles de LevelShift y VolatilityShift). Solo se conservan
+las etiquetas de las filas propias de la partición, y el filtro de eventos únicos
+arrastra el último evento de la partición anterior, de modo que un evento que cruza
+un borde se cuenta una sola vez.
+"""
+
+import os
+import shutil
+import functools
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (motor de Parquet para pandas)
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+from config import PARTICION, PARTICION_DIR, USE_GRILLA, GRILLA_MAX_RELLENO
+from query_engine import consultar_datos_influx
+from query_planner import planificar_ventanas, FORMATO_UTC
+from data_processing.data_cleaning import preprocess_data, contar_outliers
+from data_processing.normalization import Escalador
+from data_processing.resampling import remuestrear_grilla
+from models.anomaly_detection import (
+    RANGE, VENTANA_LEVELSHIFT, VENTANA_VOLATILIDAD, AR_N_STEPS, AR_STEP_SIZE,
+    crear_serie, filtrar_eventos_unicos, generate_ts_anomalies, resumen_series,
+)
+from models.registro_detectores import correr_detectores
+from storage import guardar_artefacto
+from utils.logger import logger
+
+SOLAPE_ANTES = max(RANGE, VENTANA_VOLATILIDAD, VENTANA_LEVELSHIFT, AR_N_STEPS * AR_STEP_SIZE)
+SOLAPE_DESPUES = max(VENTANA_VOLATILIDAD, VENTANA_LEVELSHIFT)
+
+
+def planificar_particiones(fecha_inicio, fecha_fin, particion="MS"):
+    """
+    Divide el rango en particiones consecutivas.
+
+    Args:
+        fecha_inicio (str): Inicio del rango en UTC ('2024-01-01T03:00:00Z').
+        fecha_fin (str): Fin del rango en UTC.
+        particion (str): Frecuencia pandas anclada al calendario ('MS' meses, 'D' días),
+            que conserva la hora de fecha_inicio (03:00Z es la medianoche local), o un
+            tamaño fijo ('1D', '12h').
+
+    Returns:
+        list: Lista de tuplas (inicio, fin) en formato UTC.
+    """
+    try:
+        pd.Timedelta(particion)
+        return planificar_ventanas(fecha_inicio, fecha_fin, particion)
+    except ValueError:
+        pass
+    inicio, fin = pd.Timestamp(fecha_inicio), pd.Timestamp(fecha_fin)
+    bordes = pd.date_range(inicio, fin, freq=particion)
+    bordes = [inicio] + [b for b in bordes if inicio < b < fin] + [fin]
+    return [(a.strftime(FORMATO_UTC), b.strftime(FORMATO_UTC))
+            for a, b in zip(bordes[:-1], bordes[1:]) if a < b]
+
+
+def detectar_adtk(df, nombres=("LevelShift", "AutoReg")):
+    """Detectores registrados sobre una partición extendida: {nombre: etiquetas}."""
+    return correr_detectores(crear_serie(df), nombres)
+
+
+def _particiones_crudas(particiones, location, consultar, usar_grilla):
+    """
+    Genera (inicio, fin, DataFrame) de cada partición sin repetir filas en los bordes
+    (InfluxQL incluye el extremo final del rango). Con grilla, la partición se
+    remuestrea con las últimas filas crudas de la anterior delante, para que el
+    relleno de los primeros huecos use el dato previo igual que sobre el rango completo.
+    """
+    cursor = None    # último 'time' crudo entregado
+    emitido = None   # último 'time' de salida (la grilla redondea los tiempos)
+    cola = None
+    for ini, fin in particiones:
+        df = consultar(ini, fin, location)
+        if df is None or df.empty or 'time' not in df.columns:
+            logger.warning(f"Partición {ini} - {fin} sin datos")
+            continue
+        df['time'] = pd.to_datetime(df['time'])
+        if cursor is not None:
+            df = df[df['time'] > cursor]
+        if df.empty:
+            continue
+        cursor = df['time'].iloc[-1]
+
+        if usar_grilla:
+            crudo = df if cola is None else pd.concat([cola, df], ignore_index=True)
+            cola = df.iloc[-(GRILLA_MAX_RELLENO + 1):]
+            df = remuestrear_grilla(crudo).a_dataframe()
+            del crudo
+        if emitido is not None:
+            df = df[df['time'] > emitido]
+        if df.empty:
+            continue
+        emitido = df['time'].iloc[-1]
+        yield ini, fin, df.reset_index(drop=True)
+
+
+def _guardar_particion(df, dir_trabajo, i):
+    if PYARROW_DISPONIBLE:
+        ruta = os.path.join(dir_trabajo, f"particion_{i:05d}.parquet")
+        df.to_parquet(ruta, index=False)
+    else:
+        ruta = os.path.join(dir_trabajo, f"particion_{i:05d}.pkl")
+        df.to_pickle(ruta)
+    return ruta
+
+
+def _leer_particion(ruta):
+    return pd.read_parquet(ruta) if ruta.endswith(".parquet") else pd.read_pickle(ruta)
+
+
+def _primera_pasada(particiones, location, consultar, usar_grilla, dir_trabajo):
+    """Limpieza por partición: (archivos, EstadisticasLimpieza, Escalador) de todo el rango."""
+    archivos, stats = [], None
+    escalador = Escalador("minmax")
+    for i, (ini, fin, df) in enumerate(_particiones_crudas(particiones, location, consultar, usar_grilla)):
+        df_clean, stats_part = preprocess_data(df, silenciar_logs=True, inplace=True, devolver_stats=True)
+        del df
+        stats = stats_part if stats is None else stats.combinar(stats_part)
+        escalador.partial_fit(df_clean)
+        archivos.append(_guardar_particion(df_clean, dir_trabajo, i))
+        logger.info(f"Partición {ini} - {fin}: {len(df_clean)} filas limpias")
+    return archivos, stats, escalador
+
+
+def _segunda_pasada(archivos, stats, escalador, list_cols, detectar, min_sep):
+    """
+    Normalización, outliers, detección y series de contexto partición a partición.
+
+    Returns:
+        tuple: ({detector: (anómalas, normales, eventos)}, outliers exactos).
+    """
+    outliers = {}
+
+    def cargar(ruta):
+        df_clean = _leer_particion(ruta)
+        for c, n in contar_outliers(df_clean, stats.media, stats.desvio, stats.umbral_zscore).items():
+            outliers[c] = outliers.get(c, 0) + n
+        return escalador.transform(df_clean[list_cols])
+
+    salidas = {}     # {detector: ([ventanas anómalas], [ventanas normales], [eventos])}
+    arrastre = {}    # último evento de cada detector
+    previo = None    # cola de las particiones anteriores
+    actual = cargar(archivos[0])
+    for k in range(len(archivos)):
+        siguiente = cargar(archivos[k + 1]) if k + 1 < len(archivos) else None
+        partes = [p for p in (previo, actual) if p is not None]
+        con_contexto = pd.concat(partes, ignore_index=True) if len(partes) > 1 else actual
+        extendido = (con_contexto if siguiente is None else
+                     pd.concat([con_contexto, siguiente.iloc[:SOLAPE_DESPUES]], ignore_index=True))
+        t_ini, t_fin = actual['time'].iloc[0], actual['time'].iloc[-1]
+        # Las series de contexto miran RANGE filas hacia atrás
+        datos_ctx = con_contexto.iloc[max(len(con_contexto) - len(actual) - RANGE, 0):]
+        t_contexto = datos_ctx['time'].iloc[0]
+
+        for nombre, etiquetas in detectar(extendido).items():
+            anom, norm, eventos = salidas.setdefault(nombre, ([], [], []))
+            t = pd.to_datetime(etiquetas.index)
+            propias = etiquetas[(t >= t_ini) & (t <= t_fin)]
+            if nombre in arrastre:
+                limite = arrastre[nombre] + pd.Timedelta(seconds=min_sep * 10)
+                propias = propias[pd.to_datetime(propias.index) > limite]
+            try:
+                eventos_part = filtrar_eventos_unicos(propias, min_sep=min_sep, sample_rate_sec=10)
+            except Exception as e:
+                logger.warning(f"[{nombre}] Falló el filtrado de eventos únicos: {e}")
+                eventos_part = propias.copy()
+
+            # Los eventos previos que caen en el contexto solo excluyen ventanas normales
+            # cercanas: quedan a menos de RANGE filas del inicio y no generan serie propia
+            previos = [e[pd.to_datetime(e.index) >= t_contexto] for e in eventos[-2:]]
+            etiquetas_ctx = pd.concat(previos + [eventos_part])
+            df_anom, df_norm, _, n_anom = generate_ts_anomalies(
+                etiquetas_ctx, datos_ctx.copy(), pd.DataFrame(columns=list_cols),
+                pd.DataFrame(columns=list_cols), list_cols
+            )
+            anom.append(df_anom)
+            norm.append(df_norm)
+            if len(eventos_part):
+                eventos.append(eventos_part)
+                arrastre[nombre] = pd.to_datetime(eventos_part.index[-1])
+            logger.info(f"[{nombre}] {t_ini} - {t_fin}: {n_anom} anómalas")
+
+        previo = con_contexto.iloc[-SOLAPE_ANTES:]
+        actual = siguiente
+    return salidas, outliers
+
+
+def _concatenar(dfs, columnas):
+    dfs = [df for df in dfs if len(df)]
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=columnas)
+
+
+def ejecutar_particionado(fecha_inicio, fecha_fin, location, list_cols, particion=None, output_dir=None,
+                          consultar=None, detectar=None, usar_grilla=None, dir_trabajo=None,
+                          detector="LevelShift", min_sep=300):
+    """
+    Consulta, limpieza, normalización y detección del rango partición por partición.
+
+    Args:
+        particion (str): 'MS' (meses), 'D' (días) o un tamaño fijo; por defecto
+            PARTICION de config.
+        output_dir (str): Si se indica, guarda las series, el resumen y los eventos
+            de cada detector.
+        consultar (callable): consultar(inicio, fin, location) -> DataFrame combinado;
+            por defecto consultar_datos_influx.
+        detectar (callable): detectar(df_extendido) -> {nombre: etiquetas con índice
+            de tiempo}; por defecto solo `detector`, del registro de detectores.
+        usar_grilla (bool): Remuestrea a la grilla regular; por defecto USE_GRILLA.
+        dir_trabajo (str): Directorio para las particiones limpias; por defecto uno
+            temporal dentro de PARTICION_DIR que se borra al terminar.
+        detector (str): Detector cuyas series se devuelven. Si `detectar` devuelve otros
+            detectores y no este, se lanza ValueError; si ninguna partición llega a la
+            detección, las series vuelven vacías.
+
+    Returns:
+        tuple: (df_st_anom, df_st_norm, df_resumen_anomalias, escalador, stats_limpieza),
+        o None si el rango no trajo datos.
+    """
+    particion = particion or PARTICION
+    consultar = consultar or (lambda ini, fin, loc: consultar_datos_influx(ini, fin, loc))
+    # Sin detectar propio solo se corre el detector cuyas series se devuelven
+    detectar = detectar or functools.partial(detectar_adtk, nombres=(detector,))
+    usar_grilla = USE_GRILLA if usar_grilla is None else usar_grilla
+
+    particiones = planificar_particiones(fecha_inicio, fecha_fin, particion)
+    logger.info(f"Ejecución particionada: {len(particiones)} particiones ({particion}), "
+                f"solape {SOLAPE_ANTES} filas antes y {SOLAPE_DESPUES} después")
+
+    temporal = dir_trabajo is None
+    if temporal:
+        os.makedirs(PARTICION_DIR, exist_ok=True)
+        dir_trabajo = tempfile.mkdtemp(dir=PARTICION_DIR)
+    else:
+        os.makedirs(dir_trabajo, exist_ok=True)
+    try:
+        archivos, stats, escalador = _primera_pasada(particiones, location, consultar, usar_grilla, dir_trabajo)
+        if not archivos:
+            logger.error("La ejecución particionada no trajo datos")
+            return None
+        salidas, outliers = _segunda_pasada(archivos, stats, escalador, list_cols, detectar, min_sep)
+    finally:
+        if temporal:
+            shutil.rmtree(dir_trabajo, ignore_errors=True)
+
+    stats.outliers = {c: outliers[c] for c in stats.media if c in outliers}
+    logger.info(f"Limpieza del rango: {stats.forma_original} -> {stats.forma_final}, "
+                f"outliers {stats.outliers}")
+
+    series = {}
+    for nombre, (anom, norm, eventos) in salidas.items():
+        df_st_anom, df_st_norm = _concatenar(anom, list_cols), _concatenar(norm, list_cols)
+        series[nombre] = (df_st_anom, df_st_norm, resumen_series(df_st_anom, df_st_norm),
+                          pd.concat(eventos) if eventos else pd.DataFrame())
+        logger.info(f"[{nombre}] Series generadas: {len(df_st_anom) // (RANGE + 1)} anómalas, "
+                    f"{df_st_norm.shape[0]} normales")
+
+    if detector not in series:
+        if series:
+            raise ValueError(f"detectar no devolvió etiquetas de '{detector}' "
+                             f"(devolvió: {', '.join(series)})")
+        # Ninguna partición llegó a la detección
+        logger.warning(f"[{detector}] Ninguna partición generó series")
+        vacia_anom, vacia_norm = _concatenar([], list_cols), _concatenar([], list_cols)
+        series[detector] = (vacia_anom, vacia_norm, resumen_series(vacia_anom, vacia_norm), pd.DataFrame())
+
+    df_st_anom, df_st_norm, df_resumen, _ = series[detector]
+    if output_dir:
+        guardar_artefacto(df_st_anom, f"serie_anomala_{detector}", output_dir)
+        guardar_artefacto(df_st_norm, f"serie_normal_{detector}", output_dir)
+        guardar_artefacto(df_resumen, f"resumen_anomalias_{detector}", output_dir)
+        for nombre, (_, _, _, eventos) in series.items():
+            guardar_artefacto(eventos.reset_index(), f"eventos_{nombre}", output_dir)
+    return df_st_anom, df_st_norm, df_resumen, escalador, stats
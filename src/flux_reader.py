@@ -0,0 +1,90 @@
+# src/flux_reader.py
+
+"""
+Lector en streaming de resultados Flux (InfluxDB 2.7).
+Decodifica el CSV anotado que devuelve query_raw directamente a arrays tipados
+(timestamps int64 en ns y valores float32, o el tipo que indique el esquema),
+descartando las columnas meta (_start, _stop, result, table, tags). Produce DataFrames por bloques de tamaño
+acotado en lugar de armar el DataFrame genérico de query_data_frame.
+"""
+
+import csv
+
+import numpy as np
+import pandas as pd
+
+TAMANO_BLOQUE = 100_000
+
+
+def leer_csv_flux(lineas, campos, tamano_bloque=TAMANO_BLOQUE, dtype=np.float32):
+    """
+    Decodifica líneas del CSV de Flux (ya pivotado por _time) en bloques.
+
+    Args:
+        lineas (iterable): Líneas de texto del CSV anotado.
+        campos (list): Columnas de valores a conservar; las que no vengan quedan en NaN.
+        tamano_bloque (int): Filas máximas por bloque.
+        dtype: Tipo de los arrays de valores, o función campo -> tipo (schema.dtype_de).
+
+    Yields:
+        pd.DataFrame: Bloques con 'time' (datetime64[ns], UTC sin zona) y una columna por campo.
+    """
+    i_time = None
+    i_campos = None
+    tiempos, valores, n = _nuevo_bloque(campos, tamano_bloque, dtype)
+
+    for fila in csv.reader(lineas):
+        # Separador entre tablas o anotaciones (#datatype, #group, #default)
+        if not fila or not any(fila) or fila[0].startswith('#'):
+            continue
+        if '_time' in fila and 'result' in fila:
+            i_time = fila.index('_time')
+            i_campos = [fila.index(c) if c in fila else None for c in campos]
+            continue
+        if i_time is None:
+            continue
+
+        # RFC3339 sin la 'Z' final: numpy lo convierte en bloque a datetime64
+        tiempos[n] = fila[i_time][:-1]
+        for j, i in enumerate(i_campos):
+            if i is not None and fila[i] != '':
+                valores[j][n] = float(fila[i])
+        n += 1
+
+        if n == tamano_bloque:
+            yield _armar_bloque(tiempos, valores, campos, n)
+            tiempos, valores, n = _nuevo_bloque(campos, tamano_bloque, dtype)
+
+    if n:
+        yield _armar_bloque(tiempos, valores, campos, n)
+
+
+def tipo_de(dtype, campo):
+    """Resuelve el tipo de un campo: dtype fijo o función campo -> tipo."""
+    if callable(dtype) and not isinstance(dtype, (type, np.dtype)):
+        return dtype(campo)
+    return dtype
+
+
+def _nuevo_bloque(campos, tamano_bloque, dtype):
+    tiempos = np.empty(tamano_bloque, dtype='U35')
+    valores = [np.full(tamano_bloque, np.nan, dtype=tipo_de(dtype, c)) for c in campos]
+    return tiempos, valores, 0
+
+
+def _armar_bloque(tiempos, valores, campos, n):
+    epoch_ns = tiempos[:n].astype('datetime64[ns]').view(np.int64)
+    columnas = {'time': epoch_ns.view('datetime64[ns]')}
+    for campo, arr in zip(campos, valores):
+        columnas[campo] = arr[:n]
+    return pd.DataFrame(columnas, copy=False)
+
+
+def concatenar_bloques(bloques):
+    """Une un iterador de bloques en un único DataFrame (vacío si no hubo filas)."""
+    bloques = list(bloques)
+    if not bloques:
+        return pd.DataFrame()
+    if len(bloques) == 1:
+        return bloques[0]
+    return pd.concat(bloques, ignore_index=True)
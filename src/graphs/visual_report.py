@@ -19,6 +19,7 @@ from config import (
     SHOW_GRAPHS,
     SAVE_OUTPUTS,
     IMAGES_DIR,
+    RESOLUCION_GRAFICOS,
 )
 
 #imp de librerías externas 
@@ -27,18 +28,30 @@ import matplotlib.pyplot as plt
 from adtk.visualization import plot
 import pandas as pd
 from utils.logger import logger
+from storage import leer_artefacto
 import matplotlib.pyplot as plt
 
-# 🔹 Carga de datos limpios
-clean_path = os.path.join("data", "raw", "df_clean.csv")
-df_clean = pd.read_csv(clean_path, parse_dates=['time'])
-print("Datos limpios cargados:")
-print(df_clean.head())
-print(df_clean.tail())
+from query_engine import consultar_datos_influx
+from data_processing.data_cleaning import preprocess_data
+from utils.utils import hora_local_a_utc
 
 # 🔎 Definí el rango que querés estudiar
 fecha_inicio = '2024-02-01T00:00:00'
 fecha_fin = '2024-02-29T23:00:00'
+location = "MEDIA"
+
+# 🔹 Carga de datos: agregados en el servidor o limpios a resolución original
+if RESOLUCION_GRAFICOS:
+    logger.info(f"Consultando series agregadas a {RESOLUCION_GRAFICOS} para los gráficos...")
+    df = consultar_datos_influx(hora_local_a_utc(fecha_inicio), hora_local_a_utc(fecha_fin), location,
+                                resolucion=RESOLUCION_GRAFICOS)
+    df_clean = preprocess_data(df, silenciar_logs=True)
+else:
+    df_clean = leer_artefacto("df_clean", os.path.join("data", "raw"),
+                              desde=fecha_inicio, hasta=fecha_fin)
+print("Datos limpios cargados:")
+print(df_clean.head())
+print(df_clean.tail())
 
 # 🔹 Filtrar el DataFrame
 df_zoom = filtrar_por_rango_fecha(df_clean, fecha_inicio, fecha_fin)
@@ -0,0 +1,56 @@
+# src/influxql_reader.py
+
+"""
+Lector por bloques de respuestas InfluxQL (InfluxDB 1.8).
+Consulta con respuestas chunked y timestamps epoch en ns, y arma arrays columnares
+(int64 para el tiempo, float para los valores) a partir de cada chunk JSON, sin
+crear un dict por punto ni strings RFC3339 que luego haya que volver a parsear.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from flux_reader import tipo_de
+
+CHUNK_SIZE = 50_000
+
+
+def leer_json_influxql(lineas, dtype=np.float32):
+    """
+    Decodifica las líneas JSON de una respuesta chunked de InfluxDB 1.8.
+
+    Args:
+        lineas (iterable): Líneas (str o bytes), una por chunk.
+        dtype: Tipo de los arrays de valores, o función campo -> tipo (schema.dtype_de).
+
+    Yields:
+        pd.DataFrame: Un bloque por serie y chunk, con 'time' (datetime64[ns], UTC sin zona)
+        y una columna por campo.
+    """
+    for linea in lineas:
+        if not linea.strip():
+            continue
+        chunk = json.loads(linea)
+        if 'error' in chunk:
+            raise RuntimeError(f"InfluxDB 1.8: {chunk['error']}")
+
+        for resultado in chunk.get('results', []):
+            if 'error' in resultado:
+                raise RuntimeError(f"InfluxDB 1.8: {resultado['error']}")
+            for serie in resultado.get('series', []):
+                valores = serie.get('values') or []
+                if not valores:
+                    continue
+                columnas = serie['columns']
+                n = len(valores)
+
+                epoch_ns = np.fromiter((v[0] for v in valores), dtype=np.int64, count=n)
+                # None -> NaN al convertir a float
+                bloque = np.array([v[1:] for v in valores], dtype=np.float64)
+
+                datos = {'time': epoch_ns.view('datetime64[ns]')}
+                for j, campo in enumerate(columnas[1:]):
+                    datos[campo] = bloque[:, j].astype(tipo_de(dtype, campo))
+                yield pd.DataFrame(datos, copy=False)
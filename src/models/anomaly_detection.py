@@ -21,12 +21,28 @@ import logging
 import matplotlib.patches as Patches
 import calendar
 from query_engine import busqueda_influx, merge_data
+from db_connector import obtener_conector
 from data_processing.data_cleaning import preprocess_data, normalize_all_numeric
 from sklearn.metrics import mean_absolute_error
+from storage import guardar_artefacto
+from models.eventos import segmentar_eventos, inicios_por_separacion, marcas_anomalas, tiempos_ns
+from data_processing.ventanas import posiciones_en, mascara_exclusion, extraer_ventanas, estadisticas_columnas
+from models.detectores import DetectorCambioNivel, DetectorCambioVolatilidad, DetectorAutoregresion
+from models.registro_detectores import registrar_detector, crear_detector, correr_detectores
+from config import DETECTORES_NATIVOS, SELECCION_DETECTOR
 
 #from tkat import TKAT
 RANGE = 300
 
+# Parámetros de los detectores ADTK (también definen el solape entre particiones)
+VENTANA_LEVELSHIFT = 40
+VENTANA_VOLATILIDAD = 200
+C_LEVELSHIFT = 10
+C_VOLATILIDAD = 12.0
+AR_N_STEPS = 20
+AR_STEP_SIZE = 4
+C_AUTOREG = 11.0
+
 # Logger local para este módulo
 logger = logging.getLogger("GenRodApp")
 
@@ -45,48 +61,68 @@ def crear_serie(df):
     return validate_series(s)
 
 
-def correr_pruebas(df, serie):
-    """
-    Ejecuta y devuelve los resultados de los 3 métodos ADTK
-    """
-    logger.info("Corriendo métodos de detección de anomalías (ADTK)...")
+def detector_levelshift(ventana=VENTANA_LEVELSHIFT, c=C_LEVELSHIFT, lado='both', nativo=DETECTORES_NATIVOS):
+    # Los detectores nativos dan las mismas marcas que los de ADTK
+    if nativo:
+        return DetectorCambioNivel(ventana, c=c, lado=lado)
+    return LevelShiftAD(c=c, side=lado, window=ventana)
 
-    logger.info("Aplicando LevelShiftAD...")
-    modela = LevelShiftAD(c=10, side='both', window=40)
-    r = modela.fit_detect(serie)
+def detector_volatilidad(ventana=VENTANA_VOLATILIDAD, c=C_VOLATILIDAD, lado='both', nativo=DETECTORES_NATIVOS):
+    if nativo:
+        return DetectorCambioVolatilidad(ventana, c=c, lado=lado)
+    return VolatilityShiftAD(c=c, side=lado, window=ventana)
 
-    logger.info("Aplicando VolatilityShiftAD...")
-    modelb = VolatilityShiftAD(c=12.0, side='both', window=200)
-    k = modelb.fit_detect(serie)
+def detector_autoregresion(n_pasos=AR_N_STEPS, paso=AR_STEP_SIZE, c=C_AUTOREG, lado='both',
+                           nativo=DETECTORES_NATIVOS, recursivo=False):
+    if nativo:
+        return DetectorAutoregresion(n_pasos, paso, c=c, lado=lado, recursivo=recursivo)
+    return AutoregressionAD(n_steps=n_pasos, step_size=paso, c=c, side=lado)
 
-    logger.info("Aplicando AutoregressionAD...")
-    modelc = AutoregressionAD(n_steps=20, step_size=4, c=11.0)
-    p = modelc.fit_detect(serie)
+registrar_detector("LevelShift", detector_levelshift)
+registrar_detector("VolatilityShift", detector_volatilidad)
+registrar_detector("AutoReg", detector_autoregresion)
 
-    return r, k, p
+
+def correr_pruebas(df, serie):
+    """
+    Ejecuta y devuelve los resultados de los 3 detectores (LevelShift, VolatilityShift
+    y AutoReg), en paralelo si corresponde (ver correr_detectores).
+    """
+    logger.info("Corriendo métodos de detección de anomalías...")
+    res = correr_detectores(serie, ["LevelShift", "VolatilityShift", "AutoReg"])
+    return res["LevelShift"], res["VolatilityShift"], res["AutoReg"]
+
+def crear_detectores_continuos(df_norm, columnas):
+    """
+    LevelShift, VolatilityShift y AutoReg nativos ajustados sobre df_norm (con 'time'),
+    con el estado al final de la serie para seguirla con update en la ejecución
+    continua; AutoReg se reajusta en línea con mínimos cuadrados recursivos.
+    """
+    serie = df_norm.set_index('time')[columnas]
+    return {
+        "LevelShift": crear_detector("LevelShift", nativo=True).fit(serie),
+        "VolatilityShift": crear_detector("VolatilityShift", nativo=True).fit(serie),
+        "AutoReg": crear_detector("AutoReg", nativo=True, recursivo=True).fit(serie),
+    }
 
 def filtrar_eventos_unicos(df_labels, min_sep=300, sample_rate_sec=10):
     """
     Devuelve un DataFrame con solo un punto por evento, filtrando anomalías consecutivas.
     - min_sep: número mínimo de muestras de separación entre eventos
     - sample_rate_sec: frecuencia de muestreo en segundos (default 10s)
+
+    Devuelve la fila de etiquetas del inicio de cada evento; para inicio, fin, duración,
+    pico y detectores de cada evento usar segmentar_eventos.
     """
-    
     df_labels = df_labels.copy()
     df_labels.index = pd.to_datetime(df_labels.index)
-    df_labels = df_labels[df_labels.any(axis=1)]  # solo anomalías
-    #df_labels = df_labels.sort_index()
-    
-    eventos = []
-    last_time = None
-
-    for idx in df_labels.index:
-        if last_time is None or (idx - last_time).total_seconds() > (min_sep * sample_rate_sec):
-            eventos.append(idx)
-            last_time = idx
+    df_labels = df_labels[marcas_anomalas(df_labels.to_numpy()).any(axis=1)]  # solo anomalías
+    if not df_labels.index.is_monotonic_increasing:
+        df_labels = df_labels.sort_index(kind="stable")
 
-    df_eventos = df_labels.loc[eventos]
-    return df_eventos
+    separacion = pd.Timedelta(seconds=min_sep * sample_rate_sec).value
+    inicios = inicios_por_separacion(tiempos_ns(df_labels.index), separacion)
+    return df_labels.iloc[inicios]
 
 def generate_ts_anomalies2(df_labels, df_datos, df_dst, df_dst2):
     """
@@ -174,89 +210,79 @@ def generate_ts_anomalies2(df_labels, df_datos, df_dst, df_dst2):
     df_res1 = df_res1.drop(columns=columns_to_drop)     
     return df_dst, df_dst2, df_res1, cont_anom
 
+def resumen_series(df_dst, df_dst2):
+    """
+    Media y desvío por variable de las series anómalas (df_dst) y normales (df_dst2),
+    en una fila (sin las columnas de PowA). Columnas: primero las normales y después
+    las anómalas, cada grupo de la última variable a la primera (Desv_, Media_).
+    """
+    datos = {}
+    for sufijo, df in (("n", df_dst2), ("an", df_dst)):
+        columnas = [c for c in df.columns if c != 'time']
+        if not columnas:
+            continue
+        bloque = df[columnas].to_numpy(dtype=np.float64)
+        medias, desvios = estadisticas_columnas(bloque[None])
+        for c, m, d in reversed(list(zip(columnas, medias, desvios))):
+            datos['Desv_' + sufijo + '_' + c] = [d]
+            datos['Media_' + sufijo + '_' + c] = [m]
+    df_res1 = pd.DataFrame(datos, index=[1])
+    columns_to_drop = [col for col in df_res1.columns if "PowA" in col]
+    return df_res1.drop(columns=columns_to_drop)
+
+
+def _agregar_ventanas(df_dst, df_datos, fines, list_cols):
+    """
+    Suma a df_dst las ventanas de RANGE + 1 filas de list_cols que terminan en `fines`.
+    Las columnas del mismo tipo se extraen juntas como (ventanas, RANGE + 1, columnas).
+    """
+    if len(fines) == 0:
+        return df_dst
+    grupos = {}
+    for c in list_cols:
+        grupos.setdefault(df_datos[c].dtype, []).append(c)
+    columnas = {}
+    for cols in grupos.values():
+        ventanas = extraer_ventanas(df_datos[cols].to_numpy(), fines, RANGE + 1)
+        columnas.update(zip(cols, ventanas.reshape(-1, len(cols)).T))
+    bloque = pd.DataFrame({c: columnas[c] for c in list_cols})
+    if df_dst.empty and list(df_dst.columns) == list(bloque.columns):
+        return bloque
+    return pd.concat([df_dst, bloque], ignore_index=True)
+
+
 def generate_ts_anomalies(df_labels, df_datos, df_dst, df_dst2, list_cols):
     """
     Genera series de tiempo con contexto para anómalos y normales (CÓDIGO)
-    """    
-    RANGE = 300
-    cc = 0
 
+    Cada serie son las RANGE + 1 filas que terminan en la muestra. Anómalas: una por
+    etiqueta cuyo tiempo está en df_datos con al menos RANGE filas previas. Normales:
+    las primeras filas desde RANGE + 1 a RANGE * 10 s o más de toda etiqueta, tantas
+    como anomalías (al menos una). Las posiciones salen de searchsorted y las ventanas
+    se copian todas juntas.
+
+    Returns:
+        tuple: (df_dst, df_dst2, resumen, cantidad de anomalías).
+    """
     # Resetear índice para evitar errores por datetime
     df_datos = df_datos.reset_index(drop=True)
     df_datos['time'] = pd.to_datetime(df_datos['time'])
-
-    # Convertir labels al índice numérico
     label_times = pd.to_datetime(df_labels.index)
-    df_times = pd.to_datetime(df_datos['time'])
 
-    # Anomalías
-    for t in label_times:
-        if t not in df_times.values:
-            continue
-        pos = df_times[df_times == t].index[0]
-        if pos - RANGE < 0:
-            continue
+    # Anomalías: primera fila con el tiempo de cada etiqueta
+    pos = posiciones_en(df_datos['time'], label_times)
+    fines_anom = pos[pos >= RANGE]
+    cc = len(fines_anom)
 
-        cc += 1
-        ventana = df_datos.iloc[pos - RANGE:pos + 1][list_cols]
-        df_dst = pd.concat([df_dst, ventana], ignore_index=True)
+    # === NORMALES === (a menos de RANGE * 10 s de alguna anomalía se descartan)
+    candidatas = np.arange(RANGE + 1, len(df_datos))
+    cerca = mascara_exclusion(df_datos['time'].iloc[RANGE + 1:], label_times, pd.Timedelta(seconds=RANGE * 10))
+    fines_norm = candidatas[~cerca][:max(cc, 1)]
 
-    # === NORMALES ===
-    cx = 0
-    anom_times = list(label_times)
-
-    for i in range(RANGE + 1, len(df_datos)):
-        t = df_datos.loc[i, 'time']
-        
-        # Si está muy cerca de alguna anomalía → descartamos
-        if any(abs((t - ta).total_seconds()) < RANGE * 10 for ta in anom_times):
-            continue
-
-        if i - RANGE < 0:
-            continue
-
-        ventana = df_datos.iloc[i - RANGE:i + 1][list_cols]
-        df_dst2 = pd.concat([df_dst2, ventana], ignore_index=True)
-        cx += 1
-
-        if cx >= cc:
-            break
-
-    df_dst.set_index('time')
-    df_dst2.set_index('time')
-    medias_an = 0 
-    desviaciones_an = 0
-    medias_n = 0
-    desviaciones_n = 0
-    df_res1 = pd.DataFrame()
-    for column in df_dst:
-        _str = column
-        if(_str != 'time'):
-            _m = 'Media_an_'+_str
-            _d = 'Desv_an_'+_str
-            medias_an=df_dst[column].mean()
-            desviaciones_an=df_dst[column].std()
-            df_res1.insert(0,_m,0)
-            df_res1.insert(0,_d,0)
-            df_res1.at[1,_m] = medias_an 
-            df_res1.at[1,_d] = desviaciones_an
-            #df_res1.assign(_m=medias_an,_d=desviaciones_an)
-           
-    for column in df_dst2:
-        _str = column
-        if(_str != 'time'):
-            _m = 'Media_n_'+_str
-            _d = 'Desv_n_'+_str
-            medias_n=df_dst2[column].mean()
-            desviaciones_n=df_dst2[column].std()
-            df_res1.insert(0,_m,0)
-            df_res1.insert(0,_d,0)
-            df_res1.at[1,_m] = medias_n 
-            df_res1.at[1,_d] = desviaciones_n
-            #df_res1.assign(_str=medias_n,_str=desviaciones_n) 
-    columns_to_drop = [col for col in df_res1.columns if "PowA" in col]
-    df_res1 = df_res1.drop(columns=columns_to_drop)     
-    return df_dst, df_dst2, df_res1,cc
+    df_dst = _agregar_ventanas(df_dst, df_datos, fines_anom, list_cols)
+    df_dst2 = _agregar_ventanas(df_dst2, df_datos, fines_norm, list_cols)
+    df_res1 = resumen_series(df_dst, df_dst2)
+    return df_dst, df_dst2, df_res1, cc
 
 def metodo_propio(valores,df):
     ###Anomalias por metodo propio########################
@@ -282,49 +308,44 @@ def metodo_propio(valores,df):
     return anomalies_filter
 
 ######## Sección 5 del main ########
-def deteccion_anomalias_pipeline(df_norm, list_cols, output_dir, save_csv=True):
+def deteccion_anomalias_pipeline(df_norm, list_cols, output_dir, save_csv=True, detector=SELECCION_DETECTOR):
+    """
+    Corre los detectores y genera las series de contexto del `detector` seleccionado.
+    Solo se calculan ese detector y, si se guardan los artefactos, AutoReg
+    (anomalias_AutoReg); si son varios corren en paralelo (correr_detectores).
+    """
     logger.info("===== INICIANDO DETECCIÓN DE ANOMALÍAS =====")
 
     df_prueba = df_norm[list_cols]
     df_p = crear_serie(df_prueba)
-    res_levelshift, __, res_autoreg = correr_pruebas(df_prueba, df_p)
-
-    detectores = {
-        "LevelShift": res_levelshift,
-        "AutoReg": res_autoreg
-    }
-
-    series_generadas = {}
-
-    for nombre, resultado in detectores.items():
-        logger.info(f"Procesando detector: {nombre}...")
-        try:
-            resultado_filtrado = filtrar_eventos_unicos(resultado, min_sep=300, sample_rate_sec=10)
-        except Exception as e:
-            logger.warning(f"Falló el filtrado de eventos únicos: {e}")
-            resultado_filtrado = resultado.copy()
-
-        df_resultado_anom = pd.DataFrame(columns=list_cols)
-        df_resultado_norm = pd.DataFrame(columns=list_cols)
-
-        try:
-            df_st_anom, df_st_norm, df_resumen_anomalias, n_anomalias = generate_ts_anomalies(
-                resultado_filtrado, df_prueba.copy(), df_resultado_anom, df_resultado_norm, list_cols
-            )
-            series_generadas[nombre] = (df_st_anom, df_st_norm, df_resumen_anomalias)
-            logger.info(f"[{nombre}] Series generadas: {n_anomalias} anómalas, {df_st_norm.shape[0]} normales")
-        except Exception as e:
-            logger.warning(f"[{nombre}] Error generando series: {e}")
-
-    # Selección
-    SELECCION_DETECTOR = "LevelShift"
-    df_st_anom, df_st_norm, df_resumen_anomalias = series_generadas[SELECCION_DETECTOR]
+    detectores = correr_detectores(df_p, [detector] + (["AutoReg"] if save_csv else []))
+    resultado = detectores[detector]
+
+    logger.info(f"Procesando detector: {detector}...")
+    try:
+        # Un evento por grupo de anomalías; las series de contexto terminan en su inicio
+        eventos = segmentar_eventos(resultado, min_sep=300, sample_rate_sec=10)
+        resultado_filtrado = eventos.set_index('inicio')
+        logger.info(f"[{detector}] {len(eventos)} eventos, duración media {eventos['duracion_seg'].mean():.0f} s")
+    except Exception as e:
+        logger.warning(f"Falló el filtrado de eventos únicos: {e}")
+        resultado_filtrado = resultado.copy()
+
+    df_resultado_anom = pd.DataFrame(columns=list_cols)
+    df_resultado_norm = pd.DataFrame(columns=list_cols)
+
+    df_st_anom, df_st_norm, df_resumen_anomalias, n_anomalias = generate_ts_anomalies(
+        resultado_filtrado, df_prueba.copy(), df_resultado_anom, df_resultado_norm, list_cols
+    )
+    logger.info(f"[{detector}] Series generadas: {n_anomalias} anómalas, {df_st_norm.shape[0]} normales")
 
     if save_csv:
-        df_st_anom.to_csv(os.path.join(output_dir, "serie_anomala_AutoReg.csv"), index=True)
-        df_st_norm.to_csv(os.path.join(output_dir, "serie_normal_AutoReg.csv"), index=True)
-        df_resumen_anomalias.to_csv(os.path.join(output_dir, "resumen_anomalias_AutoReg.csv"), index=False)
-        res_autoreg.to_csv(os.path.join(output_dir, "anomalias_AutoReg.csv"), index=True)
+        guardar_artefacto(df_st_anom, "serie_anomala_AutoReg", output_dir)
+        guardar_artefacto(df_st_norm, "serie_normal_AutoReg", output_dir)
+        guardar_artefacto(df_resumen_anomalias, "resumen_anomalias_AutoReg", output_dir)
+        guardar_artefacto(detectores["AutoReg"].reset_index(), "anomalias_AutoReg", output_dir)
+        # Eventos de los detectores calculados juntos, con los que dispararon en cada uno
+        guardar_artefacto(segmentar_eventos(detectores, min_sep=300, sample_rate_sec=10), "eventos", output_dir)
 
     logger.info("===== DETECCIÓN COMPLETADA =====")
     return df_st_anom, df_st_norm, df_resumen_anomalias
@@ -379,7 +400,7 @@ def obtener_datos_mes(anio: int, mes: int, location: str) -> pd.DataFrame:
 def procesar_anomalias_mes(df_mes: pd.DataFrame, columnas_objetivo: list) -> tuple:
     df_objetivo = df_mes[columnas_objetivo]
     df_serie = crear_serie(df_objetivo)
-    _, _, predicciones = correr_pruebas(df_objetivo, df_serie)
+    predicciones = correr_detectores(df_serie, ["AutoReg"])["AutoReg"]
     eventos_filtrados = filtrar_eventos_unicos(predicciones, min_sep=50, sample_rate_sec=10)
 
     df_anom = pd.DataFrame(columns=columnas_objetivo)
@@ -464,5 +485,6 @@ def analisis_anomalias(df_inicial: pd.DataFrame, columnas_objetivo: list, pred_n
 
     graficar_resultados(df_estudio)
 
+    logger.info(f"Conexiones InfluxDB: {obtener_conector().estadisticas()}")
     logger.info("=== FIN DEL ANÁLISIS DE ANOMALÍAS ===")
     return df_estudio
\ No newline at end of file
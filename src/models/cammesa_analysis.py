@@ -4,7 +4,7 @@ src/models/cammesa_analysis.py
 
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import numpy as np
 import pandas as pd
@@ -32,39 +32,57 @@ def asociar_datos_energia(df_cam, mes):
     df_res = df_cam[(df_cam['Fecha'].dt.month < mes) & (df_cam['Fecha'].dt.year == 2024)]
     return df_res
 
-# Carga de datos limpios
-clean_path = os.path.join("data", "raw", "df_clean.csv")
-df_clean1 = pd.read_csv(clean_path, parse_dates=['time'])
+def cargar_potencia_l1(fecha_inicio_arg, fecha_fin_arg, location, resolucion=None):
+    """
+    Potencia activa L1 para comparar con CAMMESA. Con resolución se consulta agregada
+    en el servidor (ej. '15m'); sin ella se lee df_clean a resolución original (solo
+    las dos columnas y el rango pedido).
+    """
+    if resolucion:
+        from query_engine import consultar_datos_influx
+        from utils.utils import hora_local_a_utc
+        df = consultar_datos_influx(hora_local_a_utc(fecha_inicio_arg), hora_local_a_utc(fecha_fin_arg),
+                                    location, resolucion=resolucion)
+    else:
+        from storage import leer_artefacto
+        df = leer_artefacto("df_clean", os.path.join("data", "raw"), columnas=['time', 'PowA_L1_Ins'],
+                            desde=fecha_inicio_arg, hasta=fecha_fin_arg)
+    return df[['time', 'PowA_L1_Ins']].set_index('time')
 
-# Selección de columnas necesarias
-df_f = df_clean1[['time', 'PowA_L1_Ins']].copy()
-df_f = df_f.set_index('time')
+def graficar_cammesa_vs_potencia(df_f, mes=12):
+    """Grafica la demanda CAMMESA por sector junto a la potencia activa L1."""
 
-# Datos CAMMESA
-dfc = leer_cammessa_csv()
-dfr = asociar_datos_energia(dfc, 12)
-dfr = dfr.set_index('Fecha')
+    # Datos CAMMESA
+    dfc = leer_cammessa_csv()
+    dfr = asociar_datos_energia(dfc, mes)
+    dfr = dfr.set_index('Fecha')
 
-# Crear figura con subplots alineados
-fig, axes = plt.subplots(2, 1, figsize=(16, 8), sharex=True)
+    # Crear figura con subplots alineados
+    fig, axes = plt.subplots(2, 1, figsize=(16, 8), sharex=True)
 
-# Gráfico CAMMESA
-dfr.plot(ax=axes[0])
-axes[0].set_title('Demanda eléctrica por sector - CAMMESA (2024)', fontsize=13)
-axes[0].set_ylabel('Demanda [MW]')
-axes[0].legend(loc='upper right')
-axes[0].grid(True)
+    # Gráfico CAMMESA
+    dfr.plot(ax=axes[0])
+    axes[0].set_title('Demanda eléctrica por sector - CAMMESA (2024)', fontsize=13)
+    axes[0].set_ylabel('Demanda [MW]')
+    axes[0].legend(loc='upper right')
+    axes[0].grid(True)
 
-# Gráfico de potencia L1
-df_f.plot(ax=axes[1], color='tab:blue', legend=True)
-axes[1].set_title('Potencia Activa Instantánea Fase L1 - Industria', fontsize=13)
-axes[1].set_ylabel('Potencia [kW]')
-axes[1].set_xlabel('Fecha')
-axes[1].grid(True)
+    # Gráfico de potencia L1
+    df_f.plot(ax=axes[1], color='tab:blue', legend=True)
+    axes[1].set_title('Potencia Activa Instantánea Fase L1 - Industria', fontsize=13)
+    axes[1].set_ylabel('Potencia [kW]')
+    axes[1].set_xlabel('Fecha')
+    axes[1].grid(True)
 
-# Mejorar presentación
-plt.tight_layout()
-plt.xticks(rotation=45)
-plt.subplots_adjust(hspace=0.3)
+    # Mejorar presentación
+    plt.tight_layout()
+    plt.xticks(rotation=45)
+    plt.subplots_adjust(hspace=0.3)
+    return fig
 
-plt.show()
+if __name__ == "__main__":
+    from config import RESOLUCION_GRAFICOS
+
+    df_f = cargar_potencia_l1('2024-01-01T00:00:00', '2024-12-31T23:59:00', "MEDIA", RESOLUCION_GRAFICOS)
+    graficar_cammesa_vs_potencia(df_f)
+    plt.show()
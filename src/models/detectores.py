@@ -0,0 +1,550 @@
+# detectores.py
+# src/models/detectores.py
+
+"""
+LevelShiftAD, VolatilityShiftAD y AutoregressionAD de ADTK en NumPy, para todas las
+columnas a la vez (DetectorAutoregresion se describe en su clase).
+
+Los dos primeros comparan una estadística de las `ventana` muestras anteriores a cada punto con
+la de las `ventana` muestras desde el punto (las dos ventanas de DoubleRollingAggregate
+con center=True):
+
+    DetectorCambioNivel        |mediana_der - mediana_izq|
+    DetectorCambioVolatilidad  |desvio_der - desvio_izq| / desvio_izq
+
+y marcan el punto si esa diferencia supera q3 + c * (q3 - q1), con q1 y q3 los
+cuartiles de la diferencia en los datos de ajuste; con lado 'positive' / 'negative' la
+estadística además tiene que subir / bajar. Los primeros `ventana` puntos y los
+últimos `ventana - 1` quedan sin decisión (NaN), como en ADTK.
+
+Dos formas de uso:
+    fit / detect / fit_detect  En lote, sobre un array (filas, columnas) o un DataFrame
+                               con índice de tiempo (devuelve True/False/NaN como ADTK).
+    update(muestra)            Una muestra por llamada: ring buffer con las últimas
+                               2 * ventana muestras, mediana móvil con listas ordenadas
+                               (bisect) y desvío móvil con sumas que entran y salen.
+                               Devuelve la decisión del punto de hace `retardo` muestras
+                               (la ventana derecha recién se completa), con los umbrales
+                               del último fit.
+
+fit deja el estado de streaming al final de la serie de ajuste, así update la continúa
+sin esperar a llenar las ventanas. Reproducir la misma serie con update después de
+reiniciar() da las mismas marcas que detect.
+"""
+
+import warnings
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from data_processing.rolling import estadisticas_moviles
+
+LADOS = ("both", "positive", "negative")
+BLOQUE = 65_536
+# Filas por bloque de la QR de la autoregresión (bloques chicos quedan en caché)
+BLOQUE_QR = 4_096
+# Cada cuántas muestras se recalculan las sumas móviles desde el buffer (deriva de redondeo)
+RESINCRONIZAR = 10_000
+
+
+def _medianas_moviles(x, ventana):
+    """Mediana de las `ventana` muestras que terminan en cada fila (NaN si falta alguna)."""
+    r = np.full(x.shape, np.nan)
+    for a in range(ventana - 1, len(x), BLOQUE):
+        b = min(a + BLOQUE, len(x))
+        vista = sliding_window_view(x[a - ventana + 1:b], ventana, axis=0)  # (b - a, columnas, ventana)
+        r[a:b] = np.median(vista, axis=-1)
+    return r
+
+
+class _MedianaMovil:
+    """Mediana de una ventana que se actualiza muestra a muestra (una lista ordenada por columna)."""
+
+    def __init__(self, columnas, ventana):
+        self.ventana = ventana
+        self.ordenadas = [[] for _ in range(columnas)]
+        self.nulos = np.zeros(columnas, dtype=np.int64)
+
+    def agregar(self, x):
+        for j, v in enumerate(x.tolist()):
+            if v != v:
+                self.nulos[j] += 1
+            else:
+                insort(self.ordenadas[j], v)
+
+    def quitar(self, x):
+        for j, v in enumerate(x.tolist()):
+            if v != v:
+                self.nulos[j] -= 1
+            else:
+                lista = self.ordenadas[j]
+                del lista[bisect_left(lista, v)]
+
+    def recalcular(self, valores):
+        """
+        No hace nada: las listas ordenadas guardan los valores exactos, así que la
+        mediana no acumula error de redondeo que haya que corregir desde el buffer
+        (a diferencia de las sumas de _DesvioMovil).
+        """
+
+    def valor(self):
+        w = self.ventana
+        m = w // 2
+        res = np.full(len(self.ordenadas), np.nan)
+        for j, lista in enumerate(self.ordenadas):
+            if self.nulos[j] == 0 and len(lista) == w:
+                res[j] = lista[m] if w % 2 else (lista[m - 1] + lista[m]) / 2
+        return res
+
+
+class _DesvioMovil:
+    """Desvío (ddof=1) de una ventana con sumas de las muestras desplazadas por una referencia."""
+
+    def __init__(self, columnas, ventana, referencia):
+        self.ventana = ventana
+        self.referencia = referencia
+        self.s1 = np.zeros(columnas)
+        self.s2 = np.zeros(columnas)
+        self.cuenta = np.zeros(columnas, dtype=np.int64)
+
+    def agregar(self, x):
+        d = x - self.referencia
+        validos = ~np.isnan(d)
+        d = np.where(validos, d, 0.0)
+        self.s1 += d
+        self.s2 += d * d
+        self.cuenta += validos
+
+    def quitar(self, x):
+        d = x - self.referencia
+        validos = ~np.isnan(d)
+        d = np.where(validos, d, 0.0)
+        self.s1 -= d
+        self.s2 -= d * d
+        self.cuenta -= validos
+
+    def recalcular(self, valores):
+        """Rehace las sumas con las muestras (ventana, columnas) que están en la ventana."""
+        d = valores - self.referencia
+        validos = ~np.isnan(d)
+        d = np.where(validos, d, 0.0)
+        self.s1 = d.sum(axis=0)
+        self.s2 = (d * d).sum(axis=0)
+        self.cuenta = validos.sum(axis=0)
+
+    def valor(self):
+        w = self.ventana
+        var = np.maximum(self.s2 - self.s1 * self.s1 / w, 0.0) / (w - 1)
+        return np.where(self.cuenta == w, np.sqrt(var), np.nan)
+
+
+class _DetectorIQR(ABC):
+    """
+    Base de los detectores: una diferencia no negativa por punto y columna con su
+    variación con signo, umbral q3 + c * IQR de la diferencia en los datos de ajuste
+    y control de signo según el lado.
+    """
+
+    def __init__(self, c, lado):
+        if lado not in LADOS:
+            raise ValueError(f"Lado inválido: {lado} (opciones: {', '.join(LADOS)})")
+        self.c = c
+        self.lado = lado
+        self.columnas = None
+        self.umbral_ = None
+        self.reiniciar()
+
+    @abstractmethod
+    def fit(self, valores):
+        """Ajusta el detector y el umbral con `valores` y deja el streaming al final."""
+
+    @abstractmethod
+    def update(self, muestra, tiempo=None):
+        """Procesa una muestra; devuelve la decisión de hace `retardo` muestras o None."""
+
+    @abstractmethod
+    def reiniciar(self):
+        """Vacía el estado de streaming (conserva el ajuste y los umbrales)."""
+
+    @abstractmethod
+    def diferencias(self, valores):
+        """(diferencia no negativa, variación con signo), arrays (filas, columnas)."""
+
+    def _matriz(self, valores):
+        if isinstance(valores, pd.Series):
+            valores = valores.to_frame()
+        x = valores.to_numpy(dtype=np.float64) if isinstance(valores, pd.DataFrame) else np.asarray(valores, dtype=np.float64)
+        return x[:, None] if x.ndim == 1 else x
+
+    def _indice_tiempos(self, valores):
+        return valores.index if isinstance(valores, (pd.DataFrame, pd.Series)) else [None] * len(valores)
+
+    def _ajustar_umbral(self, valores, diferencia):
+        if (np.isnan(diferencia).all(axis=0)).any():
+            raise RuntimeError("Valid values are not enough for training.")
+        q1, q3 = np.nanquantile(diferencia, [0.25, 0.75], axis=0)
+        self.umbral_ = q3 + (q3 - q1) * self.c
+        self.columnas = list(valores.columns) if isinstance(valores, pd.DataFrame) else None
+
+    def _marcar(self, diferencia, variacion):
+        """True/False/NaN como el AndAggregator de ADTK (umbral y control de signo)."""
+        nula_d, nula_v = np.isnan(diferencia), np.isnan(variacion)
+        with np.errstate(invalid="ignore"):
+            sobre = diferencia > self.umbral_
+            if self.lado == "positive":
+                signo = variacion > 0
+            elif self.lado == "negative":
+                signo = variacion < 0
+            else:
+                signo = ~nula_v
+        # Los NaN no cuentan para el "todos" pero dejan el resultado en NaN si es True
+        todos = (sobre | nula_d) & (signo | nula_v)
+        return np.where(todos & (nula_d | nula_v), np.nan, todos.astype(np.float64))
+
+    def detect(self, valores):
+        """
+        Marca los puntos de `valores` con los umbrales ajustados.
+
+        Returns:
+            np.ndarray | pd.DataFrame: Con un array, (filas, columnas) con 1.0/0.0/NaN;
+            con un DataFrame, del mismo índice y columnas con True/False/NaN (object),
+            como ADTK.
+        """
+        if self.umbral_ is None:
+            raise RuntimeError("El detector no está ajustado (llamar a fit con datos históricos)")
+        marcas = self._marcar(*self.diferencias(valores))
+        if isinstance(valores, (pd.DataFrame, pd.Series)):
+            columnas = valores.columns if isinstance(valores, pd.DataFrame) else [valores.name]
+            res = pd.DataFrame(marcas == 1, index=valores.index, columns=columnas).astype(object)
+            res[np.isnan(marcas)] = np.nan
+            return res[columnas[0]] if isinstance(valores, pd.Series) else res
+        return marcas
+
+    def fit_detect(self, valores):
+        return self.fit(valores).detect(valores)
+
+    def _muestra(self, muestra):
+        """Array (columnas,) de una muestra de update; de una Series o dict, las columnas del ajuste."""
+        if self.umbral_ is None:
+            raise RuntimeError("El detector no está ajustado (llamar a fit con datos históricos)")
+        if isinstance(muestra, (pd.Series, dict)) and self.columnas is not None:
+            muestra = [muestra[c] for c in self.columnas]
+        return np.asarray(muestra, dtype=np.float64).ravel()
+
+
+class _DetectorCambio(_DetectorIQR):
+    """Base de LevelShift y VolatilityShift: dos ventanas contiguas centradas en el punto."""
+
+    def __init__(self, ventana, c=6.0, lado="both"):
+        if ventana < 2:
+            raise ValueError(f"Ventana inválida: {ventana}")
+        self.ventana = int(ventana)
+        super().__init__(c, lado)
+
+    @property
+    def retardo(self):
+        """Muestras entre la última recibida por update y el punto que decide."""
+        return self.ventana - 1
+
+    # ------------------------------------------------------------------
+    # A definir por cada detector
+    # ------------------------------------------------------------------
+
+    @abstractmethod
+    def _estadisticas_moviles(self, x):
+        """Estadística de la ventana que termina en cada fila de x (filas, columnas)."""
+
+    @abstractmethod
+    def _ventana_movil(self, columnas):
+        """Estado de la estadística para update (_MedianaMovil o _DesvioMovil)."""
+
+    @abstractmethod
+    def _diferencia(self, izq, der):
+        """Diferencia no negativa entre la estadística de la ventana izquierda y la derecha."""
+
+    # ------------------------------------------------------------------
+    # Lote
+    # ------------------------------------------------------------------
+
+    def diferencias(self, valores):
+        """
+        Diferencia entre ventanas y variación con signo (der - izq) en cada punto.
+
+        Returns:
+            tuple: (diferencia, variacion), arrays (filas, columnas).
+        """
+        x = self._matriz(valores)
+        n, w = len(x), self.ventana
+        r = self._estadisticas_moviles(x)
+        izq = np.full(x.shape, np.nan)
+        der = np.full(x.shape, np.nan)
+        izq[1:] = r[:-1]
+        if n >= w:
+            der[:n - w + 1] = r[w - 1:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._diferencia(izq, der), der - izq
+
+    def fit(self, valores):
+        """
+        Ajusta el umbral de cada columna con los cuartiles de la diferencia entre
+        ventanas y deja el estado de streaming al final de `valores`.
+        """
+        self._ajustar_umbral(valores, self.diferencias(valores)[0])
+        self.reiniciar()
+        x = self._matriz(valores)
+        cola = max(len(x) - (2 * self.ventana - 1), 0)
+        self._referencia = np.nanmean(x, axis=0) if len(x) else None
+        for muestra, tiempo in zip(x[cola:], self._indice_tiempos(valores)[cola:]):
+            self._avanzar(muestra, tiempo)
+        return self
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def reiniciar(self):
+        """Vacía el estado de streaming (conserva los umbrales)."""
+        self._buffer = None
+        self._tiempos = None
+        self._n = 0
+        self._izq = self._der = None
+        self._referencia = None
+        self.tiempo_decision = None
+
+    def _avanzar(self, x, tiempo):
+        w = self.ventana
+        if self._buffer is None:
+            k = len(x)
+            self._buffer = np.full((2 * w, k), np.nan)
+            self._tiempos = [None] * (2 * w)
+            if self._referencia is None:
+                self._referencia = np.where(np.isnan(x), 0.0, x)
+            self._izq, self._der = self._ventana_movil(k), self._ventana_movil(k)
+        n, pos = self._n, self._n % (2 * w)
+        if n >= 2 * w:
+            self._izq.quitar(self._buffer[pos])
+        self._buffer[pos] = x
+        self._tiempos[pos] = tiempo
+        self._der.agregar(x)
+        if n >= w:
+            sale = self._buffer[(n - w) % (2 * w)]
+            self._der.quitar(sale)
+            self._izq.agregar(sale)
+        self._n = n + 1
+        if self._n % RESINCRONIZAR == 0 and self._n >= 2 * w:
+            orden = (np.arange(self._n - 2 * w, self._n)) % (2 * w)
+            self._izq.recalcular(self._buffer[orden[:w]])
+            self._der.recalcular(self._buffer[orden[w:]])
+
+    def update(self, muestra, tiempo=None):
+        """
+        Agrega una muestra y decide el punto de hace `retardo` muestras.
+
+        Args:
+            muestra (array | pd.Series | dict): Un valor por columna; con una Series o
+                un dict se toman las columnas del ajuste.
+            tiempo: Tiempo de la muestra (opcional); el del punto decidido queda en
+                tiempo_decision.
+
+        Returns:
+            np.ndarray | None: 1.0/0.0/NaN por columna, o None mientras las ventanas
+            no están completas.
+        """
+        self._avanzar(self._muestra(muestra), tiempo)
+        if self._n < 2 * self.ventana:
+            return None
+        self.tiempo_decision = self._tiempos[(self._n - self.ventana) % (2 * self.ventana)]
+        izq, der = self._izq.valor(), self._der.valor()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._marcar(self._diferencia(izq, der), der - izq)
+
+
+class DetectorCambioNivel(_DetectorCambio):
+    """LevelShiftAD: diferencia absoluta entre las medianas de las dos ventanas."""
+
+    def _estadisticas_moviles(self, x):
+        return _medianas_moviles(x, self.ventana)
+
+    def _ventana_movil(self, columnas):
+        return _MedianaMovil(columnas, self.ventana)
+
+    def _diferencia(self, izq, der):
+        return np.abs(der - izq)
+
+
+class DetectorCambioVolatilidad(_DetectorCambio):
+    """VolatilityShiftAD: diferencia relativa entre los desvíos de las dos ventanas."""
+
+    def _estadisticas_moviles(self, x):
+        return estadisticas_moviles(x, self.ventana, ("desvio",))[self.ventana]["desvio"]
+
+    def _ventana_movil(self, columnas):
+        return _DesvioMovil(columnas, self.ventana, self._referencia)
+
+    def _diferencia(self, izq, der):
+        return np.abs(der - izq) / izq
+
+
+class DetectorAutoregresion(_DetectorIQR):
+    """
+    AutoregressionAD: residuo de la regresión lineal (con ordenada) de cada muestra
+    sobre sus n_pasos valores anteriores separados de a `paso` muestras; marca el
+    punto si |residuo| supera el umbral.
+
+    La matriz de diseño de cada bloque de filas es una vista de sliding_window_view
+    (sin copiar los rezagos) y la regresión de todas las columnas se resuelve junta con
+    una QR por bloques (TSQR): el factor R de los bloques anteriores se apila con el
+    bloque nuevo y se vuelve a factorizar, con memoria acotada por BLOQUE_QR. Las filas con
+    algún NaN en la ventana no entran en la regresión ni tienen residuo.
+
+    Con recursivo=True, update reajusta los coeficientes con mínimos cuadrados
+    recursivos (RLS) a partir del ajuste en lote, con factor de olvido `olvido` (1.0 es
+    el ajuste sobre toda la historia); las muestras marcadas o con NaN no lo actualizan.
+    Los umbrales quedan los del fit.
+    """
+
+    def __init__(self, n_pasos=1, paso=1, c=3.0, lado="both", recursivo=False, olvido=1.0):
+        if n_pasos < 1 or paso < 1:
+            raise ValueError(f"Rezagos inválidos: n_pasos={n_pasos}, paso={paso}")
+        if not 0 < olvido <= 1:
+            raise ValueError(f"Factor de olvido inválido: {olvido}")
+        self.n_pasos = int(n_pasos)
+        self.paso = int(paso)
+        self.recursivo = recursivo
+        self.olvido = olvido
+        self.coef_ = None
+        super().__init__(c, lado)
+
+    @property
+    def largo(self):
+        """Muestras de cada regresión: desde t - n_pasos * paso hasta t."""
+        return self.n_pasos * self.paso + 1
+
+    @property
+    def retardo(self):
+        return 0
+
+    def _bloques(self, x, bloque=BLOQUE):
+        """
+        (fila de t del primer punto, vista (filas, columnas, n_pasos + 1)) por bloque;
+        el último valor de cada ventana es el objetivo y los anteriores los rezagos.
+        """
+        if len(x) < self.largo:
+            return
+        vista = sliding_window_view(x, self.largo, axis=0)[..., ::self.paso]
+        for a in range(0, len(vista), bloque):
+            yield a + self.largo - 1, vista[a:a + bloque]
+
+    def _centrar(self, vista):
+        """Bloque (columnas, filas, n_pasos + 1) desplazado por la media de cada columna."""
+        return np.moveaxis(vista, 0, 1) - self.media_[:, None, None]
+
+    def _ajustar_regresion(self, x):
+        k, p = x.shape[1], self.n_pasos
+        with np.errstate(invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.media_ = np.nan_to_num(np.nanmean(x, axis=0)) if len(x) else np.zeros(k)
+        r = np.zeros((k, 0, p + 2))
+        validas = np.zeros(k, dtype=np.int64)
+        for _, vista in self._bloques(x, BLOQUE_QR):
+            a = np.empty((k, len(vista), p + 2))
+            a[..., 0] = 1.0
+            a[..., 1:] = self._centrar(vista)
+            nulas = np.isnan(a).any(axis=-1)
+            a[nulas] = 0.0  # una fila en cero no cambia la solución
+            validas += (~nulas).sum(axis=1)
+            r = np.linalg.qr(np.concatenate([r, a], axis=1), mode="r")
+        if (validas == 0).any():
+            raise RuntimeError("Valid values are not enough for training.")
+        # [1, rezagos] @ coef ~ objetivo: R11 coef = r12 (pinv por si hay columnas constantes)
+        r11 = np.zeros((k, p + 1, p + 1))
+        r12 = np.zeros((k, p + 1))
+        filas = min(r.shape[1], p + 1)
+        r11[:, :filas] = r[:, :filas, :p + 1]
+        r12[:, :filas] = r[:, :filas, p + 1]
+        inversa = np.linalg.pinv(r11)
+        self.coef_ = np.einsum("kij,kj->ki", inversa, r12)
+        # (A^T A)^-1 = R11^-1 R11^-T: punto de partida de RLS
+        self._covarianza = inversa @ np.swapaxes(inversa, 1, 2)
+
+    def diferencias(self, valores):
+        """
+        |residuo| y residuo de la regresión en cada punto.
+
+        Returns:
+            tuple: (diferencia, variacion), arrays (filas, columnas).
+        """
+        if self.coef_ is None:
+            raise RuntimeError("El detector no está ajustado (llamar a fit con datos históricos)")
+        x = self._matriz(valores)
+        residuo = np.full(x.shape, np.nan)
+        for fila, vista in self._bloques(x):
+            d = self._centrar(vista)
+            prediccion = self.coef_[:, None, 0] + np.einsum("kbp,kp->kb", d[..., :-1], self.coef_[:, 1:])
+            residuo[fila:fila + len(vista)] = (d[..., -1] - prediccion).T
+        return np.abs(residuo), residuo
+
+    def fit(self, valores):
+        """
+        Ajusta la regresión y el umbral de cada columna (cuartiles de |residuo|) y deja
+        el estado de streaming al final de `valores`.
+        """
+        x = self._matriz(valores)
+        self._ajustar_regresion(x)
+        self._ajustar_umbral(valores, self.diferencias(x)[0])
+        self.reiniciar()
+        cola = max(len(x) - (self.largo - 1), 0)
+        for muestra in x[cola:]:
+            self._avanzar(muestra)
+        return self
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def reiniciar(self):
+        """Vacía el estado de streaming (conserva regresión y umbrales)."""
+        self._buffer = None
+        self._n = 0
+        self.tiempo_decision = None
+
+    def _avanzar(self, x):
+        if self._buffer is None:
+            self._buffer = np.full((self.largo, len(x)), np.nan)
+        self._buffer[self._n % self.largo] = x
+        self._n += 1
+
+    def _rls(self, rezagos, error, actualizar):
+        """Un paso de mínimos cuadrados recursivos en las columnas `actualizar`."""
+        p = self._covarianza[actualizar]
+        f = rezagos[actualizar]
+        pf = np.einsum("kij,kj->ki", p, f)
+        ganancia = pf / (self.olvido + np.einsum("ki,ki->k", f, pf))[:, None]
+        self.coef_[actualizar] += ganancia * error[actualizar, None]
+        self._covarianza[actualizar] = (p - np.einsum("ki,kj->kij", ganancia, pf)) / self.olvido
+
+    def update(self, muestra, tiempo=None):
+        """
+        Agrega una muestra y la decide (el residuo solo necesita muestras anteriores).
+
+        Returns:
+            np.ndarray | None: 1.0/0.0/NaN por columna, o None hasta tener n_pasos * paso
+            muestras previas.
+        """
+        self._avanzar(self._muestra(muestra))
+        if self._n < self.largo:
+            return None
+        self.tiempo_decision = tiempo
+        orden = np.arange(self._n - self.largo, self._n, self.paso) % self.largo
+        d = self._buffer[orden].T - self.media_[:, None]  # (columnas, n_pasos + 1)
+        rezagos = np.concatenate([np.ones((len(d), 1)), d[:, :-1]], axis=1)
+        residuo = d[:, -1] - (rezagos * self.coef_).sum(axis=1)
+        marcas = self._marcar(np.abs(residuo), residuo)
+        if self.recursivo:
+            actualizar = marcas == 0
+            if actualizar.any():
+                self._rls(rezagos, residuo, actualizar)
+        return marcas
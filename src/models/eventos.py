@@ -0,0 +1,134 @@
+# eventos.py
+# src/models/eventos.py
+
+"""
+Segmentación de las etiquetas de los detectores en eventos.
+ADTK marca rachas largas de muestras consecutivas; aquí cada racha (o grupo de
+anomalías cercanas) se resume en una fila con su inicio, fin, duración, muestra pico
+y los detectores que dispararon. Todo trabaja sobre los tiempos como int64 (ns).
+
+Modos:
+    separacion  Como filtrar_eventos_unicos: una anomalía abre un evento si está a más
+                de min_sep muestras del inicio del evento anterior (voraz; cada salto
+                es un searchsorted, el costo es por evento y no por muestra).
+    rachas      Una anomalía abre un evento si está a más de min_sep muestras de la
+                anomalía anterior (fusión de rachas, totalmente vectorizado).
+"""
+
+import numpy as np
+import pandas as pd
+
+MODOS = ("separacion", "rachas")
+COLUMNAS_EVENTOS = ["inicio", "fin", "duracion_seg", "muestras", "pico", "detectores"]
+
+
+def tiempos_ns(indice):
+    return np.asarray(pd.to_datetime(indice), dtype="datetime64[ns]").view(np.int64)
+
+
+def marcas_anomalas(valores):
+    """Booleano de 'marcado' de una matriz de etiquetas (True/1; NaN y False no cuentan)."""
+    v = np.asarray(valores)
+    return pd.notna(v) & (v != 0)
+
+
+def inicios_por_separacion(t, separacion_ns):
+    """
+    Posiciones (en t, ordenado) que abren un evento con la semántica de separación
+    mínima: el siguiente inicio es la primera muestra posterior a inicio + separación.
+    """
+    inicios = []
+    i, n = 0, len(t)
+    while i < n:
+        inicios.append(i)
+        i = int(np.searchsorted(t, t[i] + separacion_ns, side="right"))
+    return np.asarray(inicios, dtype=np.int64)
+
+
+def inicios_por_rachas(t, separacion_ns):
+    """Posiciones que abren un evento cuando la distancia a la anomalía anterior supera la separación."""
+    if len(t) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.r_[0, np.flatnonzero(np.diff(t) > separacion_ns) + 1].astype(np.int64)
+
+
+def _matriz_etiquetas(etiquetas):
+    """
+    (tiempos ns ordenados, marcas (filas, detectores), nombres de detectores).
+    Un DataFrame aporta un detector por columna; un dict {detector: etiquetas} se une
+    por tiempo y cada detector dispara si alguna de sus columnas está marcada.
+    """
+    if isinstance(etiquetas, dict):
+        nombres = list(etiquetas)
+        partes = [e.to_frame() if isinstance(e, pd.Series) else e for e in etiquetas.values()]
+        unido = pd.concat(partes, axis=1, keys=nombres, sort=True)
+        marcas_col = marcas_anomalas(unido.to_numpy())
+        grupo = np.asarray([nombres.index(k) for k in unido.columns.get_level_values(0)])
+        marcas = np.zeros((len(unido), len(nombres)), dtype=bool)
+        for j in range(len(nombres)):
+            marcas[:, j] = marcas_col[:, grupo == j].any(axis=1)
+        indice = unido.index
+    else:
+        if isinstance(etiquetas, pd.Series):
+            etiquetas = etiquetas.to_frame()
+        nombres = [str(c) for c in etiquetas.columns]
+        marcas = marcas_anomalas(etiquetas.to_numpy())
+        indice = etiquetas.index
+    t = tiempos_ns(indice)
+    if len(t) > 1 and not (t[1:] >= t[:-1]).all():
+        orden = np.argsort(t, kind="stable")
+        t, marcas = t[orden], marcas[orden]
+    return t, marcas, nombres
+
+
+def segmentar_eventos(etiquetas, min_sep=300, sample_rate_sec=10, modo="separacion", valores=None):
+    """
+    Un evento por grupo de anomalías.
+
+    Args:
+        etiquetas (pd.DataFrame | dict): Etiquetas de un detector (columnas = variables)
+            o {nombre_detector: etiquetas}, con índice de tiempo.
+        min_sep (int): Separación en muestras (ver MODOS).
+        sample_rate_sec (int): Período de muestreo en segundos.
+        modo (str): 'separacion' o 'rachas'.
+        valores (pd.Series): Serie con índice de tiempo para elegir el pico (máximo
+            |valor| dentro del evento). Sin ella, el pico es la muestra con más
+            detectores disparados (la primera si hay empate).
+
+    Returns:
+        pd.DataFrame: Columnas COLUMNAS_EVENTOS; 'detectores' separa los nombres con coma.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de segmentación inválido: {modo} (opciones: {', '.join(MODOS)})")
+    t, marcas, nombres = _matriz_etiquetas(etiquetas)
+    anomala = marcas.any(axis=1)
+    t, marcas = t[anomala], marcas[anomala]
+    if len(t) == 0:
+        return pd.DataFrame(columns=COLUMNAS_EVENTOS)
+
+    separacion = pd.Timedelta(seconds=min_sep * sample_rate_sec).value
+    inicios = (inicios_por_separacion if modo == "separacion" else inicios_por_rachas)(t, separacion)
+    muestras = np.diff(np.r_[inicios, len(t)])
+    fines = inicios + muestras - 1
+    disparados = np.logical_or.reduceat(marcas, inicios, axis=0)
+
+    # Pico: primera posición del máximo de cada segmento
+    if valores is None:
+        puntaje = marcas.sum(axis=1).astype(np.float64)
+    else:
+        puntaje = np.abs(pd.Series(valores).reindex(pd.to_datetime(t)).to_numpy(dtype=np.float64))
+        puntaje[np.isnan(puntaje)] = -np.inf
+    maximos = np.maximum.reduceat(puntaje, inicios)
+    segmento = np.repeat(np.arange(len(inicios)), muestras)
+    candidatos = np.flatnonzero(puntaje == maximos[segmento])
+    _, primero = np.unique(segmento[candidatos], return_index=True)
+    picos = candidatos[primero]
+
+    return pd.DataFrame({
+        "inicio": pd.to_datetime(t[inicios]),
+        "fin": pd.to_datetime(t[fines]),
+        "duracion_seg": (t[fines] - t[inicios]) / 1e9,
+        "muestras": muestras,
+        "pico": pd.to_datetime(t[picos]),
+        "detectores": [",".join(np.asarray(nombres)[fila]) for fila in disparados],
+    })
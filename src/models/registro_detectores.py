@@ -0,0 +1,123 @@
+# registro_detectores.py
+# src/models/registro_detectores.py
+
+"""
+Registro de detectores de anomalías. Cada detector es un nombre con una fábrica
+(clase o función que recibe parámetros y devuelve un objeto con fit_detect(serie))
+y sus parámetros por defecto; los del pipeline batch se registran en
+anomaly_detection.
+
+    registrar_detector(nombre, fabrica, **parametros)  agrega o reemplaza un detector
+    crear_detector(nombre, **parametros)               instancia con los parámetros
+                                                       registrados más los dados
+    correr_detectores(serie, nombres)                  {nombre: etiquetas}, solo de
+                                                       los detectores pedidos
+
+Los detectores son independientes (cada uno ajusta y detecta sobre la serie
+completa), así que correr_detectores los reparte en un pool de procesos. Para ir al
+pool la fábrica tiene que poder serializarse con pickle (una clase o función de
+módulo, no una lambda); si no, ese detector corre en el proceso principal mientras
+el pool trabaja.
+"""
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import DETECTORES_PARALELO, DETECTORES_MAX_WORKERS, DETECTORES_MIN_FILAS_PARALELO
+from utils.logger import logger
+
+# {nombre: (fabrica, parametros por defecto)}
+DETECTORES = {}
+
+
+def registrar_detector(nombre, fabrica, **parametros):
+    """
+    Registra (o reemplaza) un detector.
+
+    Args:
+        fabrica (callable): fabrica(**parametros) -> objeto con fit_detect(serie) que
+            devuelve las etiquetas con el índice de la serie.
+        parametros: Parámetros por defecto de la fábrica.
+    """
+    DETECTORES[nombre] = (fabrica, parametros)
+
+
+def _tarea(nombre, parametros=None):
+    if nombre not in DETECTORES:
+        raise ValueError(f"Detector no registrado: {nombre} (opciones: {', '.join(DETECTORES)})")
+    fabrica, defecto = DETECTORES[nombre]
+    return fabrica, {**defecto, **(parametros or {})}
+
+
+def crear_detector(nombre, **parametros):
+    """Instancia del detector `nombre` con sus parámetros registrados y los dados."""
+    fabrica, parametros = _tarea(nombre, parametros)
+    return fabrica(**parametros)
+
+
+def _correr(fabrica, parametros, serie):
+    return fabrica(**parametros).fit_detect(serie)
+
+
+def _serializable(fabrica, parametros):
+    try:
+        pickle.dumps((fabrica, parametros))
+        return True
+    except Exception:
+        return False
+
+
+def correr_detectores(serie, nombres=None, parametros=None, paralelo=None, max_workers=None):
+    """
+    Ajusta y corre sobre la serie solo los detectores pedidos.
+
+    Args:
+        serie (pd.DataFrame): Serie con índice de tiempo (crear_serie).
+        nombres (list): Detectores a correr (por defecto todos los registrados).
+        parametros (dict): {nombre: {parámetro: valor}} que reemplazan a los registrados.
+        paralelo (bool): Reparte los detectores en un pool de procesos (por defecto
+            DETECTORES_PARALELO). Con un solo detector, o con series de menos de
+            DETECTORES_MIN_FILAS_PARALELO filas, corren en el proceso principal.
+        max_workers (int): Procesos del pool (por defecto DETECTORES_MAX_WORKERS o la
+            cantidad de CPUs).
+
+    Returns:
+        dict: {nombre: etiquetas} en el orden de `nombres`.
+    """
+    nombres = list(DETECTORES) if nombres is None else list(dict.fromkeys(nombres))
+    parametros = parametros or {}
+    tareas = {n: _tarea(n, parametros.get(n)) for n in nombres}
+    paralelo = DETECTORES_PARALELO if paralelo is None else paralelo
+    workers = min(max_workers or DETECTORES_MAX_WORKERS or os.cpu_count() or 1, len(nombres))
+
+    en_pool = []
+    if paralelo and workers > 1 and len(serie) >= DETECTORES_MIN_FILAS_PARALELO:
+        en_pool = [n for n in nombres if _serializable(*tareas[n])]
+        locales = [n for n in nombres if n not in en_pool]
+        if locales:
+            logger.warning(f"Detectores que no se pueden enviar a otro proceso (corren en este): {locales}")
+        if len(en_pool) < 2:
+            en_pool = []
+
+    resultados = {}
+    if en_pool:
+        logger.info(f"Aplicando {', '.join(en_pool)} en {min(workers, len(en_pool))} procesos...")
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(en_pool))) as pool:
+                futuros = {n: pool.submit(_correr, *tareas[n], serie) for n in en_pool}
+                for n in nombres:
+                    if n not in futuros:
+                        logger.info(f"Aplicando {n}...")
+                        resultados[n] = _correr(*tareas[n], serie)
+                for n, futuro in futuros.items():
+                    resultados[n] = futuro.result()
+        except BrokenProcessPool as e:
+            # Un proceso murió (por ejemplo, sin memoria): se sigue en el proceso principal
+            logger.warning(f"El pool de detectores falló ({e}); se corren en serie")
+    for n in nombres:
+        if n not in resultados:
+            logger.info(f"Aplicando {n}...")
+            resultados[n] = _correr(*tareas[n], serie)
+    return {n: resultados[n] for n in nombres}
@@ -0,0 +1,271 @@
+# src/query_cache.py
+
+"""
+Caché local en disco de los resultados de InfluxDB.
+Los datos se guardan en Parquet particionados por locación, medida y día (UTC):
+
+    data/cache/<location>/<medida>/<YYYY-MM-DD>.parquet
+
+Solo se guardan días completos y ya cerrados (datos históricos que no cambian).
+Una consulta lee de disco los días disponibles y pide a la base únicamente los
+intervalos faltantes. El tamaño total se acota desalojando los archivos usados
+hace más tiempo (LRU por fecha de modificación).
+"""
+
+import os
+import glob
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (motor de Parquet para pandas)
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+from config import CACHE_DIR, CACHE_MAX_BYTES, INFLUX_BACKEND
+from utils.logger import logger
+from utils.utils import local_naive_a_utc, utc_a_local_naive
+
+FORMATO_UTC = "%Y-%m-%dT%H:%M:%SZ"
+UN_DIA = pd.Timedelta(days=1)
+
+_lock = threading.Lock()
+
+
+def _separar_fallidas(resultado):
+    """(data, fallidas) de lo que devuelve fn_consulta; fallidas=None si no lo informa."""
+    if isinstance(resultado, tuple):
+        return resultado
+    return resultado, None
+
+
+class CacheConsultas:
+    def __init__(self, directorio=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.habilitada = PYARROW_DISPONIBLE
+        if not self.habilitada:
+            logger.warning("pyarrow no está instalado: la caché de consultas queda desactivada")
+
+    def _ruta(self, location, medida, dia):
+        return os.path.join(self.directorio, location, medida, f"{dia:%Y-%m-%d}.parquet")
+
+    @staticmethod
+    def _rango_utc(fecha_inicio, fecha_fin):
+        inicio = pd.Timestamp(fecha_inicio)
+        fin = pd.Timestamp(fecha_fin)
+        if inicio.tzinfo is not None:
+            inicio = inicio.tz_convert("UTC").tz_localize(None)
+        if fin.tzinfo is not None:
+            fin = fin.tz_convert("UTC").tz_localize(None)
+        return inicio, fin
+
+    def _dias_del_rango(self, fecha_inicio, fecha_fin):
+        """Días (UTC) que toca el rango. Un fin justo a medianoche no suma el día siguiente."""
+        inicio, fin = self._rango_utc(fecha_inicio, fecha_fin)
+        ultimo = max(inicio, fin - pd.Timedelta(1, "ns")).floor("D")
+        return pd.date_range(inicio.floor("D"), ultimo, freq="D")
+
+    def dias_en_cache(self, location, medida, fecha_inicio, fecha_fin):
+        """Devuelve el conjunto de días (UTC) del rango que ya están en disco."""
+        dias = self._dias_del_rango(fecha_inicio, fecha_fin)
+        return {d for d in dias if os.path.exists(self._ruta(location, medida, d))}
+
+    def intervalos_faltantes(self, location, medidas, fecha_inicio, fecha_fin):
+        """
+        Calcula los intervalos a pedir a la base. Los días faltantes se amplían a
+        día completo (para poder guardarlos) y los días consecutivos se agrupan
+        en un único intervalo. El intervalo nunca pasa del instante actual.
+
+        Returns:
+            list: Tuplas (inicio, fin) en formato UTC.
+        """
+        inicio, fin = self._rango_utc(fecha_inicio, fecha_fin)
+        ahora = pd.Timestamp.now(tz="UTC").tz_localize(None)
+        dias = self._dias_del_rango(fecha_inicio, fecha_fin)
+        en_cache = [self.dias_en_cache(location, m, fecha_inicio, fecha_fin) for m in medidas]
+        faltan = [d for d in dias if not all(d in c for c in en_cache)]
+
+        intervalos = []
+        for dia in faltan:
+            ini_dia = dia
+            fin_dia = dia + UN_DIA
+            if fin_dia > ahora:
+                # Día en curso: no se puede completar, se pide solo lo solicitado
+                ini_dia, fin_dia = max(dia, inicio), min(fin_dia, fin)
+            if intervalos and intervalos[-1][1] == ini_dia:
+                intervalos[-1][1] = fin_dia
+            else:
+                intervalos.append([ini_dia, fin_dia])
+        return [(a.strftime(FORMATO_UTC), b.strftime(FORMATO_UTC)) for a, b in intervalos if a < b]
+
+    def leer(self, location, medida, fecha_inicio, fecha_fin):
+        """Lee los días en caché del rango y los recorta a [fecha_inicio, fecha_fin]."""
+        dias = sorted(self.dias_en_cache(location, medida, fecha_inicio, fecha_fin))
+        partes = []
+        for dia in dias:
+            ruta = self._ruta(location, medida, dia)
+            try:
+                partes.append(pd.read_parquet(ruta))
+                os.utime(ruta)  # marca de uso para el desalojo LRU
+            except Exception as e:
+                logger.warning(f"Archivo de caché ilegible {ruta}, se descarta: {e}")
+                self._borrar(ruta)
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return pd.DataFrame()
+        df = pd.concat(partes, ignore_index=True)
+        desde = utc_a_local_naive(fecha_inicio)
+        hasta = utc_a_local_naive(fecha_fin)
+        return df[(df["time"] >= desde) & (df["time"] <= hasta)]
+
+    def guardar(self, location, data, fecha_inicio, fecha_fin, fallidas=None):
+        """
+        Guarda en disco los días completos y cerrados contenidos en [fecha_inicio, fecha_fin).
+        Las medidas de `fallidas` (consultas que fallaron) no se guardan, para no confundir
+        una base caída con un día sin mediciones. Si no se sabe qué falló (fallidas=None),
+        solo se guardan las medidas que trajeron datos.
+        """
+        if not self.habilitada:
+            return
+        inicio, fin = self._rango_utc(fecha_inicio, fecha_fin)
+        ahora = pd.Timestamp.now(tz="UTC").tz_localize(None)
+        dias = [d for d in pd.date_range(inicio.ceil("D"), fin, freq="D")
+                if d + UN_DIA <= fin and d + UN_DIA <= ahora]
+        if fallidas is None:
+            data = {m: df for m, df in data.items() if not df.empty}
+        else:
+            data = {m: df for m, df in data.items() if m not in fallidas}
+        if not dias or not data:
+            return
+
+        with _lock:
+            for medida, df in data.items():
+                if df.empty or "time" not in df.columns:
+                    df = pd.DataFrame({"time": pd.Series(dtype="datetime64[ns]")})
+                    dia_utc = np.array([], dtype="datetime64[ns]")
+                else:
+                    dia_utc = local_naive_a_utc(df["time"]).dt.floor("D").to_numpy()
+                for dia in dias:
+                    ruta = self._ruta(location, medida, dia)
+                    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                    parte = df[dia_utc == np.datetime64(dia)] if len(df) else df
+                    tmp = ruta + ".tmp"
+                    parte.reset_index(drop=True).to_parquet(tmp, index=False)
+                    os.replace(tmp, ruta)
+            self.aplicar_limite()
+
+    def consultar(self, fn_consulta, fecha_inicio, fecha_fin, location, medidas):
+        """
+        Devuelve {medida: DataFrame} para el rango, leyendo de la caché lo disponible
+        y llamando a fn_consulta(inicio, fin) solo para los intervalos faltantes.
+        fn_consulta devuelve {medida: DataFrame}, o ({medida: DataFrame}, set de medidas
+        cuya consulta falló) para que esas no se guarden.
+        """
+        if not self.habilitada:
+            return _separar_fallidas(fn_consulta(fecha_inicio, fecha_fin))[0]
+
+        faltantes = self.intervalos_faltantes(location, medidas, fecha_inicio, fecha_fin)
+        # Lectura de lo que ya estaba antes de consultar, para no duplicar lo que se guarde ahora
+        partes = {m: [self.leer(location, m, fecha_inicio, fecha_fin)] for m in medidas}
+
+        if faltantes:
+            logger.info(f"Caché: {len(faltantes)} intervalos faltantes para {location}: {faltantes}")
+        else:
+            logger.info(f"Caché: rango {fecha_inicio} - {fecha_fin} completo en disco")
+
+        for ini, fin in faltantes:
+            data, fallidas = _separar_fallidas(fn_consulta(ini, fin))
+            self.guardar(location, data, ini, fin, fallidas)
+            for medida, df in data.items():
+                partes.setdefault(medida, []).append(df)
+
+        desde = utc_a_local_naive(fecha_inicio)
+        hasta = utc_a_local_naive(fecha_fin)
+        resultado = {}
+        for medida, dfs in partes.items():
+            dfs = [df for df in dfs if not df.empty]
+            if not dfs:
+                resultado[medida] = pd.DataFrame()
+                continue
+            df = pd.concat(dfs, ignore_index=True)
+            df = df[(df["time"] >= desde) & (df["time"] <= hasta)]
+            df = df.drop_duplicates(subset="time").sort_values("time").reset_index(drop=True)
+            resultado[medida] = df
+        return resultado
+
+    def tamano_total(self):
+        return sum(os.path.getsize(r) for r in self._archivos())
+
+    def aplicar_limite(self):
+        """Borra los archivos usados hace más tiempo hasta quedar por debajo de max_bytes."""
+        archivos = [(os.path.getmtime(r), os.path.getsize(r), r) for r in self._archivos()]
+        total = sum(a[1] for a in archivos)
+        if total <= self.max_bytes:
+            return 0
+        borrados = 0
+        for _, tamano, ruta in sorted(archivos):
+            if total <= self.max_bytes:
+                break
+            self._borrar(ruta)
+            total -= tamano
+            borrados += 1
+        logger.info(f"Caché: desalojados {borrados} archivos para respetar el límite de {self.max_bytes} bytes")
+        return borrados
+
+    def invalidar(self, location=None, medida=None, desde=None, hasta=None):
+        """
+        Borra particiones de la caché. Sin argumentos la vacía por completo.
+
+        Args:
+            location (str): Solo esta locación.
+            medida (str): Solo esta medida.
+            desde, hasta (str): Solo los días (UTC) dentro de este rango, inclusive.
+
+        Returns:
+            int: Cantidad de archivos borrados.
+        """
+        desde = pd.Timestamp(desde).tz_localize(None).floor("D") if desde else None
+        hasta = pd.Timestamp(hasta).tz_localize(None).floor("D") if hasta else None
+        borrados = 0
+        with _lock:
+            for ruta in self._archivos(location, medida):
+                dia = pd.Timestamp(os.path.basename(ruta)[:-len(".parquet")])
+                if (desde is not None and dia < desde) or (hasta is not None and dia > hasta):
+                    continue
+                self._borrar(ruta)
+                borrados += 1
+        logger.info(f"Caché: invalidados {borrados} archivos")
+        return borrados
+
+    def _archivos(self, location=None, medida=None):
+        patron = os.path.join(self.directorio, location or "*", medida or "*", "*.parquet")
+        return glob.glob(patron)
+
+    @staticmethod
+    def _borrar(ruta):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+_cache = None
+
+
+def obtener_cache():
+    """Devuelve la caché compartida por todo el proceso. Los datos de replay y sintéticos
+    se guardan aparte para no mezclarlos con los de las bases reales."""
+    global _cache
+    if _cache is None:
+        directorio = CACHE_DIR if INFLUX_BACKEND in ("real", "grabar") else os.path.join(CACHE_DIR, f"_{INFLUX_BACKEND}")
+        _cache = CacheConsultas(directorio)
+    return _cache
+
+
+def invalidar_cache(location=None, medida=None, desde=None, hasta=None):
+    """Atajo para invalidar particiones de la caché compartida."""
+    return obtener_cache().invalidar(location, medida, desde, hasta)
@@ -1,158 +1,531 @@
 # src/query_engine.py
 
-import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from db_connector import DBConnector
+from db_connector import obtener_conector
 from config import INFLUXDB2_CONFIG
 from data_processing.data_cleaning import clean_influx2_meta
-from datetime import datetime
+from data_processing.data_merging import merge_k_vias
 from utils.logger import logger
 import pandas as pd
-from functools import reduce
-from config import LOCAL_TIMEZONE, USE_INFLUXDB_2
-from utils.utils import convert_df_utc_to_local
-
-
-def busqueda_influx1(fecha_inicio, fecha_fin, location):
-    db = DBConnector()
-    client1 = db.connect_influxdb1()
-
-    queries = {
-        "voltage": f"""
-            SELECT Vrms_L1_Ins, Vrms_L2_Ins, Vrms_L3_Ins, THDV_L1_Ins, THDV_L2_Ins, THDV_L3_Ins
-            FROM "Voltage"
-            WHERE time >= '{fecha_inicio}' AND time <= '{fecha_fin}' AND location='{location}'
-        """,
-        "power": f"""
-            SELECT PowA_L1_Ins, PowA_L2_Ins, PowA_L3_Ins, PowS_L1_Ins, PowS_L2_Ins, PowS_L3_Ins, PowF_T_Ins
-            FROM "Power"
-            WHERE time >= '{fecha_inicio}' AND time <= '{fecha_fin}' AND location='{location}'
-        """,
-        "energy": f"""
-            SELECT EA_I_IV_T FROM "Energy"
-            WHERE time >= '{fecha_inicio}' AND time <= '{fecha_fin}' AND location='{location}'
-        """,
-        "frequency": f"""
-            SELECT Fre_Ins FROM "Frequency"
-            WHERE time >= '{fecha_inicio}' AND time <= '{fecha_fin}' AND location='{location}'
-        """,
-        "current": f"""
-            SELECT Irms_L1_Ins, Irms_L2_Ins, Irms_L3_Ins, THDI_L1_Ins, THDI_L2_Ins, THDI_L3_Ins
-            FROM "Current"
-            WHERE time >= '{fecha_inicio}' AND time <= '{fecha_fin}' AND location='{location}'
+import numpy as np
+from config import USE_INFLUXDB_2, INFLUX2_CONSULTAS_CONCURRENTES, INFLUX2_MAX_WORKERS
+from config import INFLUX2_LECTURA_STREAMING, INFLUX1_LECTURA_CHUNKED, INFLUX2_CONSULTA_UNICA
+from config import QUERY_VENTANA, QUERY_MAX_WORKERS, QUERY_REINTENTOS, QUERY_ESPERA_REINTENTO_SEG
+from config import FALLBACK_HUECO_MINIMO_SEG, FALLBACK_FUSION_HUECOS_SEG, FALLBACK_MAX_CONSULTAS, MERGE_TOLERANCIA
+from utils.utils import convert_df_utc_to_local, local_naive_a_utc, utc_a_local_naive
+from config import USE_CACHE
+from query_planner import consultar_por_ventanas, FORMATO_UTC
+from query_cache import obtener_cache
+from flux_reader import concatenar_bloques
+from schema import campos_por_medida, aplicar_esquema
+from storage import guardar_artefacto
+
+
+# Campos de cada medida en InfluxDB (1.8 y 2.7), generados desde el esquema
+CAMPOS_POR_MEDIDA = campos_por_medida()
+
+# Medidas que devuelven busqueda_influx1 / busqueda_influx2
+MEDIDAS = list(CAMPOS_POR_MEDIDA)
+
+AGREGACIONES = ("mean", "min", "max", "last")
+
+
+def _normalizar_agregacion(resolucion, agregacion):
+    """Valida la resolución ('15m', '1h', ...) y devuelve (resolucion, lista de agregaciones)."""
+    if not resolucion:
+        return None, []
+    if not re.fullmatch(r"\d+[smhdw]", resolucion):
+        raise ValueError(f"Resolución inválida: {resolucion} (ejemplos: '1m', '15m', '1h')")
+    aggs = [agregacion] if isinstance(agregacion, str) else list(agregacion or ["mean"])
+    invalidas = [a for a in aggs if a not in AGREGACIONES]
+    if invalidas:
+        raise ValueError(f"Agregaciones no soportadas: {invalidas}. Opciones: {AGREGACIONES}")
+    return resolucion, aggs
+
+def _columnas_agregadas(variables, aggs):
+    """Nombres de columna del resultado: sin sufijo salvo que se pidan varias agregaciones."""
+    if len(aggs) <= 1:
+        return list(variables)
+    return [f"{v}_{a}" for v in variables for a in aggs]
+
+def _select_influxql(variables, aggs):
+    if not aggs:
+        return ", ".join(variables)
+    nombres = _columnas_agregadas(variables, aggs)
+    pares = [(v, a) for v in variables for a in aggs]
+    return ", ".join(f"{a}({v}) AS {n}" for (v, a), n in zip(pares, nombres))
+
+def _consulta_flux(bucket, measure, variables, fecha_inicio, fecha_fin, location, resolucion=None, aggs=()):
+    """
+    Arma la consulta Flux pivotada por _time. measure puede ser una lista de medidas:
+    en ese caso se filtran todas en un solo pedido, se descartan los tags y se desagrupa
+    antes del pivot para que el servidor devuelva una única tabla ancha.
+    """
+    medidas = [measure] if isinstance(measure, str) else list(measure)
+    filter_measures = " or ".join([f'r._measurement == "{m.capitalize()}"' for m in medidas])
+    filter_fields = " or\n             ".join([f'r._field == "{v}"' for v in variables])
+    datos = f'''from(bucket:"{bucket}")
+          |> range(start: time(v: "{fecha_inicio}"), stop: time(v: "{fecha_fin}"))
+          |> filter(fn: (r) => {filter_measures})
+          |> filter(fn: (r) => r.location == "{location}")
+          |> filter(fn: (r) => {filter_fields})'''
+    pivot = '''
+          |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")'''
+    if len(medidas) > 1:
+        pivot = '''
+          |> keep(columns: ["_time", "_field", "_value"])
+          |> group()''' + pivot + '''
+          |> sort(columns: ["_time"])'''
+
+    if not resolucion:
+        return f"\n        {datos}{pivot}\n        "
+    if len(aggs) == 1:
+        ventana = f'''
+          |> aggregateWindow(every: {resolucion}, fn: {aggs[0]}, createEmpty: false, timeSrc: "_start")'''
+        return f"\n        {datos}{ventana}{pivot}\n        "
+
+    ramas = ",\n            ".join(
+        f'datos |> aggregateWindow(every: {resolucion}, fn: {a}, createEmpty: false, timeSrc: "_start")'
+        f' |> map(fn: (r) => ({{r with _field: r._field + "_{a}"}}))'
+        for a in aggs
+    )
+    return f"\n        datos = {datos}\n        union(tables: [\n            {ramas}\n        ]){pivot}\n        "
+
+
+def busqueda_influx1(fecha_inicio, fecha_fin, location, estricto=False, medidas=None, chunked=None,
+                     resolucion=None, agregacion="mean", fallidas=None):
+    """
+    Consulta las medidas en InfluxDB 1.8.
+
+    Args:
+        estricto (bool): Propaga las excepciones en lugar de devolver DataFrames vacíos.
+        medidas (list): Subconjunto de medidas a consultar (por defecto todas).
+        chunked (bool): Lee la respuesta por chunks con epoch en ns y arrays columnares
+            (por defecto INFLUX1_LECTURA_CHUNKED).
+        resolucion (str): Agrega en el servidor con GROUP BY time() ('1m', '15m', '1h').
+            None devuelve la resolución original.
+        agregacion (str o list): Función/es por ventana: mean, min, max, last.
+        fallidas (set): Si se da, se le agregan las medidas cuya consulta falló (y
+            vuelven vacías), para distinguirlas de las que no tienen datos.
+    """
+    if chunked is None:
+        chunked = INFLUX1_LECTURA_CHUNKED
+
+    db = obtener_conector()
+
+    resolucion, aggs = _normalizar_agregacion(resolucion, agregacion)
+    agrupado = f" GROUP BY time({resolucion}) fill(none)" if resolucion else ""
+
+    queries = {}
+    for measure, variables in CAMPOS_POR_MEDIDA.items():
+        queries[measure] = f"""
+            SELECT {_select_influxql(variables, aggs)}
+            FROM "{measure.capitalize()}"
+            WHERE time >= '{fecha_inicio}' AND time <= '{fecha_fin}' AND location='{location}'{agrupado}
         """
-    }
+
+    if medidas is not None:
+        queries = {k: q for k, q in queries.items() if k in medidas}
 
     results = {}
     for key, query in queries.items():
         try:
             logger.info(f"Ejecutando consulta InfluxDB 1.8: {key}")
-            points = db.query_influx1(query)
-            results[key] = pd.DataFrame(points)
-            results[key] = convert_df_utc_to_local(results[key], 'time')
+            if chunked:
+                df = concatenar_bloques(db.query_influx1_bloques(query))
+            else:
+                df = pd.DataFrame(db.query_influx1(query))
+            results[key] = aplicar_esquema(convert_df_utc_to_local(df, 'time'))
             logger.info(f"Consulta {key} completada con {len(results[key])} registros")
         except Exception as e:
             logger.error(f"[ERROR] Consulta {key} falló: {e}")
+            if estricto:
+                raise
             results[key] = pd.DataFrame()
+            if fallidas is not None:
+                fallidas.add(key)
 
     return results
 
-def busqueda_influx2(fecha_inicio, fecha_fin, location):
-    db = DBConnector()
-    client2 = db.connect_influxdb2()
-    query_api = client2.query_api()
-    bucket = INFLUXDB2_CONFIG["bucket"]
-
-    fields = {
-        "voltage": ["Vrms_L1_Ins", "Vrms_L2_Ins", "Vrms_L3_Ins", "THDV_L1_Ins", "THDV_L2_Ins", "THDV_L3_Ins"],
-        "power": ["PowA_L1_Ins", "PowA_L2_Ins", "PowA_L3_Ins", "PowS_L1_Ins", "PowS_L2_Ins", "PowS_L3_Ins", "PowF_T_Ins"],
-        "energy": ["EA_I_IV_T"],
-        "frequency": ["Fre_Ins"],
-        "current": ["Irms_L1_Ins", "Irms_L2_Ins", "Irms_L3_Ins", "THDI_L1_Ins", "THDI_L2_Ins", "THDI_L3_Ins"]
-    }
-
-    results = {}
-    for measure, variables in fields.items():
-        filter_fields = " or\n             ".join([f'r._field == "{v}"' for v in variables])
-        query = f'''
-        from(bucket:"{bucket}")
-          |> range(start: time(v: "{fecha_inicio}"), stop: time(v: "{fecha_fin}"))
-          |> filter(fn: (r) => r._measurement == "{measure.capitalize()}")
-          |> filter(fn: (r) => r.location == "{location}")
-          |> filter(fn: (r) => {filter_fields})
-          |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
-        '''
-        try:
-            #logger.info(f"Ejecutando consulta InfluxDB 2.0: {measure}")
-            df = query_api.query_data_frame(query=query)
-            results[measure] = clean_influx2_meta(df)
-            results[measure] = convert_df_utc_to_local(results[measure], 'time')
-            #logger.info(f"Consulta {measure} completada con {len(results[measure])} registros")
-        except Exception as e:
-            logger.error(f"[ERROR] Consulta {measure} en Influx 2 falló: {e}")
-            results[measure] = pd.DataFrame()
-
-    return results
+def _consulta_medida_influx2(db, measure, query, campos=None, streaming=False):
+    """
+    Ejecuta la consulta Flux de una medida y mide su tiempo de reloj.
 
-def busqueda_influx(fecha_inicio, fecha_fin, location):
-    data = {}
-    fallback_data = {}
+    Args:
+        campos (list): Campos de la medida, necesarios para el lector en streaming.
+        streaming (bool): Decodifica el CSV crudo a arrays float32 (flux_reader) en lugar
+            de usar query_data_frame y limpiar las columnas meta después.
 
-    if USE_INFLUXDB_2:
-        try:
-            logger.info("🔍 Intentando consulta en InfluxDB 2.7 como fuente primaria...")
-            data = busqueda_influx2(fecha_inicio, fecha_fin, location)
+    Returns:
+        tuple: (measure, DataFrame, segundos, ok). Si la consulta falla se devuelve
+        un DataFrame vacío, igual que en la versión secuencial, y ok=False.
+    """
+    inicio = time.perf_counter()
+    try:
+        if streaming:
+            df = concatenar_bloques(db.query_influx2_bloques(query, campos))
+        else:
+            df = clean_influx2_meta(db.query_influx2(query))
+        df = aplicar_esquema(convert_df_utc_to_local(df, 'time'))
+        ok = True
+    except Exception as e:
+        logger.error(f"[ERROR] Consulta {measure} en Influx 2 falló: {e}")
+        df = pd.DataFrame()
+        ok = False
+    return measure, df, time.perf_counter() - inicio, ok
 
-            # Detectar si faltan datos importantes
-            from datetime import datetime
+def busqueda_influx2(fecha_inicio, fecha_fin, location, concurrente=None, max_workers=None, devolver_tiempos=False,
+                     streaming=None, resolucion=None, agregacion="mean", fallidas=None):
+    """
+    Consulta las cinco medidas en InfluxDB 2.7.
+
+    Args:
+        concurrente (bool): Ejecuta las consultas en paralelo con un pool de hilos acotado.
+            Por defecto se toma INFLUX2_CONSULTAS_CONCURRENTES de config.
+        max_workers (int): Tamaño máximo del pool (por defecto INFLUX2_MAX_WORKERS).
+        streaming (bool): Usa el lector en streaming de flux_reader (por defecto
+            INFLUX2_LECTURA_STREAMING).
+        resolucion (str): Agrega en el servidor con aggregateWindow ('1m', '15m', '1h').
+            None devuelve la resolución original.
+        agregacion (str o list): Función/es por ventana: mean, min, max, last. Con más de
+            una, las columnas llevan el sufijo de la función (Vrms_L1_Ins_max).
+        devolver_tiempos (bool): Si es True devuelve también los segundos de reloj por medida.
+        fallidas (set): Si se da, se le agregan las medidas cuya consulta falló.
+
+    Returns:
+        dict: {medida: DataFrame}, o (dict, dict tiempos) si devolver_tiempos=True.
+    """
+    if concurrente is None:
+        concurrente = INFLUX2_CONSULTAS_CONCURRENTES
+    if max_workers is None:
+        max_workers = INFLUX2_MAX_WORKERS
+    if streaming is None:
+        streaming = INFLUX2_LECTURA_STREAMING
+
+    db = obtener_conector()
+    bucket = INFLUXDB2_CONFIG["bucket"]
 
-            fecha_inicio_dt = pd.to_datetime(fecha_inicio)
-            fecha_fin_dt = pd.to_datetime(fecha_fin)
+    resolucion, aggs = _normalizar_agregacion(resolucion, agregacion)
 
-            faltantes = []
-            for key in ["voltage", "power", "current", "frequency", "energy"]:
-                df = data.get(key, pd.DataFrame())
-                if df.empty:
-                    faltantes.append(key)
-                elif 'time' in df.columns:
-                    min_date = df['time'].min()
-                    if min_date > fecha_inicio_dt + pd.Timedelta(minutes=1):
-                        # Hay datos, pero no cubren la fecha de inicio
-                        faltantes.append(key)
+    queries = {}
+    fields = {}
+    for measure, variables in CAMPOS_POR_MEDIDA.items():
+        queries[measure] = _consulta_flux(bucket, measure, variables, fecha_inicio, fecha_fin, location,
+                                          resolucion, aggs)
+        fields[measure] = _columnas_agregadas(variables, aggs)
 
+    inicio_total = time.perf_counter()
+    if concurrente and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+            futuros = [pool.submit(_consulta_medida_influx2, db, m, q, fields[m], streaming)
+                       for m, q in queries.items()]
+            salidas = [f.result() for f in futuros]
+    else:
+        salidas = [_consulta_medida_influx2(db, m, q, fields[m], streaming) for m, q in queries.items()]
 
-            if faltantes:
-                logger.warning(f"[Fallback parcial] Faltan datos en InfluxDB 2.7: {faltantes}")
-                logger.info("🔁 Complementando con InfluxDB 1.8...")
-                fallback_data = busqueda_influx1(fecha_inicio, fecha_fin, location)
+    results = {}
+    tiempos = {}
+    for measure, df, segundos, ok in salidas:
+        results[measure] = df
+        tiempos[measure] = segundos
+        if not ok and fallidas is not None:
+            fallidas.add(measure)
+        logger.info(f"Consulta Influx 2 {measure}: {len(df)} registros en {segundos:.2f} s")
+    logger.info(f"Consultas Influx 2 completadas en {time.perf_counter() - inicio_total:.2f} s "
+                f"({'concurrente' if concurrente else 'secuencial'})")
+
+    if devolver_tiempos:
+        return results, tiempos
+    return results
 
-                # Fusionar por clave
-                for key in keys_importantes:
-                    df1 = data.get(key, pd.DataFrame())
-                    df2 = fallback_data.get(key, pd.DataFrame())
+def busqueda_influx2_unica(fecha_inicio, fecha_fin, location, streaming=None, resolucion=None, agregacion="mean"):
+    """
+    Consulta los 20 campos de las cinco medidas en un único pedido Flux, pivotado y
+    unido por _time en el servidor. Evita las cinco respuestas separadas y el merge
+    en el cliente.
 
-                    if not df1.empty and not df2.empty:
-                        data[key] = pd.concat([df1, df2]).sort_values("time")
-                    elif df1.empty and not df2.empty:
-                        data[key] = df2
-                    # Si df1 ya tiene datos, no se toca
+    Returns:
+        pd.DataFrame: Tabla ancha con 'time' (hora local) y una columna por campo.
+    """
+    if streaming is None:
+        streaming = INFLUX2_LECTURA_STREAMING
+
+    db = obtener_conector()
+    resolucion, aggs = _normalizar_agregacion(resolucion, agregacion)
+    variables = [v for campos in CAMPOS_POR_MEDIDA.values() for v in campos]
+    query = _consulta_flux(INFLUXDB2_CONFIG["bucket"], MEDIDAS, variables, fecha_inicio, fecha_fin, location,
+                           resolucion, aggs)
+    campos = _columnas_agregadas(variables, aggs)
+
+    inicio = time.perf_counter()
+    if streaming:
+        df = concatenar_bloques(db.query_influx2_bloques(query, campos))
+    else:
+        df = clean_influx2_meta(db.query_influx2(query))
+    df = aplicar_esquema(convert_df_utc_to_local(df, 'time'))
+    logger.info(f"Consulta única Influx 2: {len(df)} registros en {time.perf_counter() - inicio:.2f} s")
+    return df
+
+def busqueda_influx_unica(fecha_inicio, fecha_fin, location, estricto=False, usar_cache=None,
+                          resolucion=None, agregacion="mean"):
+    """
+    Variante de busqueda_influx con una sola consulta a InfluxDB 2.7 (busqueda_influx2_unica).
+    Devuelve {"todas": DataFrame ancho}, que merge_data pasa sin combinar. Si InfluxDB 2.7
+    falla o no trae datos se usa el camino por medida, con su fallback a InfluxDB 1.8.
+    """
+    if usar_cache is None:
+        usar_cache = USE_CACHE
+
+    def por_medida(ini, fin):
+        data, _, fallidas = _busqueda_influx_fuentes(ini, fin, location, estricto, resolucion, agregacion)
+        # La tabla ancha queda incompleta si falló alguna medida
+        return merge_data(data, silenciar_warning=True), bool(fallidas)
+
+    def fuente(ini, fin):
+        """Devuelve (DataFrame ancho, True si alguna consulta falló)."""
+        if USE_INFLUXDB_2:
+            try:
+                df = busqueda_influx2_unica(ini, fin, location, resolucion=resolucion, agregacion=agregacion)
+                if not df.empty:
+                    return df, False
+                logger.warning("[Fallback] La consulta única a InfluxDB 2.7 no trajo datos")
+            except Exception as e:
+                logger.warning(f"[Fallback] Falló la consulta única a InfluxDB 2.7: {e}")
+        return por_medida(ini, fin)
+
+    if not usar_cache:
+        return {"todas": fuente(fecha_inicio, fecha_fin)[0]}
+
+    resolucion_n, aggs = _normalizar_agregacion(resolucion, agregacion)
+    clave = "todas" + (f"_{resolucion_n}_{'_'.join(aggs)}" if resolucion_n else "")
+
+    def fuente_cache(ini, fin):
+        df, fallo = fuente(ini, fin)
+        return {clave: df}, ({clave} if fallo else set())
+
+    data = obtener_cache().consultar(fuente_cache, fecha_inicio, fecha_fin, location, [clave])
+    return {"todas": data.get(clave, pd.DataFrame())}
+
+def busqueda_influx(fecha_inicio, fecha_fin, location, estricto=False, usar_cache=None, devolver_cobertura=False,
+                    resolucion=None, agregacion="mean"):
+    """
+    Consulta InfluxDB 2.7 como fuente primaria y completa con InfluxDB 1.8.
+
+    Args:
+        estricto (bool): Si es True, un fallo en la fuente final (1.8) se propaga como
+            excepción en lugar de devolver DataFrames vacíos. Lo usa el planificador
+            de ventanas para poder reintentar la ventana.
+        usar_cache (bool): Lee primero de la caché en disco y consulta solo los intervalos
+            faltantes. Por defecto USE_CACHE de config.
+        devolver_cobertura (bool): Si es True devuelve también un DataFrame con la fuente
+            que sirvió cada intervalo de cada medida (influx2, influx1, cache, sin_datos).
+        resolucion (str): Agregación en el servidor ('1m', '15m', '1h'); None = resolución original.
+        agregacion (str o list): Función/es por ventana (mean, min, max, last).
+
+    Returns:
+        dict: {medida: DataFrame}, o (dict, DataFrame cobertura) si devolver_cobertura=True.
+    """
+    if usar_cache is None:
+        usar_cache = USE_CACHE
+
+    cobertura = []
+
+    def fuentes(ini, fin):
+        data, cob, fallidas = _busqueda_influx_fuentes(ini, fin, location, estricto, resolucion, agregacion)
+        cobertura.extend(cob)
+        return data, fallidas
+
+    if usar_cache:
+        # Las series agregadas se guardan aparte de las crudas (power_15m_mean, ...)
+        resolucion, aggs = _normalizar_agregacion(resolucion, agregacion)
+        sufijo = f"_{resolucion}_{'_'.join(aggs)}" if resolucion else ""
+        claves = {m: m + sufijo for m in MEDIDAS}
+
+        def fuentes_cache(ini, fin):
+            data, fallidas = fuentes(ini, fin)
+            return {claves[m]: df for m, df in data.items()}, {claves[m] for m in fallidas}
+
+        cache = obtener_cache()
+        if devolver_cobertura:
+            faltantes = cache.intervalos_faltantes(location, list(claves.values()), fecha_inicio, fecha_fin)
+            for ini, fin in _complemento(fecha_inicio, fecha_fin, faltantes):
+                cobertura.extend({"medida": m, "inicio": ini, "fin": fin, "fuente": "cache"} for m in MEDIDAS)
+        data = cache.consultar(fuentes_cache, fecha_inicio, fecha_fin, location, list(claves.values()))
+        data = {m: data.get(claves[m], pd.DataFrame()) for m in MEDIDAS}
+    else:
+        data = fuentes(fecha_inicio, fecha_fin)[0]
+
+    if devolver_cobertura:
+        df_cob = pd.DataFrame(cobertura, columns=["medida", "inicio", "fin", "fuente"])
+        return data, df_cob.sort_values(["medida", "inicio"]).reset_index(drop=True)
+    return data
+
+def calcular_huecos(df, fecha_inicio, fecha_fin, hueco_minimo_seg=None, fusion_seg=None):
+    """
+    Calcula los intervalos de [fecha_inicio, fecha_fin] sin muestras en df.
 
-            return data
+    Args:
+        df (pd.DataFrame): Resultado de una medida, con 'time' en hora local sin zona.
+        hueco_minimo_seg (int): Separación mínima entre muestras para considerarla hueco.
+        fusion_seg (int): Huecos separados por menos de este tiempo se piden juntos.
 
-        except Exception as e:
-            logger.warning(f"[Fallback total] Fallo InfluxDB 2.7: {e}")
-            logger.info("🔁 Reintentando con InfluxDB 1.8...")
-            return busqueda_influx1(fecha_inicio, fecha_fin, location)
+    Returns:
+        list: Tuplas (inicio, fin) en UTC con los huecos.
+    """
+    if hueco_minimo_seg is None:
+        hueco_minimo_seg = FALLBACK_HUECO_MINIMO_SEG
+    if fusion_seg is None:
+        fusion_seg = FALLBACK_FUSION_HUECOS_SEG
+
+    inicio = pd.Timestamp(fecha_inicio).tz_localize(None).value
+    fin = pd.Timestamp(fecha_fin).tz_localize(None).value
+    if df.empty or 'time' not in df.columns:
+        return [(fecha_inicio, fecha_fin)]
+
+    tiempos = local_naive_a_utc(df['time']).dropna().to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    tiempos = np.sort(tiempos[(tiempos >= inicio) & (tiempos <= fin)])
+    bordes = np.concatenate(([inicio], tiempos, [fin]))
+    saltos = np.nonzero(np.diff(bordes) > hueco_minimo_seg * 10**9)[0]
+
+    huecos = []
+    for i in saltos:
+        a, b = bordes[i], bordes[i + 1]
+        if huecos and a - huecos[-1][1] < fusion_seg * 10**9:
+            huecos[-1][1] = b
+        else:
+            huecos.append([a, b])
+    return [(pd.Timestamp(a).strftime(FORMATO_UTC), pd.Timestamp(b).strftime(FORMATO_UTC)) for a, b in huecos]
+
+def _complemento(fecha_inicio, fecha_fin, intervalos):
+    """Intervalos de [fecha_inicio, fecha_fin] no incluidos en la lista ordenada intervalos."""
+    resultado = []
+    actual = pd.Timestamp(fecha_inicio)
+    fin = pd.Timestamp(fecha_fin)
+    for a, b in intervalos:
+        a, b = pd.Timestamp(a), pd.Timestamp(b)
+        if a > actual:
+            resultado.append((actual.strftime(FORMATO_UTC), min(a, fin).strftime(FORMATO_UTC)))
+        actual = max(actual, b)
+    if actual < fin:
+        resultado.append((actual.strftime(FORMATO_UTC), fin.strftime(FORMATO_UTC)))
+    return resultado
+
+def _busqueda_influx_fuentes(fecha_inicio, fecha_fin, location, estricto=False, resolucion=None, agregacion="mean"):
+    """
+    Consulta directa a las bases, sin pasar por la caché. Los huecos de cada medida
+    en InfluxDB 2.7 se piden a InfluxDB 1.8 y se fusionan sin timestamps repetidos.
 
-    logger.info("🔁 Ejecutando consulta directamente en InfluxDB 1.8...")
-    return busqueda_influx1(fecha_inicio, fecha_fin, location)
+    Returns:
+        tuple: ({medida: DataFrame}, lista de dicts de cobertura, set de medidas con
+        alguna consulta fallida). Una medida vacía que no está en el set realmente no
+        tiene datos en el rango; la caché solo guarda las que no fallaron.
+    """
+    fallidas = set()
+    if not USE_INFLUXDB_2:
+        logger.info("🔁 Ejecutando consulta directamente en InfluxDB 1.8...")
+        data = busqueda_influx1(fecha_inicio, fecha_fin, location, estricto=estricto,
+                                resolucion=resolucion, agregacion=agregacion, fallidas=fallidas)
+        return data, _cobertura_fuente_unica(data, fecha_inicio, fecha_fin, "influx1"), fallidas
+
+    fallidas2 = set()
+    try:
+        logger.info("🔍 Intentando consulta en InfluxDB 2.7 como fuente primaria...")
+        data = busqueda_influx2(fecha_inicio, fecha_fin, location, resolucion=resolucion, agregacion=agregacion,
+                                fallidas=fallidas2)
+    except Exception as e:
+        logger.warning(f"[Fallback total] Fallo InfluxDB 2.7: {e}")
+        logger.info("🔁 Reintentando con InfluxDB 1.8...")
+        data = busqueda_influx1(fecha_inicio, fecha_fin, location, estricto=estricto,
+                                resolucion=resolucion, agregacion=agregacion, fallidas=fallidas)
+        # Sin InfluxDB 2.7 una medida vacía en 1.8 no prueba que no haya datos
+        fallidas.update(k for k in MEDIDAS if data.get(k, pd.DataFrame()).empty)
+        return data, _cobertura_fuente_unica(data, fecha_inicio, fecha_fin, "influx1"), fallidas
+
+    # Con datos agregados un hueco es la falta de al menos dos ventanas seguidas
+    hueco_minimo_seg = FALLBACK_HUECO_MINIMO_SEG
+    if resolucion:
+        hueco_minimo_seg = max(hueco_minimo_seg, 2 * pd.Timedelta(resolucion).total_seconds())
+
+    # Huecos por medida; las medidas con el mismo hueco se piden juntas
+    cobertura = []
+    pedidos = {}
+    for key in MEDIDAS:
+        huecos = calcular_huecos(data.get(key, pd.DataFrame()), fecha_inicio, fecha_fin, hueco_minimo_seg)
+        for ini, fin in _complemento(fecha_inicio, fecha_fin, huecos):
+            cobertura.append({"medida": key, "inicio": ini, "fin": fin, "fuente": "influx2"})
+        for hueco in huecos:
+            pedidos.setdefault(hueco, []).append(key)
+
+    if not pedidos:
+        return data, cobertura, fallidas
+
+    logger.warning(f"[Fallback parcial] {len(pedidos)} intervalos sin datos en InfluxDB 2.7")
+    logger.info("🔁 Complementando solo esos intervalos con InfluxDB 1.8...")
+
+    if len(pedidos) > FALLBACK_MAX_CONSULTAS:
+        # Muchos huecos: una consulta que los cubre en lugar de una ida y vuelta por hueco
+        ini, fin = min(h[0] for h in pedidos), max(h[1] for h in pedidos)
+        medidas = [m for m in MEDIDAS if any(m in ms for ms in pedidos.values())]
+        logger.info(f"Una sola consulta a InfluxDB 1.8 para {len(pedidos)} huecos: {ini} - {fin}")
+        cubre = busqueda_influx1(ini, fin, location, estricto=estricto, medidas=medidas,
+                                 resolucion=resolucion, agregacion=agregacion, fallidas=fallidas)
+
+        def consultar_hueco(ini, fin, medidas):
+            desde, hasta = utc_a_local_naive(ini), utc_a_local_naive(fin)
+            parcial = {}
+            for m in medidas:
+                df = cubre.get(m, pd.DataFrame())
+                parcial[m] = df[df["time"].between(desde, hasta)] if not df.empty else df
+            return parcial
+    else:
+        def consultar_hueco(ini, fin, medidas):
+            return busqueda_influx1(ini, fin, location, estricto=estricto, medidas=medidas,
+                                    resolucion=resolucion, agregacion=agregacion, fallidas=fallidas)
+
+    complementos = {}
+    for (ini, fin), medidas in sorted(pedidos.items()):
+        parcial = consultar_hueco(ini, fin, medidas)
+        for key in medidas:
+            df = parcial.get(key, pd.DataFrame())
+            fuente = "influx1" if not df.empty else "sin_datos"
+            cobertura.append({"medida": key, "inicio": ini, "fin": fin, "fuente": fuente})
+            if not df.empty:
+                complementos.setdefault(key, []).append(df)
+
+    for key, partes in complementos.items():
+        df = pd.concat([data.get(key, pd.DataFrame())] + partes, ignore_index=True)
+        # Ante timestamps repetidos se conserva el dato de InfluxDB 2.7
+        df = df.drop_duplicates(subset="time", keep="first").sort_values("time").reset_index(drop=True)
+        data[key] = df
+
+    # Si InfluxDB 2.7 falló en una medida, solo cuenta como resuelta si 1.8 trajo datos
+    fallidas.update(k for k in fallidas2 if k not in complementos)
+    return data, cobertura, fallidas
+
+def _cobertura_fuente_unica(data, fecha_inicio, fecha_fin, fuente):
+    return [{"medida": key, "inicio": fecha_inicio, "fin": fecha_fin,
+             "fuente": fuente if not data.get(key, pd.DataFrame()).empty else "sin_datos"}
+            for key in MEDIDAS]
+
+
+def merge_data(dict_data, silenciar_warning=False, tolerancia=None):
+    """
+    Combina los DataFrames de cada medida en uno solo, ordenado por 'time'.
+    Usa la unión k-vías de data_merging en lugar de pd.merge sucesivos.
 
+    Args:
+        tolerancia (str): Timestamps a menos de esta distancia ('50ms') se alinean en
+            la misma fila. Por defecto MERGE_TOLERANCIA de config.
+    """
+    if tolerancia is None:
+        tolerancia = MERGE_TOLERANCIA
 
-def merge_data(dict_data, silenciar_warning=False):
     def fix_time(df):
         if '_time' in df.columns:
             df.rename(columns={'_time': 'time'}, inplace=True)
-        df['time'] = pd.to_datetime(df['time'], errors='coerce')
         return df
 
     dfs = [fix_time(df) for df in dict_data.values() if not df.empty]
@@ -160,7 +533,7 @@ def merge_data(dict_data, silenciar_warning=False):
         if not silenciar_warning:
             logger.warning("No hay DataFrames válidos para combinar")
         return pd.DataFrame()
-    df_combined = reduce(lambda left, right: pd.merge(left, right, on="time", how="outer"), dfs)
+    df_combined = merge_k_vias(dfs, on="time", tolerancia=tolerancia, indice_tiempo=False)
     df_combined.drop(columns=[col for col in df_combined.columns if "time" in col and col != "time"], inplace=True, errors='ignore')
 
     logger.info(f"DataFrames combinados en un único DataFrame con shape {df_combined.shape}")
@@ -169,14 +542,41 @@ def merge_data(dict_data, silenciar_warning=False):
 
 ######## Sección 2 del main ########
 
-def consultar_datos_influx(fecha_inicio, fecha_fin, location, output_dir=None, guardar=False):
+def consultar_datos_influx(fecha_inicio, fecha_fin, location, output_dir=None, guardar=False, ventana=None,
+                           resolucion=None, agregacion="mean", consulta_unica=None):
     """
     Consulta los datos en InfluxDB, los combina y devuelve el DataFrame.
     Opcionalmente guarda el resultado en disco.
+
+    Args:
+        ventana (str): Tamaño de ventana del planificador ('1D', '7D', ...).
+            Por defecto QUERY_VENTANA de config; '' consulta el rango en un solo pedido.
+        resolucion (str): Series agregadas en el servidor ('1m', '15m', '1h'). Por defecto
+            None, la resolución original de 10 s.
+        agregacion (str o list): Función/es por ventana (mean, min, max, last).
+        consulta_unica (bool): Pide las cinco medidas en una sola consulta Flux pivotada en
+            el servidor, sin merge en el cliente. Por defecto INFLUX2_CONSULTA_UNICA de config.
     """
+    if ventana is None:
+        ventana = QUERY_VENTANA
+    if consulta_unica is None:
+        consulta_unica = INFLUX2_CONSULTA_UNICA
+    buscar = busqueda_influx_unica if consulta_unica else busqueda_influx
+
     try:
         logger.info("Consultando InfluxDB ...")
-        data = busqueda_influx(fecha_inicio, fecha_fin, location)
+        if ventana:
+            data = consultar_por_ventanas(
+                lambda ini, fin: buscar(ini, fin, location, estricto=True,
+                                        resolucion=resolucion, agregacion=agregacion),
+                fecha_inicio, fecha_fin, ventana=ventana,
+                max_workers=QUERY_MAX_WORKERS, reintentos=QUERY_REINTENTOS,
+                espera_seg=QUERY_ESPERA_REINTENTO_SEG,
+                # La caché pide días UTC completos: ventanas cortadas en la medianoche UTC
+                alinear_dias=USE_CACHE
+            )
+        else:
+            data = buscar(fecha_inicio, fecha_fin, location, resolucion=resolucion, agregacion=agregacion)
         df = merge_data(data)
 
         # DEBUG: Verificar cuántas filas trajo cada fuente
@@ -189,6 +589,7 @@ def consultar_datos_influx(fecha_inicio, fecha_fin, location, output_dir=None, g
                 logger.info(f"📅 {key} - min: {df_ind['time'].min()} | max: {df_ind['time'].max()}")
                 
         logger.info(f"Datos InfluxDB: {df.shape}")
+        logger.info(f"Conexiones InfluxDB: {obtener_conector().estadisticas()}")
     except Exception as e:
         logger.error(f"Error en la consulta: {e}")
         return pd.DataFrame()
@@ -204,8 +605,6 @@ def consultar_datos_influx(fecha_inicio, fecha_fin, location, output_dir=None, g
     print(df.tail())
 
     if guardar and output_dir:
-        raw_path = os.path.join(output_dir, "df_raw.csv")
-        df.to_csv(raw_path, index=False)
-        logger.info(f"Datos crudos InfluxDB guardados en {os.path.abspath(raw_path)}")
+        guardar_artefacto(df, "df_raw", output_dir)
 
     return df
\ No newline at end of file
@@ -0,0 +1,130 @@
+# src/query_planner.py
+
+"""
+Planificador de consultas por ventanas de tiempo.
+Divide un rango largo [fecha_inicio, fecha_fin] en ventanas (un día, una semana, ...),
+las consulta con paralelismo acotado, reintenta solo las ventanas que fallan
+y une los resultados por medida en orden temporal.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils.logger import logger
+
+FORMATO_UTC = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def planificar_ventanas(fecha_inicio, fecha_fin, ventana="7D", alinear_dias=False):
+    """
+    Divide el rango en ventanas consecutivas.
+
+    Args:
+        fecha_inicio (str): Inicio del rango en UTC ('2024-01-01T03:00:00Z').
+        fecha_fin (str): Fin del rango en UTC.
+        ventana (str): Tamaño de ventana en formato pandas ('1D', '7D', '12h').
+        alinear_dias (bool): Corta las ventanas en la medianoche UTC, con un tamaño
+            redondeado a días completos. Con la caché, que amplía cada ventana a días
+            UTC completos, evita que dos ventanas vecinas pidan el mismo día.
+
+    Returns:
+        list: Lista de tuplas (inicio, fin) en el mismo formato UTC.
+    """
+    inicio = pd.Timestamp(fecha_inicio)
+    fin = pd.Timestamp(fecha_fin)
+    paso = pd.Timedelta(ventana)
+    if paso <= pd.Timedelta(0):
+        raise ValueError(f"Tamaño de ventana inválido: {ventana}")
+
+    corte = inicio + paso
+    if alinear_dias:
+        paso = max(paso.ceil("D"), pd.Timedelta(days=1))
+        corte = inicio.floor("D") + paso
+
+    ventanas = []
+    actual = inicio
+    while actual < fin:
+        siguiente = min(corte, fin)
+        ventanas.append((actual.strftime(FORMATO_UTC), siguiente.strftime(FORMATO_UTC)))
+        actual = siguiente
+        corte += paso
+    return ventanas
+
+
+def ejecutar_ventanas(fn_consulta, ventanas, max_workers=4, reintentos=2, espera_seg=5):
+    """
+    Ejecuta fn_consulta(inicio, fin) para cada ventana con un pool de hilos acotado.
+    Las ventanas que lanzan una excepción se reintentan por separado.
+
+    Returns:
+        tuple: (resultados, ventanas_fallidas). resultados tiene el mismo orden que
+        ventanas y None en las posiciones que fallaron en todos los intentos.
+    """
+    resultados = [None] * len(ventanas)
+    pendientes = list(range(len(ventanas)))
+
+    for intento in range(reintentos + 1):
+        if not pendientes:
+            break
+        if intento > 0:
+            logger.info(f"Reintento {intento}/{reintentos} de {len(pendientes)} ventanas")
+            time.sleep(espera_seg * intento)
+
+        fallidas = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pendientes)))) as pool:
+            futuros = {pool.submit(fn_consulta, *ventanas[i]): i for i in pendientes}
+            for futuro in as_completed(futuros):
+                i = futuros[futuro]
+                try:
+                    resultados[i] = futuro.result()
+                except Exception as e:
+                    logger.warning(f"Ventana {ventanas[i][0]} - {ventanas[i][1]} falló: {e}")
+                    fallidas.append(i)
+        pendientes = sorted(fallidas)
+
+    return resultados, [ventanas[i] for i in pendientes]
+
+
+def unir_resultados(resultados, on="time"):
+    """
+    Une los diccionarios {medida: DataFrame} de cada ventana en uno solo,
+    en orden temporal y sin timestamps repetidos en los bordes de ventana.
+    """
+    por_medida = {}
+    for data in resultados:
+        if not data:
+            continue
+        for medida, df in data.items():
+            if df is not None and not df.empty:
+                por_medida.setdefault(medida, []).append(df)
+
+    unido = {}
+    for medida, dfs in por_medida.items():
+        df = pd.concat(dfs, ignore_index=True)
+        if on in df.columns:
+            df = df.drop_duplicates(subset=on, keep="first")
+            if not df[on].is_monotonic_increasing:
+                df = df.sort_values(on)
+            df = df.reset_index(drop=True)
+        unido[medida] = df
+    return unido
+
+
+def consultar_por_ventanas(fn_consulta, fecha_inicio, fecha_fin, ventana="7D",
+                           max_workers=4, reintentos=2, espera_seg=5, alinear_dias=False):
+    """
+    Consulta un rango largo ventana por ventana y devuelve {medida: DataFrame}.
+    Si alguna ventana falla en todos los intentos se registra el error y se
+    devuelven los datos del resto del rango. alinear_dias: ver planificar_ventanas.
+    """
+    ventanas = planificar_ventanas(fecha_inicio, fecha_fin, ventana, alinear_dias)
+    logger.info(f"Consulta planificada en {len(ventanas)} ventanas de {ventana} "
+                f"(paralelismo {max_workers}, reintentos {reintentos})")
+
+    resultados, fallidas = ejecutar_ventanas(fn_consulta, ventanas, max_workers, reintentos, espera_seg)
+    if fallidas:
+        logger.error(f"{len(fallidas)} ventanas sin datos tras {reintentos} reintentos: {fallidas}")
+
+    return unir_resultados(resultados)
@@ -0,0 +1,116 @@
+# src/schema.py
+
+"""
+Esquema de los campos eléctricos medidos.
+Declara en un solo lugar cada campo con su medida de InfluxDB, fase, unidad, rango
+esperado y tipo de almacenamiento. Las consultas se arman a partir de este registro
+y todos los caminos de ingesta convierten al tipo declarado al decodificar:
+float32 para las magnitudes instantáneas y float64 para el contador de energía,
+que en float32 perdería resolución.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Sufijos que agregan las consultas con resolución y varias agregaciones (Vrms_L1_Ins_max)
+SUFIJOS_AGREGACION = ("_mean", "_min", "_max", "_last")
+
+
+class Campo:
+    def __init__(self, nombre, medida, fase, unidad, rango, dtype, descripcion):
+        self.nombre = nombre
+        self.medida = medida
+        self.fase = fase
+        self.unidad = unidad
+        self.rango = rango
+        self.dtype = np.dtype(dtype)
+        self.descripcion = descripcion
+
+    def __repr__(self):
+        return f"Campo({self.nombre}, {self.medida}, {self.unidad}, {self.dtype})"
+
+
+def _trifasico(prefijo, medida, unidad, rango, descripcion):
+    return [Campo(f"{prefijo}_{fase}_Ins", medida, fase, unidad, rango, np.float32, f"{descripcion} Fase {fase[-1]}")
+            for fase in ("L1", "L2", "L3")]
+
+
+CAMPOS = (
+    _trifasico("Vrms", "voltage", "V", (0.0, 300.0), "Tensión RMS Instantánea")
+    + _trifasico("THDV", "voltage", "%", (0.0, 100.0), "THD de Tensión")
+    + _trifasico("PowA", "power", "W", (-1e7, 1e7), "Potencia Activa Instantánea")
+    + _trifasico("PowS", "power", "VA", (0.0, 1e7), "Potencia Aparente Instantánea")
+    + [Campo("PowF_T_Ins", "power", "T", "", (-1.0, 1.0), np.float32, "Factor de Potencia Total Instantáneo"),
+       Campo("EA_I_IV_T", "energy", "T", "Wh", (0.0, None), np.float64, "Energía Activa Importada Total"),
+       Campo("Fre_Ins", "frequency", None, "Hz", (45.0, 55.0), np.float32, "Frecuencia Instantánea")]
+    + _trifasico("Irms", "current", "A", (0.0, 5000.0), "Corriente RMS Instantánea")
+    + _trifasico("THDI", "current", "%", (0.0, 100.0), "THD de Corriente")
+)
+
+ESQUEMA = {c.nombre: c for c in CAMPOS}
+
+# Orden de las medidas en las consultas
+MEDIDAS = ["voltage", "power", "energy", "frequency", "current"]
+
+
+def campos_por_medida():
+    """Devuelve {medida: [nombres de campo]} en el orden de MEDIDAS y del registro."""
+    return {m: [c.nombre for c in CAMPOS if c.medida == m] for m in MEDIDAS}
+
+
+def seleccionar(prefijos=None, medidas=None):
+    """Nombres de campo filtrados por prefijo ('PowA', 'THDI') y/o medida, en el orden del registro."""
+    return [c.nombre for c in CAMPOS
+            if (prefijos is None or c.nombre.startswith(tuple(prefijos)))
+            and (medidas is None or c.medida in medidas)]
+
+
+def campo_base(nombre):
+    """Nombre del campo sin el sufijo de agregación (Vrms_L1_Ins_max -> Vrms_L1_Ins)."""
+    if nombre not in ESQUEMA:
+        for sufijo in SUFIJOS_AGREGACION:
+            if nombre.endswith(sufijo) and nombre[:-len(sufijo)] in ESQUEMA:
+                return nombre[:-len(sufijo)]
+    return nombre
+
+
+def dtype_de(nombre, defecto=np.float32):
+    """Tipo de almacenamiento de una columna (también para columnas agregadas)."""
+    campo = ESQUEMA.get(campo_base(nombre))
+    return campo.dtype if campo is not None else np.dtype(defecto)
+
+
+def aplicar_esquema(df, columnas=None):
+    """
+    Convierte in place las columnas del esquema a su tipo declarado. Las columnas que
+    ya tienen el tipo correcto no se copian; las que no están en el esquema no se tocan.
+
+    Args:
+        columnas (list): Solo estas columnas (por defecto todas).
+
+    Returns:
+        pd.DataFrame: El mismo DataFrame.
+    """
+    for col in (df.columns if columnas is None else columnas):
+        campo = ESQUEMA.get(campo_base(col))
+        if campo is not None and df[col].dtype != campo.dtype:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(campo.dtype)
+    return df
+
+
+def fuera_de_rango(df):
+    """Cantidad de valores fuera del rango esperado por columna (solo columnas con alguno)."""
+    conteo = {}
+    for col in df.columns:
+        campo = ESQUEMA.get(campo_base(col))
+        if campo is None:
+            continue
+        minimo, maximo = campo.rango
+        fuera = pd.Series(False, index=df.index)
+        if minimo is not None:
+            fuera |= df[col] < minimo
+        if maximo is not None:
+            fuera |= df[col] > maximo
+        if fuera.any():
+            conteo[col] = int(fuera.sum())
+    return conteo
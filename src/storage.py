@@ -0,0 +1,193 @@
+# src/storage.py
+
+"""
+Almacenamiento de los artefactos intermedios del pipeline (df_raw, df_clean, df_norm,
+series de anomalías, huecos, ...).
+
+Los artefactos se guardan en formato columnar (Parquet o Feather) con los tipos de
+cada columna ('time' como datetime, mediciones en float32) y compresión, y se leen
+con memory map y solo las columnas pedidas; en Parquet, además, el filtro por 'time'
+descarta grupos de filas completos sin leerlos. Sin pyarrow, o con formato 'csv',
+se usa CSV.
+
+Se referencian por nombre sin extensión ('df_clean'): la lectura busca primero el
+formato configurado y después los demás, así los CSV viejos se siguen leyendo hasta
+convertirlos con convertir_csv:
+
+    python src/storage.py data/raw --formato parquet --borrar
+"""
+
+import os
+import glob
+import argparse
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+from config import OUTPUT_DIR, ARTEFACTOS_FORMATO, ARTEFACTOS_COMPRESION
+from schema import aplicar_esquema
+from utils.logger import logger
+
+FORMATOS = ("parquet", "feather", "csv")
+EXTENSIONES = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+
+
+def _formato(formato):
+    formato = formato or ARTEFACTOS_FORMATO
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de artefacto inválido: {formato} (opciones: {', '.join(FORMATOS)})")
+    if formato != "csv" and not PYARROW_DISPONIBLE:
+        logger.warning(f"pyarrow no está instalado: los artefactos se guardan en CSV en lugar de {formato}")
+        return "csv"
+    return formato
+
+
+def ruta_artefacto(nombre, directorio=None, formato=None):
+    """Ruta del artefacto `nombre` en el formato indicado (o el de config)."""
+    return os.path.join(directorio or OUTPUT_DIR, nombre + EXTENSIONES[_formato(formato)])
+
+
+def _buscar(nombre, directorio):
+    """Ruta existente del artefacto: el formato configurado primero, después el resto."""
+    base = os.path.join(directorio or OUTPUT_DIR, nombre)
+    if os.path.splitext(nombre)[1] in EXTENSIONES.values():
+        candidatos = [base]
+    else:
+        orden = [_formato(None)] + [f for f in FORMATOS if f != _formato(None)]
+        candidatos = [base + EXTENSIONES[f] for f in orden]
+    for ruta in candidatos:
+        if os.path.exists(ruta):
+            return ruta
+    raise FileNotFoundError(f"No existe el artefacto '{nombre}' en {directorio or OUTPUT_DIR}")
+
+
+def _con_esquema(df):
+    """
+    Copia de df con las mediciones en el tipo del esquema. Solo se convierten las
+    columnas numéricas: las etiquetas de los detectores llevan el nombre de la
+    medición pero son True/False/NaN.
+    """
+    numericas = [c for c in df.columns if df[c].dtype.kind in "iuf"]
+    return aplicar_esquema(df.copy(deep=False), numericas)
+
+
+def guardar_artefacto(df, nombre, directorio=None, formato=None, compresion=None):
+    """
+    Guarda df como artefacto, con las mediciones en el tipo del esquema (df no se
+    modifica). El índice no se guarda: si tiene información (por ejemplo, el tiempo
+    de las etiquetas de ADTK) pasar df.reset_index().
+
+    Args:
+        nombre (str): Nombre sin extensión ('df_clean').
+        formato (str): 'parquet', 'feather' o 'csv'; por defecto ARTEFACTOS_FORMATO.
+        compresion (str): Códec de Parquet/Feather ('zstd', 'lz4', 'snappy' o
+            'uncompressed'); por defecto ARTEFACTOS_COMPRESION.
+
+    Returns:
+        str: Ruta del archivo escrito.
+    """
+    formato = _formato(formato)
+    compresion = compresion or ARTEFACTOS_COMPRESION
+    ruta = ruta_artefacto(nombre, directorio, formato)
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+
+    # Columnas object armadas con concat sobre DataFrames vacíos: a su tipo real
+    df = _con_esquema(df.infer_objects())
+    tmp = ruta + ".tmp"
+    if formato == "parquet":
+        df.to_parquet(tmp, index=False, compression=compresion)
+    elif formato == "feather":
+        df.reset_index(drop=True).to_feather(tmp, compression=compresion)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, ruta)
+    logger.info(f"{nombre} guardado en {os.path.abspath(ruta)}")
+    return ruta
+
+
+def leer_artefacto(nombre, directorio=None, columnas=None, desde=None, hasta=None):
+    """
+    Lee un artefacto con memory map, solo las columnas pedidas.
+
+    Args:
+        nombre (str): Nombre sin extensión, o con extensión para un archivo concreto.
+        columnas (list): Columnas a leer (todas por defecto).
+        desde, hasta: Rango de 'time' (inclusive, hora local como en los artefactos).
+
+    Returns:
+        pd.DataFrame: Con 'time' como datetime y las mediciones con el tipo del esquema.
+    """
+    ruta = _buscar(nombre, directorio)
+    filtra = desde is not None or hasta is not None
+    leer = list(columnas) if columnas is not None else None
+    if filtra and leer is not None and "time" not in leer:
+        leer.append("time")
+
+    if ruta.endswith(".parquet"):
+        filtros = []
+        if desde is not None:
+            filtros.append(("time", ">=", pd.Timestamp(desde)))
+        if hasta is not None:
+            filtros.append(("time", "<=", pd.Timestamp(hasta)))
+        df = pq.read_table(ruta, columns=leer, filters=filtros or None, memory_map=True).to_pandas()
+    elif ruta.endswith(".feather"):
+        df = feather.read_table(ruta, columns=leer, memory_map=True).to_pandas()
+    else:
+        df = pd.read_csv(ruta, usecols=leer, low_memory=False)
+        df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed:")])
+        if "time" in df.columns:
+            df["time"] = pd.to_datetime(df["time"])
+    # Artefactos escritos antes de tipar al guardar pueden traer float64
+    df = _con_esquema(df)
+
+    if filtra and not ruta.endswith(".parquet"):
+        mascara = pd.Series(True, index=df.index)
+        if desde is not None:
+            mascara &= df["time"] >= pd.Timestamp(desde)
+        if hasta is not None:
+            mascara &= df["time"] <= pd.Timestamp(hasta)
+        df = df[mascara].reset_index(drop=True)
+    if columnas is not None:
+        df = df[list(columnas)]
+    return df
+
+
+def convertir_csv(origen, formato=None, borrar=False):
+    """
+    Convierte CSV viejos (un archivo o todos los *.csv de un directorio) al formato
+    columnar, con 'time' como datetime y los tipos del esquema.
+
+    Args:
+        borrar (bool): Borra cada CSV después de convertirlo.
+
+    Returns:
+        list: Rutas de los archivos escritos.
+    """
+    formato = _formato(formato)
+    if formato == "csv":
+        raise ValueError("convertir_csv necesita un formato columnar ('parquet' o 'feather')")
+    archivos = sorted(glob.glob(os.path.join(origen, "*.csv"))) if os.path.isdir(origen) else [origen]
+    escritos = []
+    for archivo in archivos:
+        directorio, nombre = os.path.split(archivo)
+        df = leer_artefacto(nombre, directorio)
+        escritos.append(guardar_artefacto(df, os.path.splitext(nombre)[0], directorio, formato))
+        if borrar:
+            os.remove(archivo)
+        logger.info(f"Convertido {archivo} ({len(df)} filas) a {formato}")
+    return escritos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte artefactos CSV a Parquet o Feather")
+    parser.add_argument("origen", nargs="?", default=OUTPUT_DIR, help="Archivo CSV o directorio con CSV")
+    parser.add_argument("--formato", choices=["parquet", "feather"], default=None)
+    parser.add_argument("--borrar", action="store_true", help="Borra los CSV convertidos")
+    args = parser.parse_args()
+    convertir_csv(args.origen, args.formato, args.borrar)
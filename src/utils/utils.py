@@ -43,6 +43,22 @@ def convert_df_utc_to_local(df, time_column='time'):
         df[time_column] = df[time_column].dt.tz_localize(None)
     return df
 
+def local_naive_a_utc(serie):
+    """
+    Inversa de convert_df_utc_to_local: convierte una serie de timestamps en hora
+    local sin zona horaria a UTC sin zona horaria.
+    """
+    serie = pd.to_datetime(serie, errors="coerce")
+    serie = serie.dt.tz_localize(LOCAL_TIMEZONE, ambiguous="NaT", nonexistent="shift_forward")
+    return serie.dt.tz_convert("UTC").dt.tz_localize(None)
+
+def utc_a_local_naive(fecha_utc):
+    """Convierte una fecha UTC ('2024-01-01T03:00:00Z') a Timestamp local sin zona horaria."""
+    ts = pd.Timestamp(fecha_utc)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.tz_convert(LOCAL_TIMEZONE).tz_localize(None)
+
 import os
 import json
 from datetime import datetime
@@ -24,3 +24,32 @@ def test_preprocess_removes_all_nulls():
     result = preprocess_data(df)
     assert result.empty, "Debe devolver un DataFrame vacío si todos los valores son nulos"
 
+
+def test_preprocess_inplace_y_stats():
+    df = pd.DataFrame({
+        "time": pd.to_datetime(["2024-01-01 00:00:00", "2024-01-01 00:00:10",
+                                "2024-01-01 00:00:10", "2024-01-01 00:00:20"]),
+        "a": [1.0, 2.0, 3.0, None],
+        "b": [4.0, 5.0, 6.0, 7.0],
+    })
+    esperado = preprocess_data(df.copy(), silenciar_logs=True)
+
+    result, stats = preprocess_data(df, silenciar_logs=True, inplace=True, devolver_stats=True)
+    assert result is df, "En modo inplace debe devolver el mismo DataFrame"
+    pd.testing.assert_frame_equal(result, esperado)
+    assert list(result["a"]) == [1.0, 2.0]
+    assert stats.duplicados_time == 1
+    assert stats.filas_con_nulos == 1
+    assert stats.nulos == {"a": 1}
+    assert stats.forma_final == (2, 3)
+    assert stats.media["b"] == pytest.approx(4.5)
+
+
+def test_preprocess_inplace_con_indice_repetido():
+    df = pd.DataFrame({"a": [1.0, 2.0, None, 4.0], "b": [5.0, 6.0, 7.0, 8.0]}, index=[0, 0, 1, 1])
+    esperado = preprocess_data(df.copy(), silenciar_logs=True)
+
+    result = preprocess_data(df, silenciar_logs=True, inplace=True)
+    assert len(esperado) == 3
+    pd.testing.assert_frame_equal(result, esperado)
+    assert list(result.index) == [0, 0, 1]
@@ -0,0 +1,37 @@
+# tests/test_data_merging.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+from data_processing.data_merging import merge_k_vias
+
+def test_merge_k_vias_equivale_a_outer_merge_ordenado():
+    t = pd.date_range("2024-01-01", periods=6, freq="10s")
+    a = pd.DataFrame({"time": t[[3, 0, 1, 5]], "x": np.array([3, 0, 1, 5], dtype=np.float32)})
+    b = pd.DataFrame({"time": t[[0, 2, 3]], "y": [10.0, 12.0, 13.0]})
+    c = pd.DataFrame({"time": t[[4]], "z": [7]})
+
+    esperado = reduce(lambda l, r: pd.merge(l, r, on="time", how="outer"), [a, b, c])
+    esperado = esperado.sort_values("time").reset_index(drop=True)
+    resultado = merge_k_vias([a, b, c], indice_tiempo=False)
+
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False)
+    assert resultado["x"].dtype == np.float32
+
+    indexado = merge_k_vias([a, b, c])
+    assert isinstance(indexado.index, pd.DatetimeIndex) and indexado.index.is_monotonic_increasing
+
+def test_merge_k_vias_con_tolerancia():
+    a = pd.DataFrame({"time": pd.to_datetime(["2024-01-01 00:00:00", "2024-01-01 00:00:10"]), "x": [1.0, 2.0]})
+    b = pd.DataFrame({"time": pd.to_datetime(["2024-01-01 00:00:00.004", "2024-01-01 00:00:10.002"]), "y": [3.0, 4.0]})
+
+    assert len(merge_k_vias([a, b])) == 4
+    resultado = merge_k_vias([a, b], tolerancia="10ms")
+    assert len(resultado) == 2
+    assert resultado.notna().all().all()
+    assert list(resultado.index) == list(a["time"])
@@ -0,0 +1,102 @@
+# tests/test_detectores.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from adtk.detector import LevelShiftAD, VolatilityShiftAD, AutoregressionAD
+from models.detectores import DetectorCambioNivel, DetectorCambioVolatilidad, DetectorAutoregresion
+
+
+@pytest.fixture
+def serie():
+    rng = np.random.default_rng(1)
+    n = 6000
+    x = np.cumsum(rng.normal(size=(n, 3)), axis=0)
+    x[2500:, 0] += 30
+    x[4000:4300, 1] *= 5
+    x[rng.integers(0, n, 15), 2] = np.nan
+    return pd.DataFrame(x.astype(np.float32), index=pd.date_range('2024-01-01', periods=n, freq='10s'),
+                        columns=['PowA_L1_Ins', 'PowF_T_Ins', 'THDI_L1_Ins'])
+
+
+CASOS = [(LevelShiftAD, DetectorCambioNivel, 40, 3.0), (VolatilityShiftAD, DetectorCambioVolatilidad, 200, 2.0)]
+
+
+@pytest.mark.parametrize("lado", ["both", "positive"])
+@pytest.mark.parametrize("adtk, nativo, ventana, c", CASOS)
+def test_lote_y_streaming_iguales_a_adtk(serie, adtk, nativo, ventana, c, lado):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        esperado = adtk(c=c, side=lado, window=ventana).fit_detect(serie)
+
+    detector = nativo(ventana, c=c, lado=lado)
+    marcas = detector.fit_detect(serie)
+    pd.testing.assert_frame_equal(marcas, esperado)
+    assert esperado.sum().sum() > 0
+
+    # Reproduciendo la serie muestra a muestra: mismas marcas, `retardo` muestras después
+    detector.reiniciar()
+    decisiones = [detector.update(fila, t) for t, fila in serie.iterrows()]
+    assert all(d is None for d in decisiones[:2 * ventana - 1])
+    assert detector.tiempo_decision == serie.index[-1 - detector.retardo]
+    np.testing.assert_array_equal(np.array(decisiones[2 * ventana - 1:]),
+                                  marcas.to_numpy(dtype=float)[ventana:len(serie) - ventana + 1])
+
+
+@pytest.mark.parametrize("adtk, nativo, ventana, c", CASOS)
+def test_fit_deja_el_streaming_al_final_de_la_historia(serie, adtk, nativo, ventana, c):
+    historia, nuevas = serie.iloc[:4000], serie.iloc[4000:]
+    detector = nativo(ventana, c=c).fit(historia)
+    decisiones = np.array([detector.update(fila.to_numpy()) for _, fila in nuevas.iterrows()])
+
+    # Con los umbrales de la historia, las decisiones siguen la serie completa sin hueco
+    completa = detector.detect(serie).to_numpy(dtype=float)
+    np.testing.assert_array_equal(decisiones, completa[len(historia) - detector.retardo:len(serie) - detector.retardo])
+
+
+def test_autoregresion_igual_a_adtk(serie):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        esperado = AutoregressionAD(n_steps=20, step_size=4, c=3.0).fit_detect(serie)
+
+    detector = DetectorAutoregresion(20, 4, c=3.0)
+    marcas = detector.fit_detect(serie)
+    pd.testing.assert_frame_equal(marcas, esperado)
+    assert esperado.sum().sum() > 0
+
+    # El residuo es causal: update decide la misma muestra que recibe
+    detector.reiniciar()
+    decisiones = [detector.update(fila) for _, fila in serie.iterrows()]
+    assert all(d is None for d in decisiones[:80])
+    np.testing.assert_array_equal(np.array(decisiones[80:]), marcas.to_numpy(dtype=float)[80:])
+
+
+def test_autoregresion_recursiva_igual_al_ajuste_completo(serie):
+    x = serie.to_numpy(dtype=np.float64)
+    # Sin marcas (c enorme) todas las muestras actualizan: RLS termina en el ajuste de toda la serie
+    recursivo = DetectorAutoregresion(5, 2, c=1e9, recursivo=True).fit(x[:3000])
+    for fila in x[3000:]:
+        recursivo.update(fila)
+    completo = DetectorAutoregresion(5, 2, c=1e9).fit(x)
+
+    residuo_recursivo, residuo_completo = recursivo.diferencias(x)[1], completo.diferencias(x)[1]
+    np.testing.assert_allclose(residuo_recursivo, residuo_completo, atol=1e-8)
+
+
+def test_subclase_incompleta_falla_al_instanciar():
+    from models.detectores import _DetectorCambio
+
+    class SinDiferencia(_DetectorCambio):
+        def _estadisticas_moviles(self, x):
+            return x
+
+        def _ventana_movil(self, columnas):
+            return None
+
+    with pytest.raises(TypeError, match="_diferencia"):
+        SinDiferencia(10)
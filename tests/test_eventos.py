@@ -0,0 +1,49 @@
+# tests/test_eventos.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+from models.eventos import segmentar_eventos
+from models.anomaly_detection import filtrar_eventos_unicos
+
+
+def _etiquetas(marcadas, filas=2000, columnas=('PowA_L1_Ins',)):
+    t = pd.date_range('2024-03-01', periods=filas, freq='10s')
+    df = pd.DataFrame(False, index=t, columns=list(columnas))
+    for col, posiciones in marcadas.items():
+        df.iloc[posiciones, df.columns.get_loc(col)] = True
+    return df
+
+
+def test_separacion_igual_a_filtrar_eventos_unicos():
+    # Racha de 400 muestras: con separación de 300 se parte en dos eventos
+    lab = _etiquetas({'PowA_L1_Ins': list(range(100, 500)) + [505, 1500]})
+    lab.iloc[50, 0] = np.nan  # ADTK deja NaN en los bordes
+
+    eventos = segmentar_eventos(lab, min_sep=300)
+    esperado = filtrar_eventos_unicos(lab, min_sep=300)
+    assert list(eventos['inicio']) == list(esperado.index)
+    assert eventos['muestras'].tolist() == [301, 100, 1]
+    assert eventos['duracion_seg'].tolist() == [3000.0, 1040.0, 0.0]
+
+
+def test_rachas_detectores_y_pico():
+    lab = {
+        "LevelShift": _etiquetas({'PowA_L1_Ins': range(100, 110)}),
+        "AutoReg": _etiquetas({'THDI_L1_Ins': [108, 112, 900]}, columnas=('THDI_L1_Ins',)),
+    }
+    eventos = segmentar_eventos(lab, min_sep=5, modo="rachas")
+    assert len(eventos) == 2
+    primero = eventos.iloc[0]
+    assert primero['detectores'] == "LevelShift,AutoReg" and primero['muestras'] == 11
+    assert primero['fin'] == pd.Timestamp('2024-03-01') + pd.Timedelta(seconds=1120)
+    # Sin valores, el pico es la muestra con más detectores
+    assert primero['pico'] == pd.Timestamp('2024-03-01') + pd.Timedelta(seconds=1080)
+    assert eventos.iloc[1]['detectores'] == "AutoReg"
+
+    valores = pd.Series(np.arange(2000.0), index=lab["LevelShift"].index)
+    assert segmentar_eventos(lab, min_sep=5, modo="rachas", valores=-valores)['pico'].iloc[0] == primero['fin']
+    assert segmentar_eventos(_etiquetas({}), min_sep=5).empty
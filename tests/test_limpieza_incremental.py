@@ -0,0 +1,63 @@
+# tests/test_limpieza_incremental.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_processing.data_cleaning import preprocess_data
+from data_processing.limpieza_incremental import LimpiadorIncremental
+
+
+def _datos(n=300, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "time": pd.date_range("2024-01-01", periods=n, freq="10s"),
+        "a": rng.normal(100, 5, n),
+        "b": rng.normal(0.9, 0.01, n),
+    })
+    df.loc[[20, 150], "a"] = np.nan
+    df.loc[40, "b"] = 5.0  # outlier
+    # Timestamps repetidos: el primero gana, incluso si tiene NaN
+    return pd.concat([df, df.iloc[[10, 20, 60]]]).sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def test_limpieza_incremental_coincide_con_batch():
+    df = _datos()
+    esperado, stats = preprocess_data(df.copy(), silenciar_logs=True, devolver_stats=True)
+
+    limpiador = LimpiadorIncremental(["a", "b"])
+    partes = [limpiador.agregar(df.iloc[[i]])[0] for i in range(len(df))]
+    resultado = pd.concat(partes)
+
+    pd.testing.assert_frame_equal(resultado, esperado)
+    assert limpiador.descartadas == {"duplicado": stats.duplicados_time, "nulos": stats.filas_con_nulos}
+    for j, col in enumerate(limpiador.columnas):
+        assert limpiador.media[j] == pytest.approx(stats.media[col])
+        assert np.sqrt(limpiador.varianza[j]) == pytest.approx(stats.desvio[col])
+
+
+def test_limpieza_incremental_marca_outliers_contra_historico():
+    df = _datos()
+    _, stats = preprocess_data(df.copy(), silenciar_logs=True, devolver_stats=True)
+    limpiador = LimpiadorIncremental.desde_stats(stats, ["a", "b"])
+
+    nueva = pd.DataFrame({"time": [pd.Timestamp("2024-02-01")], "a": [100.0], "b": [2.0]})
+    aceptadas, marcas = limpiador.agregar(nueva)
+    assert len(aceptadas) == 1
+    assert marcas.loc[0, "b"] and not marcas.loc[0, "a"]
+
+    # Mismo timestamp: se descarta por el cursor
+    aceptadas, _ = limpiador.agregar(nueva)
+    assert aceptadas.empty
+    assert limpiador.descartadas["duplicado"] == 1
+
+
+def test_limpieza_incremental_ewma():
+    limpiador = LimpiadorIncremental(["a"], alfa=0.5, min_muestras=1)
+    for i, v in enumerate([10.0, 20.0, 20.0]):
+        limpiador.agregar(pd.DataFrame({"time": [pd.Timestamp("2024-01-01") + pd.Timedelta(seconds=i)],
+                                        "a": [v]}))
+    assert limpiador.media[0] == pytest.approx(17.5)
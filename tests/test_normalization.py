@@ -6,6 +6,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 
 import pandas as pd
 import numpy as np
+import pytest
 from data_processing.data_cleaning import normalize_all_numeric
 
 def test_normalization_range():
@@ -17,4 +18,36 @@ def test_normalization_range():
 
     assert (norm_df >= 0).all().all(), "Todos los valores deben ser >= 0"
     assert (norm_df <= 1).all().all(), "Todos los valores deben ser <= 1"
-    assert norm_df.shape == df.shape, "El shape debe mantenerse tras la normalización"
\ No newline at end of file
+    assert norm_df.shape == df.shape, "El shape debe mantenerse tras la normalización"
+
+
+def test_escalador_inverse_y_persistencia(tmp_path):
+    from data_processing.normalization import Escalador
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"time": pd.date_range("2024-01-01", periods=200, freq="10s"),
+                       "x": rng.normal(50, 5, 200), "y": rng.uniform(0, 1, 200).astype("float32")})
+
+    for metodo in ("minmax", "zscore", "robusto"):
+        esc = Escalador(metodo).fit(df)
+        norm = esc.transform(df)
+        assert norm["y"].dtype == np.float32
+        pd.testing.assert_frame_equal(esc.inverse_transform(norm), df, rtol=1e-5, atol=1e-6)
+
+        ruta = tmp_path / f"{metodo}.json"
+        esc.guardar(str(ruta))
+        pd.testing.assert_frame_equal(Escalador.cargar(str(ruta)).transform(df), norm)
+
+
+def test_escalador_partial_fit_igual_a_fit():
+    from data_processing.normalization import Escalador
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"x": rng.normal(220, 3, 1000)})
+    for metodo in ("minmax", "zscore", "robusto"):
+        completo = Escalador(metodo).fit(df)
+        partes = Escalador(metodo)
+        for i in range(0, 1000, 300):
+            partes.partial_fit(df.iloc[i:i + 300])
+        assert partes.centro["x"] == pytest.approx(completo.centro["x"])
+        assert partes.escala["x"] == pytest.approx(completo.escala["x"])
+    z = Escalador("zscore").fit(df)
+    assert z.escala["x"] == pytest.approx(df["x"].std(ddof=0))
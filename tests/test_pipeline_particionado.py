@@ -0,0 +1,92 @@
+# tests/test_pipeline_particionado.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_processing.data_cleaning import preprocess_data, normalize_all_numeric
+from models.anomaly_detection import filtrar_eventos_unicos, generate_ts_anomalies
+from ejecucion_particionada.pipeline_particionado import planificar_particiones, ejecutar_particionado
+
+LIST_COLS = ['time', 'PowA_L1_Ins', 'THDI_L1_Ins']
+INICIO, FIN = '2024-03-01T03:00:00Z', '2024-03-02T03:00:00Z'
+# Picos: uno pegado al final de una partición, otro a menos de 300 muestras del mismo
+# (en la partición siguiente, no es un evento nuevo) y otro en las primeras filas de una partición
+PICOS = [1500, 2150, 2180, 4330, 6490, 7000]
+
+
+def _rango_completo():
+    t = pd.date_range('2024-03-01 00:00:00', '2024-03-02 00:00:00', freq='10s')
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'time': t,
+        'PowA_L1_Ins': (np.sin(np.arange(len(t)) / 500) + rng.normal(0, 0.05, len(t))).astype(np.float32),
+        'THDI_L1_Ins': rng.normal(5, 1, len(t)).astype(np.float32),
+    })
+    df.loc[PICOS, 'PowA_L1_Ins'] = 20
+    df.loc[[100, 3000, 5000], 'THDI_L1_Ins'] = np.nan
+    return df
+
+
+def _consultar(ini, fin, location):
+    # Como InfluxQL: el extremo final se incluye y llega repetido en la partición siguiente
+    df = _rango_completo()
+    ini, fin = (pd.Timestamp(x).tz_localize(None) - pd.Timedelta(hours=3) for x in (ini, fin))
+    return df[(df['time'] >= ini) & (df['time'] <= fin)].reset_index(drop=True)
+
+
+def _detectar(df):
+    return {"LevelShift": df.set_index('time')[['PowA_L1_Ins']] > 0.5}
+
+
+def test_planificar_particiones_por_mes_y_por_tamano():
+    meses = planificar_particiones('2024-01-15T03:00:00Z', '2024-03-10T03:00:00Z', 'MS')
+    assert meses == [('2024-01-15T03:00:00Z', '2024-02-01T03:00:00Z'),
+                     ('2024-02-01T03:00:00Z', '2024-03-01T03:00:00Z'),
+                     ('2024-03-01T03:00:00Z', '2024-03-10T03:00:00Z')]
+    assert len(planificar_particiones(INICIO, FIN, '6h')) == 4
+    assert len(planificar_particiones(INICIO, FIN, 'D')) == 1
+
+
+def test_particionado_igual_al_rango_completo(tmp_path):
+    df_st_anom, _, _, escalador, stats = ejecutar_particionado(
+        INICIO, FIN, "MEDIA", LIST_COLS, particion='6h', consultar=_consultar,
+        detectar=_detectar, usar_grilla=False, dir_trabajo=str(tmp_path)
+    )
+
+    # Limpieza y escalado de todo el rango, sin normalizar cada partición por separado
+    df_clean, stats_total = preprocess_data(_rango_completo(), silenciar_logs=True, devolver_stats=True)
+    df_norm, esc_total = normalize_all_numeric(df_clean, devolver_escalador=True)
+    assert stats.forma_original == stats_total.forma_original
+    assert stats.forma_final == stats_total.forma_final
+    assert stats.filas_con_nulos == stats_total.filas_con_nulos == 3
+    assert stats.outliers == stats_total.outliers
+    for c in stats_total.media:
+        assert stats.media[c] == pytest.approx(stats_total.media[c], rel=1e-6)
+        assert stats.desvio[c] == pytest.approx(stats_total.desvio[c], rel=1e-6)
+    assert escalador.centro == esc_total.centro and escalador.escala == esc_total.escala
+
+    # Mismos eventos y mismas series de contexto, aunque crucen bordes de partición
+    eventos = filtrar_eventos_unicos(_detectar(df_norm[LIST_COLS])["LevelShift"])
+    anom_total, _, _, n = generate_ts_anomalies(
+        eventos, df_norm[LIST_COLS].copy(), pd.DataFrame(columns=LIST_COLS),
+        pd.DataFrame(columns=LIST_COLS), LIST_COLS
+    )
+    assert n == 5 and len(df_st_anom) == n * 301
+    pd.testing.assert_frame_equal(df_st_anom.reset_index(drop=True), anom_total.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_detector_no_devuelto(tmp_path):
+    kwargs = dict(particion='6h', consultar=_consultar, usar_grilla=False, dir_trabajo=str(tmp_path))
+    with pytest.raises(ValueError, match="LevelShift"):
+        ejecutar_particionado(INICIO, FIN, "MEDIA", LIST_COLS, detector="AutoReg", detectar=_detectar, **kwargs)
+
+    # Sin salidas de ninguna partición las series vuelven vacías
+    df_st_anom, df_st_norm, df_resumen, _, _ = ejecutar_particionado(
+        INICIO, FIN, "MEDIA", LIST_COLS, detectar=lambda df: {}, **kwargs)
+    assert df_st_anom.empty and df_st_norm.empty
+    assert list(df_st_anom.columns) == LIST_COLS
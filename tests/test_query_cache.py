@@ -0,0 +1,75 @@
+# tests/test_query_cache.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import pandas as pd
+from query_cache import CacheConsultas
+from utils.utils import utc_a_local_naive
+
+fecha_inicio = '2024-03-01T00:00:00Z'
+fecha_fin = '2024-03-03T00:00:00Z'
+
+
+def _consulta_falsa(llamadas):
+    def consulta(ini, fin):
+        llamadas.append((ini, fin))
+        tiempos = pd.date_range(utc_a_local_naive(ini), utc_a_local_naive(fin), freq='1h', inclusive='left')
+        return {"power": pd.DataFrame({"time": tiempos, "PowA_L1_Ins": range(len(tiempos))})}
+    return consulta
+
+
+def test_cache_consulta_solo_intervalos_faltantes(tmp_path):
+    cache = CacheConsultas(directorio=str(tmp_path), max_bytes=10 ** 9)
+    llamadas = []
+
+    primera = cache.consultar(_consulta_falsa(llamadas), fecha_inicio, fecha_fin, 'MEDIA', ['power'])
+    assert llamadas == [('2024-03-01T00:00:00Z', '2024-03-03T00:00:00Z')]
+    assert len(primera["power"]) == 48
+
+    llamadas.clear()
+    segunda = cache.consultar(_consulta_falsa(llamadas), fecha_inicio, fecha_fin, 'MEDIA', ['power'])
+    assert llamadas == [], "Un rango histórico ya guardado no debe volver a consultarse"
+    pd.testing.assert_frame_equal(primera["power"], segunda["power"])
+
+
+def test_cache_invalidar_y_limite(tmp_path):
+    cache = CacheConsultas(directorio=str(tmp_path), max_bytes=10 ** 9)
+    llamadas = []
+    cache.consultar(_consulta_falsa(llamadas), fecha_inicio, fecha_fin, 'MEDIA', ['power'])
+
+    assert cache.invalidar(location='MEDIA', desde='2024-03-02', hasta='2024-03-02') == 1
+    assert cache.intervalos_faltantes('MEDIA', ['power'], fecha_inicio, fecha_fin) == [
+        ('2024-03-02T00:00:00Z', '2024-03-03T00:00:00Z')]
+
+    cache.max_bytes = 1
+    cache.aplicar_limite()
+    assert cache.tamano_total() == 0
+
+
+def test_cache_no_guarda_medidas_fallidas(tmp_path):
+    cache = CacheConsultas(directorio=str(tmp_path), max_bytes=10 ** 9)
+    llamadas = []
+    caida = [True]
+
+    def consulta(ini, fin):
+        data = _consulta_falsa(llamadas)(ini, fin)
+        if caida[0]:
+            # Falla transitoria de "thd": vuelve vacía pero marcada como fallida
+            return {**data, "thd": pd.DataFrame()}, {"thd"}
+        return {**data, "thd": data["power"].rename(columns={"PowA_L1_Ins": "THDI_L1_Ins"})}, set()
+
+    primera = cache.consultar(consulta, fecha_inicio, fecha_fin, 'MEDIA', ['power', 'thd'])
+    assert primera["thd"].empty
+    assert cache.intervalos_faltantes('MEDIA', ['power'], fecha_inicio, fecha_fin) == []
+
+    caida[0] = False
+    llamadas.clear()
+    segunda = cache.consultar(consulta, fecha_inicio, fecha_fin, 'MEDIA', ['power', 'thd'])
+    assert llamadas == [('2024-03-01T00:00:00Z', '2024-03-03T00:00:00Z')], "La medida fallida debe volver a pedirse"
+    assert len(segunda["thd"]) == 48
+
+    # Sin informar fallidas, una medida vacía tampoco se guarda
+    cache.guardar('MEDIA', {"voltage": pd.DataFrame()}, fecha_inicio, fecha_fin)
+    assert cache.intervalos_faltantes('MEDIA', ['voltage'], fecha_inicio, fecha_fin) != []
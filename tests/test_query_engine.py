@@ -14,15 +14,263 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 
 from query_engine import busqueda_influx, merge_data
 import pandas as pd
+import pytest
 
 # Parámetros de prueba (ajustar si es necesario)
 fecha_inicio = '2023-08-01T00:00:00Z'
 fecha_fin = '2023-08-02T00:00:00Z'
 location = 'MEDIA'
 
-def test_merge_data_includes_time():
+@pytest.fixture
+def backend_sintetico(monkeypatch, tmp_path):
+    """Responde las consultas con el backend sintético y una caché temporal, sin red."""
+    import query_engine
+    from db_connector import DBConnector
+    from backends import BackendSintetico
+    from query_cache import CacheConsultas
+
+    conector = DBConnector(backend=BackendSintetico())
+    monkeypatch.setattr(query_engine, "obtener_conector", lambda: conector)
+    monkeypatch.setattr(query_engine, "obtener_cache", lambda: CacheConsultas(str(tmp_path)))
+    return conector
+
+def test_merge_data_includes_time(backend_sintetico):
     data = busqueda_influx(fecha_inicio, fecha_fin, location) #ACAAAAAAAA
     df = merge_data(data)
     assert not df.empty, "La consulta no debe devolver un DataFrame vacío"
     assert 'time' in df.columns, "El DataFrame combinado debe contener la columna 'time'"
     assert pd.api.types.is_datetime64_any_dtype(df['time']), "La columna 'time' debe ser tipo datetime"
+
+
+class _QueryApiFalsa:
+    def query_data_frame(self, query):
+        return pd.DataFrame({
+            "_time": pd.to_datetime(["2023-08-01T00:00:00Z", "2023-08-01T00:00:10Z"]),
+            "_start": [0, 0],
+            "valor": [1.0, 2.0]
+        })
+
+
+class _ClienteFalso:
+    def query_api(self):
+        return _QueryApiFalsa()
+
+
+def test_busqueda_influx2_concurrente_mantiene_forma(monkeypatch):
+    import query_engine
+    from db_connector import DBConnector
+    monkeypatch.setattr(DBConnector, "connect_influxdb2", lambda self: _ClienteFalso())
+    monkeypatch.setattr(query_engine, "obtener_conector", DBConnector)
+
+    data, tiempos = query_engine.busqueda_influx2(fecha_inicio, fecha_fin, location,
+                                                  concurrente=True, devolver_tiempos=True,
+                                                  streaming=False)
+    assert set(data) == {"voltage", "power", "energy", "frequency", "current"}
+    assert set(tiempos) == set(data)
+    assert all(list(df.columns) == ["time", "valor"] for df in data.values())
+
+
+def test_fallback_pide_a_influx1_solo_los_huecos(monkeypatch):
+    import query_engine
+    from utils.utils import utc_a_local_naive
+
+    def serie(ini, fin):
+        tiempos = pd.date_range(utc_a_local_naive(ini), utc_a_local_naive(fin), freq='10s')
+        return pd.DataFrame({"time": tiempos, "valor": 1.0})
+
+    # InfluxDB 2.7 arranca tarde en "power"; el resto está completo
+    def influx2_falso(ini, fin, loc, **kwargs):
+        data = {m: serie(ini, fin) for m in query_engine.MEDIDAS}
+        data["power"] = serie('2023-08-01T06:00:00Z', fin)
+        return data
+
+    pedidos = []
+
+    def influx1_falso(ini, fin, loc, estricto=False, medidas=None, **kwargs):
+        pedidos.append((ini, fin, tuple(medidas)))
+        return {m: serie(ini, fin).assign(valor=2.0) for m in medidas}
+
+    monkeypatch.setattr(query_engine, "busqueda_influx2", influx2_falso)
+    monkeypatch.setattr(query_engine, "busqueda_influx1", influx1_falso)
+
+    data, cobertura = query_engine.busqueda_influx(fecha_inicio, fecha_fin, location,
+                                                   usar_cache=False, devolver_cobertura=True)
+
+    assert pedidos == [('2023-08-01T00:00:00Z', '2023-08-01T06:00:00Z', ('power',))]
+    assert data["power"]["time"].is_unique and data["power"]["time"].is_monotonic_increasing
+    assert len(data["power"]) == len(data["voltage"])
+    fuentes = cobertura[cobertura["medida"] == "power"]["fuente"].tolist()
+    assert fuentes == ["influx1", "influx2"]
+
+
+def test_lector_flux_streaming_tipado():
+    from flux_reader import leer_csv_flux
+    import numpy as np
+
+    csv_flux = [
+        "#datatype,string,long,dateTime:RFC3339,dateTime:RFC3339,dateTime:RFC3339,string,string,double,double\n",
+        ",result,table,_start,_stop,_time,_measurement,location,Vrms_L1_Ins,THDV_L1_Ins\n",
+        ",_result,0,2023-08-01T00:00:00Z,2023-08-02T00:00:00Z,2023-08-01T00:00:00Z,Voltage,MEDIA,220.5,1.2\n",
+        ",_result,0,2023-08-01T00:00:00Z,2023-08-02T00:00:00Z,2023-08-01T00:00:10Z,Voltage,MEDIA,221,\n",
+        ",_result,0,2023-08-01T00:00:00Z,2023-08-02T00:00:00Z,2023-08-01T00:00:20.5Z,Voltage,MEDIA,219.75,1.4\n",
+        "\n",
+    ]
+    bloques = list(leer_csv_flux(csv_flux, ["Vrms_L1_Ins", "THDV_L1_Ins"], tamano_bloque=2))
+
+    assert [len(b) for b in bloques] == [2, 1]
+    df = pd.concat(bloques, ignore_index=True)
+    assert list(df.columns) == ["time", "Vrms_L1_Ins", "THDV_L1_Ins"]
+    assert df["Vrms_L1_Ins"].dtype == np.float32
+    assert np.isnan(df["THDV_L1_Ins"].iloc[1])
+    assert df["time"].iloc[2] == pd.Timestamp("2023-08-01T00:00:20.5")
+
+
+def test_lector_influxql_chunked_epoch():
+    from influxql_reader import leer_json_influxql
+    import numpy as np
+
+    chunks = [
+        '{"results":[{"statement_id":0,"series":[{"name":"Current","columns":["time","Irms_L1_Ins","THDI_L1_Ins"],'
+        '"values":[[1690848000000000000,10.5,3.1],[1690848010000000000,null,3.2]]}],"partial":true}]}',
+        '{"results":[{"statement_id":0,"series":[{"name":"Current","columns":["time","Irms_L1_Ins","THDI_L1_Ins"],'
+        '"values":[[1690848020000000000,11.0,3.3]]}]}]}',
+    ]
+    df = pd.concat(list(leer_json_influxql(chunks)), ignore_index=True)
+
+    assert len(df) == 3
+    assert df["time"].iloc[0] == pd.Timestamp("2023-08-01T00:00:00")
+    assert df["Irms_L1_Ins"].dtype == np.float32
+    assert np.isnan(df["Irms_L1_Ins"].iloc[1])
+
+
+def test_conector_compartido_reutiliza_clientes(monkeypatch):
+    import db_connector
+
+    creados = []
+    monkeypatch.setattr(db_connector.influxdb_client, "InfluxDBClient",
+                        lambda **kwargs: creados.append(kwargs) or _ClienteFalso())
+    db_connector.cerrar_conector()
+
+    db = db_connector.obtener_conector()
+    assert db_connector.obtener_conector() is db
+    db.query_influx2("consulta 1")
+    db.query_influx2("consulta 2")
+
+    assert len(creados) == 1
+    assert db.estadisticas() == {'conexiones_abiertas': 1, 'consultas_servidas': 2}
+    db_connector.cerrar_conector()
+
+
+def test_consultas_con_resolucion_agregan_en_el_servidor():
+    import pytest
+    import query_engine
+
+    flux = query_engine._consulta_flux("bk", "Power", ["PowA_L1_Ins"], fecha_inicio, fecha_fin, location,
+                                       "15m", ["mean", "max"])
+    assert "aggregateWindow(every: 15m, fn: mean" in flux
+    assert "aggregateWindow(every: 15m, fn: max" in flux
+    assert query_engine._columnas_agregadas(["PowA_L1_Ins"], ["mean", "max"]) == ["PowA_L1_Ins_mean", "PowA_L1_Ins_max"]
+    assert "aggregateWindow" not in query_engine._consulta_flux("bk", "Power", ["PowA_L1_Ins"],
+                                                                fecha_inicio, fecha_fin, location)
+
+    assert query_engine._select_influxql(["Fre_Ins"], ["last"]) == "last(Fre_Ins) AS Fre_Ins"
+    with pytest.raises(ValueError):
+        query_engine._normalizar_agregacion("15 minutos", "mean")
+    with pytest.raises(ValueError):
+        query_engine._normalizar_agregacion("1h", "mediana")
+
+
+def test_consulta_unica_devuelve_tabla_ancha(monkeypatch):
+    import query_engine
+    from flux_reader import leer_csv_flux
+
+    consultas = []
+
+    class _ConectorFalso:
+        def query_influx2_bloques(self, query, campos):
+            consultas.append(query)
+            filas = [",result,table,_time," + ",".join(campos) + "\n"]
+            for t in ("2023-08-01T00:00:00Z", "2023-08-01T00:00:10Z"):
+                filas.append(",_result,0," + t + "," + ",".join("1.5" for _ in campos) + "\n")
+            return leer_csv_flux(filas, campos)
+
+    monkeypatch.setattr(query_engine, "obtener_conector", _ConectorFalso)
+    data = query_engine.busqueda_influx_unica(fecha_inicio, fecha_fin, location, usar_cache=False)
+
+    assert len(consultas) == 1 and "group()" in consultas[0]
+    df = merge_data(data)
+    campos = [v for vs in query_engine.CAMPOS_POR_MEDIDA.values() for v in vs]
+    assert list(df.columns) == ["time"] + campos
+    assert len(df) == 2
+
+
+def test_fallo_transitorio_de_influx1_no_queda_en_cache(monkeypatch, tmp_path):
+    import query_engine
+    from query_cache import CacheConsultas
+    from utils.utils import utc_a_local_naive
+
+    def serie(ini, fin):
+        tiempos = pd.date_range(utc_a_local_naive(ini), utc_a_local_naive(fin), freq='10s')
+        return pd.DataFrame({"time": tiempos, "valor": 1.0})
+
+    # InfluxDB 2.7 no trae "power" y la consulta de 1.8 para ese hueco falla
+    def influx2_falso(ini, fin, loc, **kwargs):
+        data = {m: serie(ini, fin) for m in query_engine.MEDIDAS}
+        data["power"] = pd.DataFrame()
+        return data
+
+    def influx1_falso(ini, fin, loc, medidas=None, fallidas=None, **kwargs):
+        fallidas.update(medidas)
+        return {m: pd.DataFrame() for m in medidas}
+
+    cache = CacheConsultas(str(tmp_path))
+    monkeypatch.setattr(query_engine, "obtener_cache", lambda: cache)
+    monkeypatch.setattr(query_engine, "busqueda_influx2", influx2_falso)
+    monkeypatch.setattr(query_engine, "busqueda_influx1", influx1_falso)
+
+    ini, fin = '2023-08-01T00:00:00Z', '2023-08-03T00:00:00Z'
+    data = query_engine.busqueda_influx(ini, fin, location, usar_cache=True)
+    assert data["power"].empty and not data["voltage"].empty
+    assert cache.intervalos_faltantes(location, ["voltage"], ini, fin) == []
+    assert cache.intervalos_faltantes(location, ["power"], ini, fin) == [(ini, fin)]
+
+
+def test_muchos_huecos_se_piden_en_una_sola_consulta(monkeypatch):
+    import query_engine
+    from utils.utils import utc_a_local_naive
+
+    def serie(ini, fin, freq='10s'):
+        tiempos = pd.date_range(utc_a_local_naive(ini), utc_a_local_naive(fin), freq=freq)
+        return pd.DataFrame({"time": tiempos, "valor": 1.0})
+
+    # "power" en InfluxDB 2.7 tiene un hueco de 30 min cada 2 h: 12 huecos
+    def influx2_falso(ini, fin, loc, **kwargs):
+        data = {m: serie(ini, fin) for m in query_engine.MEDIDAS}
+        minutos = (data["power"]["time"] - data["power"]["time"].iloc[0]).dt.total_seconds() // 60
+        data["power"] = data["power"][minutos % 120 >= 30].reset_index(drop=True)
+        return data
+
+    pedidos = []
+
+    def influx1_falso(ini, fin, loc, medidas=None, **kwargs):
+        pedidos.append((ini, fin, tuple(medidas)))
+        # 1.8 con muestras desfasadas 5 s: fuera de los huecos no deben mezclarse
+        return {m: serie(ini, fin).assign(time=lambda d: d["time"] + pd.Timedelta(seconds=5), valor=2.0)
+                for m in medidas}
+
+    monkeypatch.setattr(query_engine, "busqueda_influx2", influx2_falso)
+    monkeypatch.setattr(query_engine, "busqueda_influx1", influx1_falso)
+    monkeypatch.setattr(query_engine, "FALLBACK_FUSION_HUECOS_SEG", 60)
+
+    data, cobertura = query_engine.busqueda_influx(fecha_inicio, fecha_fin, location,
+                                                   usar_cache=False, devolver_cobertura=True)
+
+    assert pedidos == [(fecha_inicio, '2023-08-01T22:30:00Z', ('power',))]
+    power = data["power"]
+    assert power["time"].is_monotonic_increasing
+    # Las filas de 1.8 llenan los 12 huecos (180 muestras cada uno) y no aparecen fuera
+    de_influx1 = power[power["valor"] == 2.0]["time"]
+    minutos = (de_influx1 - power["time"].iloc[0]).dt.total_seconds() / 60 % 120
+    assert 12 * 180 - 1 <= len(de_influx1) <= 12 * 181
+    assert ((minutos <= 30) | (minutos >= 119.5)).all()
+    assert (cobertura[cobertura["medida"] == "power"]["fuente"] == "influx1").sum() == 12
@@ -0,0 +1,53 @@
+# tests/test_query_planner.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import pandas as pd
+from query_planner import planificar_ventanas, consultar_por_ventanas
+
+
+def test_planificar_ventanas_cubre_el_rango():
+    ventanas = planificar_ventanas('2024-01-01T03:00:00Z', '2024-01-10T03:00:00Z', ventana='7D')
+    assert ventanas == [
+        ('2024-01-01T03:00:00Z', '2024-01-08T03:00:00Z'),
+        ('2024-01-08T03:00:00Z', '2024-01-10T03:00:00Z'),
+    ]
+
+
+def test_consultar_por_ventanas_reintenta_y_tolera_fallos():
+    intentos = {}
+
+    def consulta(ini, fin):
+        intentos[ini] = intentos.get(ini, 0) + 1
+        if ini.startswith('2024-01-02') and intentos[ini] == 1:
+            raise ConnectionError("timeout")
+        if ini.startswith('2024-01-03'):
+            raise ConnectionError("ventana rota")
+        t = pd.Timestamp(ini).tz_localize(None)
+        return {"power": pd.DataFrame({"time": [t, t + pd.Timedelta(hours=1)], "PowA_L1_Ins": [1.0, 2.0]})}
+
+    data = consultar_por_ventanas(consulta, '2024-01-01T00:00:00Z', '2024-01-04T00:00:00Z',
+                                  ventana='1D', max_workers=2, reintentos=1, espera_seg=0)
+
+    assert intentos['2024-01-02T00:00:00Z'] == 2
+    assert len(data["power"]) == 4, "La ventana que falla siempre no debe tirar abajo el resto"
+    assert data["power"]["time"].is_monotonic_increasing
+
+
+def test_ventanas_alineadas_a_dias_utc_no_repiten_dias_en_cache(tmp_path):
+    from query_cache import CacheConsultas
+    inicio, fin = '2024-01-01T03:00:00Z', '2024-01-16T03:00:00Z'
+    ventanas = planificar_ventanas(inicio, fin, ventana='7D', alinear_dias=True)
+    assert ventanas == [
+        ('2024-01-01T03:00:00Z', '2024-01-08T00:00:00Z'),
+        ('2024-01-08T00:00:00Z', '2024-01-15T00:00:00Z'),
+        ('2024-01-15T00:00:00Z', '2024-01-16T03:00:00Z'),
+    ]
+    assert len(planificar_ventanas(inicio, fin, ventana='12h', alinear_dias=True)) == 16
+
+    # Los días que la caché pide por ventana no se superponen
+    cache = CacheConsultas(directorio=str(tmp_path))
+    pedidos = [cache.intervalos_faltantes('MEDIA', ['power'], a, b) for a, b in ventanas]
+    assert all(p[0][1] <= q[0][0] for p, q in zip(pedidos, pedidos[1:]))
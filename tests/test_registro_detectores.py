@@ -0,0 +1,65 @@
+# tests/test_registro_detectores.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+import pytest
+import models.registro_detectores as registro
+import models.anomaly_detection  # noqa: F401  (registra LevelShift, VolatilityShift y AutoReg)
+from models.registro_detectores import registrar_detector, crear_detector, correr_detectores
+
+
+class DetectorUmbral:
+    """Marca los valores por encima de un umbral; cuenta las instancias creadas."""
+    creados = []
+
+    def __init__(self, umbral=1.0):
+        self.umbral = umbral
+        DetectorUmbral.creados.append(umbral)
+
+    def fit_detect(self, serie):
+        return serie > self.umbral
+
+
+@pytest.fixture
+def serie():
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.normal(size=(3000, 2)), axis=0)
+    return pd.DataFrame(x, index=pd.date_range('2024-01-01', periods=3000, freq='10s'), columns=['a', 'b'])
+
+
+@pytest.fixture
+def con_umbral():
+    DetectorUmbral.creados.clear()
+    registrar_detector("Umbral", DetectorUmbral, umbral=2.0)
+    yield
+    registro.DETECTORES.pop("Umbral", None)
+
+
+def test_solo_corren_los_detectores_pedidos(serie, con_umbral):
+    res = correr_detectores(serie, ["Umbral", "Umbral"], parametros={"Umbral": {"umbral": 5.0}})
+    assert list(res) == ["Umbral"] and DetectorUmbral.creados == [5.0]
+    pd.testing.assert_frame_equal(res["Umbral"], serie > 5.0)
+    assert crear_detector("Umbral").umbral == 2.0
+
+    with pytest.raises(ValueError):
+        correr_detectores(serie, ["NoExiste"])
+
+
+def test_pool_de_procesos_igual_a_en_serie(serie, con_umbral, monkeypatch):
+    monkeypatch.setattr(registro, "DETECTORES_MIN_FILAS_PARALELO", 0)
+    # Una fábrica que no se puede serializar corre en el proceso principal
+    registrar_detector("Lambda", lambda: DetectorUmbral(0.0))
+    try:
+        nombres = ["AutoReg", "LevelShift", "Umbral", "Lambda"]
+        en_serie = correr_detectores(serie, nombres, paralelo=False)
+        en_pool = correr_detectores(serie, nombres, paralelo=True, max_workers=2)
+    finally:
+        registro.DETECTORES.pop("Lambda", None)
+
+    assert list(en_pool) == nombres
+    for nombre in nombres:
+        pd.testing.assert_frame_equal(en_pool[nombre], en_serie[nombre])
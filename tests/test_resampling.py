@@ -0,0 +1,40 @@
+# tests/test_resampling.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_processing.resampling import remuestrear_grilla
+
+@pytest.fixture
+def df_irregular():
+    # Muestras corridas algunos ms/s de la grilla, un faltante corto y uno largo en 'a'
+    tiempos = pd.to_datetime([
+        "2024-01-01 00:00:00.003", "2024-01-01 00:00:09.998", "2024-01-01 00:00:20.001",
+        "2024-01-01 00:00:40.000", "2024-01-01 00:01:50.000",
+    ])
+    return pd.DataFrame({"time": tiempos, "a": [1.0, 2.0, np.nan, 4.0, 11.0], "b": [1.0, 1.0, 1.0, 1.0, 1.0]})
+
+def test_grilla_ffill_acotado(df_irregular):
+    grilla = remuestrear_grilla(df_irregular, paso_seg=10, metodo="ffill", max_relleno=2)
+
+    assert len(grilla) == 12
+    assert grilla.indice("2024-01-01 00:00:40") == 4
+    a = grilla.columna("a")
+    np.testing.assert_array_equal(a[:6], [1.0, 2.0, 2.0, 2.0, 4.0, 4.0])
+    assert np.isnan(a[7:11]).all()
+
+    huecos = grilla.tabla_huecos()
+    fila = huecos[huecos["columna"] == "a"].iloc[-1]
+    assert fila["inicio"] == pd.Timestamp("2024-01-01 00:01:10") and fila["muestras"] == 4
+
+    df = grilla.a_dataframe()
+    assert list(df.columns) == ["time", "a", "b"] and len(df) == 12
+    assert len(grilla.a_dataframe(solo_completas=True)) == 12 - int(grilla.huecos_mascara.any(axis=1).sum())
+
+def test_grilla_interpolacion(df_irregular):
+    grilla = remuestrear_grilla(df_irregular, paso_seg=10, metodo="interpolar", max_relleno=2)
+    np.testing.assert_allclose(grilla.columna("a")[1:5], [2.0, 8 / 3, 10 / 3, 4.0])
@@ -0,0 +1,64 @@
+# tests/test_rolling.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+import data_processing.rolling as rolling
+from data_processing.rolling import estadisticas_moviles
+from data_processing.data_cleaning import apply_rolling_norm, apply_rolling_norm_trif
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.normal(size=(5000, 3)), axis=0) + np.array([220.0, 1e6, 0.9])
+    x[rng.integers(0, 5000, 40), 1] = np.nan
+    return x
+
+
+@pytest.mark.parametrize("min_periodos", [None, 3])
+def test_estadisticas_moviles_como_pandas(series, monkeypatch, min_periodos):
+    # Segmentos cortos para ejercitar las ventanas que cruzan un reinicio de la suma acumulada
+    monkeypatch.setattr(rolling, "SEGMENTO", 512)
+    df = pd.DataFrame(series)
+    resultado = estadisticas_moviles(series, [5, 40, 600], min_periodos=min_periodos)
+    for w, stats in resultado.items():
+        r = df.rolling(w, min_periods=min_periodos)
+        esperado = {"media": r.mean(), "desvio": r.std(), "min": r.min(), "max": r.max()}
+        for nombre, ref in esperado.items():
+            np.testing.assert_allclose(stats[nombre], ref.to_numpy(), rtol=1e-4, atol=1e-9,
+                                       err_msg=f"ventana {w}, {nombre}")
+
+
+def test_estadisticas_moviles_desvio_exacto(series):
+    x = series[:, [0, 2]]
+    w = 20
+    exacto = sliding_window_view(x, w, axis=0).std(axis=-1, ddof=1)
+    desvio = estadisticas_moviles(x, w, estadisticas=("desvio",))[w]["desvio"]
+    assert np.isnan(desvio[:w - 1]).all()
+    np.testing.assert_allclose(desvio[w - 1:], exacto, rtol=1e-6)
+
+
+def test_apply_rolling_norm_trif_igual_a_por_fase(series):
+    s = [pd.Series(series[:, k], name=f"L{k + 1}") for k in range(3)]
+    trif = apply_rolling_norm_trif(*s, 30)
+    for k in range(3):
+        norm, std = apply_rolling_norm(s[k], 30)
+        pd.testing.assert_series_equal(trif[k], norm)
+        pd.testing.assert_series_equal(trif[3 + k], std)
+        pd.testing.assert_series_equal(norm, s[k].rolling(30).mean(), rtol=1e-6)
+
+
+def test_desvio_de_un_contador_que_deriva():
+    # Como EA_I_IV_T: contador de energía creciente, lejos de su media global
+    rng = np.random.default_rng(2)
+    x = 1e7 + np.cumsum(rng.uniform(0, 50, 1_000_000))
+    w = 40
+    exacto = sliding_window_view(x, w).std(axis=-1, ddof=1)
+    desvio = estadisticas_moviles(x, w, estadisticas=("desvio",))[w]["desvio"]
+    np.testing.assert_allclose(desvio[w - 1:], exacto, rtol=1e-6)
@@ -0,0 +1,48 @@
+# tests/test_schema.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+from schema import CAMPOS, campos_por_medida, dtype_de, aplicar_esquema, fuera_de_rango
+
+def test_registro_genera_campos_y_tipos():
+    por_medida = campos_por_medida()
+    assert list(por_medida) == ["voltage", "power", "energy", "frequency", "current"]
+    assert por_medida["energy"] == ["EA_I_IV_T"]
+    assert sum(len(v) for v in por_medida.values()) == len(CAMPOS)
+
+    assert dtype_de("EA_I_IV_T") == np.float64
+    assert dtype_de("Vrms_L1_Ins") == np.float32
+    assert dtype_de("THDI_L2_Ins_max") == np.float32
+    assert dtype_de("EA_I_IV_T_last") == np.float64
+
+def test_aplicar_esquema_y_rangos():
+    df = pd.DataFrame({
+        "time": pd.date_range("2024-01-01", periods=3, freq="10s"),
+        "Vrms_L1_Ins": [220.0, 221.0, 999.0],
+        "EA_I_IV_T": [123456789.125, 123456790.25, 123456791.5],
+        "otra": [1, 2, 3],
+    })
+    aplicar_esquema(df)
+    assert df["Vrms_L1_Ins"].dtype == np.float32
+    assert df["EA_I_IV_T"].dtype == np.float64 and df["EA_I_IV_T"].iloc[0] == 123456789.125
+    assert df["otra"].dtype == np.int64
+    assert fuera_de_rango(df) == {"Vrms_L1_Ins": 1}
+
+def test_lectores_decodifican_con_el_esquema():
+    from flux_reader import leer_csv_flux
+    from influxql_reader import leer_json_influxql
+
+    csv_flux = [",result,table,_time,Fre_Ins,EA_I_IV_T\n",
+                ",_result,0,2024-01-01T00:00:00Z,50.01,123456789.125\n"]
+    df = next(leer_csv_flux(csv_flux, ["Fre_Ins", "EA_I_IV_T"], dtype=dtype_de))
+    assert df["Fre_Ins"].dtype == np.float32 and df["EA_I_IV_T"].dtype == np.float64
+    assert df["EA_I_IV_T"].iloc[0] == 123456789.125
+
+    json_influxql = ['{"results":[{"series":[{"name":"Energy","columns":["time","EA_I_IV_T"],'
+                     '"values":[[1704067200000000000,123456789.125]]}]}]}']
+    df = next(leer_json_influxql(json_influxql, dtype=dtype_de))
+    assert df["EA_I_IV_T"].dtype == np.float64 and df["EA_I_IV_T"].iloc[0] == 123456789.125
@@ -0,0 +1,64 @@
+# tests/test_storage.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from storage import guardar_artefacto, leer_artefacto, convertir_csv
+
+
+def _df(filas=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'time': pd.date_range('2024-03-01', periods=filas, freq='10s'),
+        'PowA_L1_Ins': rng.normal(size=filas).astype(np.float32),
+        'EA_I_IV_T': rng.normal(size=filas),
+        'THDI_L1_Ins': rng.normal(size=filas).astype(np.float32),
+    })
+
+
+@pytest.mark.parametrize("formato", ["parquet", "feather", "csv"])
+def test_ida_y_vuelta_con_tipos_y_lectura_selectiva(tmp_path, formato):
+    df = _df()
+    ruta = guardar_artefacto(df, "df_clean", str(tmp_path), formato=formato)
+    assert ruta.endswith("." + formato)
+
+    leido = leer_artefacto("df_clean." + formato, str(tmp_path))
+    assert leido['PowA_L1_Ins'].dtype == np.float32 and leido['time'].dtype == 'datetime64[ns]'
+    pd.testing.assert_frame_equal(leido, df, check_exact=formato != "csv", rtol=1e-6)
+
+    parcial = leer_artefacto("df_clean." + formato, str(tmp_path), columnas=['THDI_L1_Ins'],
+                             desde='2024-03-01 00:10:00', hasta='2024-03-01 00:20:00')
+    assert list(parcial.columns) == ['THDI_L1_Ins'] and len(parcial) == 61
+
+
+def test_convertir_csv_viejo(tmp_path):
+    df = _df()
+    # CSV como los escribía el pipeline: con el índice y sin tipos
+    df.to_csv(tmp_path / "serie_anomala_AutoReg.csv", index=True)
+    escritos = convertir_csv(str(tmp_path), formato="parquet", borrar=True)
+
+    assert escritos == [str(tmp_path / "serie_anomala_AutoReg.parquet")]
+    assert not (tmp_path / "serie_anomala_AutoReg.csv").exists()
+    # Sin extensión se encuentra el Parquet convertido
+    leido = leer_artefacto("serie_anomala_AutoReg", str(tmp_path))
+    pd.testing.assert_frame_equal(leido, df, check_exact=False, rtol=1e-6)
+
+
+@pytest.mark.parametrize("formato", ["parquet", "feather"])
+def test_esquema_al_guardar_y_al_leer(tmp_path, formato):
+    df = _df().astype({'PowA_L1_Ins': np.float64})
+    etiquetas = pd.DataFrame({'time': df['time'][:3], 'THDI_L1_Ins': [True, False, np.nan]})
+
+    guardar_artefacto(df, "df_norm", str(tmp_path), formato=formato)
+    guardar_artefacto(etiquetas, "eventos", str(tmp_path), formato=formato)
+    assert df['PowA_L1_Ins'].dtype == np.float64, "No debe modificar el DataFrame recibido"
+    assert leer_artefacto("df_norm", str(tmp_path))['PowA_L1_Ins'].dtype == np.float32
+    assert list(leer_artefacto("eventos", str(tmp_path))['THDI_L1_Ins'][:2]) == [True, False]
+
+    # Un artefacto escrito sin tipar también se lee con los tipos del esquema
+    df.to_parquet(tmp_path / "viejo.parquet", index=False)
+    assert leer_artefacto("viejo.parquet", str(tmp_path))['PowA_L1_Ins'].dtype == np.float32
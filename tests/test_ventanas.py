@@ -0,0 +1,40 @@
+# tests/test_ventanas.py
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+from data_processing.ventanas import posiciones_en, mascara_exclusion, extraer_ventanas, estadisticas_columnas
+
+
+def test_posiciones_primera_fila_y_ausentes():
+    t = pd.Series(pd.date_range('2024-01-01', periods=10, freq='10s'))
+    assert posiciones_en(t, [t[3], t[0], pd.Timestamp('2030-01-01'), t[9]]).tolist() == [3, 0, -1, 9]
+
+    # Desordenados y con repetidos: gana la primera aparición
+    t_desordenado = t[[5, 2, 7, 2, 0]].reset_index(drop=True)
+    assert posiciones_en(t_desordenado, [t[2], t[0], t[1]]).tolist() == [1, 4, -1]
+    assert posiciones_en(t, []).tolist() == []
+
+
+def test_mascara_exclusion_igual_a_fuerza_bruta():
+    t = pd.Series(pd.date_range('2024-01-01', periods=2000, freq='10s'))
+    centros = t.sample(15, random_state=1).tolist() + [pd.Timestamp('2023-12-31 23:58:00')]
+    radio = pd.Timedelta(seconds=3000)
+    esperado = np.array([any(abs(x - c) < radio for c in centros) for x in t])
+    np.testing.assert_array_equal(mascara_exclusion(t, centros, radio), esperado)
+    assert not mascara_exclusion(t, [], radio).any()
+
+
+def test_extraer_ventanas_y_estadisticas():
+    x = np.arange(40, dtype=np.float32).reshape(20, 2)
+    ventanas = extraer_ventanas(x, [4, 19], 5)
+    assert ventanas.shape == (2, 5, 2) and ventanas.dtype == np.float32
+    np.testing.assert_array_equal(ventanas[1], x[15:20])
+
+    media, desvio = estadisticas_columnas(ventanas)
+    juntas = np.concatenate([x[0:5], x[15:20]])
+    np.testing.assert_allclose(media, juntas.mean(axis=0))
+    np.testing.assert_allclose(desvio, juntas.std(axis=0, ddof=1))